@@ -29,13 +29,19 @@ from dateutil import parser as date_parser
 from dateutil.parser import ParserError
 from dateutil.relativedelta import relativedelta
 from nise import __version__
+from nise.generators.aws import AWS_GRANULARITIES
+from nise.plan import load_plan_cache
+from nise.plan import plan_cache_key
 from nise.report import aws_create_marketplace_report
 from nise.report import aws_create_report
 from nise.report import azure_create_report
 from nise.report import gcp_create_report
 from nise.report import oci_create_report
 from nise.report import ocp_create_report
+from nise.upload import configure_uploads
+from nise.upload import MB
 from nise.util import load_yaml
+from nise.util import load_yaml_cached
 from nise.util import LOG
 from nise.util import LOG_VERBOSITY
 from nise.yaml_gen import add_yaml_parser_args
@@ -126,6 +132,22 @@ def add_aws_parser_args(parser):
                             or \'overwrite\' to finalize the normal report files.
                             """,
     )
+    parser.add_argument(
+        "--aws-batch",
+        dest="aws_batch",
+        action="store_true",
+        required=False,
+        help="Generate each generator's hours as a columnar batch instead of one row at a time.",
+    )
+    parser.add_argument(
+        "--aws-granularity",
+        metavar="GRANULARITY",
+        dest="aws_granularity",
+        choices=AWS_GRANULARITIES,
+        default="hourly",
+        required=False,
+        help="Time granularity of the report line items: hourly, daily or monthly.",
+    )
 
 
 def add_aws_marketplace_parser_args(parser):
@@ -203,6 +225,13 @@ def add_azure_parser_args(parser):
         required=False,
         help="Generate resource group based azure report.",
     )
+    parser.add_argument(
+        "--azure-stream-upload",
+        dest="azure_stream_upload",
+        action="store_true",
+        required=False,
+        help="Stage blocks of each report blob while the report is generated, instead of uploading it afterwards.",
+    )
 
 
 def add_gcp_parser_args(parser):
@@ -253,6 +282,21 @@ def add_gcp_parser_args(parser):
         required=False,
         help="Whether to generate a resource level report",
     )
+    parser.add_argument(
+        "--gcp-resource-count",
+        metavar="RESOURCE_COUNT",
+        dest="gcp_resource_count",
+        required=False,
+        type=int,
+        help="Number of distinct resources each generator reports in a resource level report.",
+    )
+    parser.add_argument(
+        "--gcp-gzip",
+        dest="gcp_gzip",
+        action="store_true",
+        required=False,
+        help="Gzip the JSON Lines files loaded into a BigQuery dataset.",
+    )
 
 
 def add_ocp_parser_args(parser):
@@ -285,6 +329,14 @@ def add_ocp_parser_args(parser):
         required=False,
         help="The name used to save a payload.",
     )
+    parser.add_argument(
+        "--payload-max-size",
+        metavar="MEGABYTES",
+        dest="payload_max_size",
+        required=False,
+        type=int,
+        help="Maximum size of the reports packed into one payload, 100 MB by default.",
+    )
     parser.add_argument(
         "--ros-ocp-info",
         dest="ros_ocp_info",
@@ -380,9 +432,39 @@ def create_parser():
         default=100000,
         help="Maximum number of lines per report file. Default is 100000.",
     )
+    parent_parser.add_argument(
+        "--upload-concurrency",
+        metavar="UPLOAD_CONCURRENCY",
+        dest="upload_concurrency",
+        required=False,
+        type=int,
+        help="Number of files, and of parts of a large file, uploaded at once. Default is 8.",
+    )
+    parent_parser.add_argument(
+        "--upload-chunk-size",
+        metavar="MEGABYTES",
+        dest="upload_chunk_size",
+        required=False,
+        type=int,
+        help="Size in megabytes of the parts of multipart uploads. Default is 8.",
+    )
     parent_parser.add_argument(
         "--static-report-file", dest="static_report_file", required=False, help="Generate static data based on yaml."
     )
+    parent_parser.add_argument(
+        "--plan-cache",
+        metavar="PLAN_CACHE_FILE",
+        dest="plan_cache",
+        required=False,
+        help="Cache the compiled generation plan for --static-report-file in this file and reuse it on later runs.",
+    )
+    parent_parser.add_argument(
+        "--yaml-cache",
+        dest="yaml_cache",
+        action="store_true",
+        required=False,
+        help="Keep a pre-parsed copy of --static-report-file next to it and reuse it while the file is unchanged.",
+    )
     parent_parser.add_argument(
         "-w",
         "--write-monthly",
@@ -684,6 +766,23 @@ def _validate_provider_inputs(parser, options):
     return (valid_inputs, provider_type)
 
 
+def _load_cached_plan(options, static_file, generator_dates):
+    """Reuse the cached generation plan for the static file and its resolved dates, if the plan cache holds one.
+
+    On a cache miss the cache key is kept in the options, so that the plan can be
+    cached once it is built.
+    """
+    plan_cache = options.get("plan_cache")
+    if not plan_cache:
+        return
+    cache_key = plan_cache_key(static_file, options, generator_dates)
+    state = load_plan_cache(plan_cache, cache_key)
+    if state:
+        options["generation_plan"] = state.get("plan")
+    else:
+        options["plan_cache_key"] = cache_key
+
+
 def _load_static_report_data(options):
     """Validate/load and set start_date if static file is provided."""
     if not options.get("static_report_file"):
@@ -698,7 +797,8 @@ def _load_static_report_data(options):
     aws_tags = set()
     start_dates = []
     end_dates = []
-    static_report_data = load_yaml(static_file)
+    generator_dates = []
+    static_report_data = (load_yaml_cached if options.get("yaml_cache") else load_yaml)(static_file)
     for generator_dict in static_report_data.get("generators"):
         for attributes in generator_dict.values():
             start_date = get_start_date(attributes, options)
@@ -720,6 +820,7 @@ def _load_static_report_data(options):
                 generated_end_date += datetime.timedelta(hours=24)
 
             end_dates.append(generated_end_date)
+            generator_dates.append((generated_start_date, generated_end_date))
 
             attributes["start_date"] = str(generated_start_date)
             attributes["end_date"] = str(generated_end_date)
@@ -736,6 +837,7 @@ def _load_static_report_data(options):
     if options.get("provider") == "aws" and aws_tags:
         options["aws_tags"] = aws_tags
 
+    _load_cached_plan(options, static_file, generator_dates)
     return True
 
 
@@ -819,6 +921,9 @@ def run(provider_type, options):
 
     LOG.debug("Options are: %s", pformat(options))
 
+    chunk_size = options.get("upload_chunk_size")
+    configure_uploads(chunk_size=chunk_size and chunk_size * MB, max_concurrency=options.get("upload_concurrency"))
+
     LOG.info("Creating reports...")
     if provider_type == "aws":
         aws_create_report(options)
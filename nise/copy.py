@@ -17,17 +17,74 @@
 """Defines the upload mechanism to local directories for simulation."""
 import os
 import shutil
+from uuid import uuid4
 
 from nise.util import LOG
 
 
-def copy_to_local_dir(local_dir_home, local_path, local_file_path=None):
+def _temp_path(destination):
+    """Return a unique temporary path next to destination."""
+    directory, name = os.path.split(destination)
+    return os.path.join(directory, f".{name}.{uuid4().hex}.tmp")
+
+
+def _replace(temp_path, destination, write):
+    """Write temp_path with write, then rename it over destination, never leaving a partial file."""
+    try:
+        write(temp_path)
+        os.replace(temp_path, destination)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def place_file(source, destination, link=False):
+    """Atomically place the content of source at destination.
+
+    With link, source is hard linked when it is on the same filesystem as
+    destination, so none of its bytes are copied. Only link a source that is
+    removed afterwards: a source kept and later rewritten in place would change
+    the linked destination too. Copies go through shutil.copyfile, which copies
+    inside the kernel where the platform allows it. The destination is replaced
+    by a rename, so an existing destination is never rewritten in place.
+
+    Args:
+        source (String): The path of the file to place
+        destination (String): The path to place the file at
+        link (Boolean): hard link source when possible instead of copying it
+    """
+
+    def write(temp_path):
+        if link:
+            try:
+                os.link(source, temp_path)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(source, temp_path)
+
+    _replace(_temp_path(destination), destination, write)
+
+
+def write_file(destination, reader):
+    """Atomically write the content of a binary reader to destination."""
+
+    def write(temp_path):
+        with open(temp_path, "wb") as temp_file:
+            shutil.copyfileobj(reader, temp_file)
+
+    _replace(_temp_path(destination), destination, write)
+
+
+def copy_to_local_dir(local_dir_home, local_path, local_file_path=None, link=False):
     """Upload data to an local directory.
 
     Args:
         local_dir_home (String): Local file path representing the bucket
         local_path  (String): The local file system path of the file
         local_file_path (String): The path to store the file to
+        link (Boolean): hard link the file when possible, for files removed after the upload
     Returns:
         (Boolean): True if file was uploaded
 
@@ -41,7 +98,7 @@ def copy_to_local_dir(local_dir_home, local_path, local_file_path=None):
         full_bucket_path = f"{local_dir_home}/{local_file_path}"
         outpath = local_file_path
     os.makedirs(os.path.dirname(full_bucket_path), exist_ok=True)
-    shutil.copyfile(local_path, full_bucket_path)
+    place_file(local_path, full_bucket_path, link)
     msg = f"Copied {outpath} to local directory {local_dir_home}."
     LOG.info(msg)
     return True
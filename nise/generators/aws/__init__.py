@@ -16,7 +16,13 @@
 #
 """Module for aws data generators."""
 from nise.generators.aws.aws_constants import REGIONS  # noqa: F401
+from nise.generators.aws.aws_generator import aggregate_aws_rows  # noqa: F401
+from nise.generators.aws.aws_generator import AWS_GRANULARITIES  # noqa: F401
+from nise.generators.aws.aws_generator import AWS_STAMP_COLS  # noqa: F401
+from nise.generators.aws.aws_generator import AWSBatch  # noqa: F401
+from nise.generators.aws.aws_generator import AWSColumnSchema  # noqa: F401
 from nise.generators.aws.aws_generator import AWSGenerator  # noqa: F401
+from nise.generators.aws.aws_generator import get_aws_column_schema  # noqa: F401
 from nise.generators.aws.data_transfer_generator import DataTransferGenerator  # noqa: F401
 from nise.generators.aws.ebs_generator import EBSGenerator  # noqa: F401
 from nise.generators.aws.ec2_generator import EC2Generator  # noqa: F401
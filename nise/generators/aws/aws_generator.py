@@ -17,8 +17,17 @@
 """Defines the abstract generator."""
 import datetime
 from abc import abstractmethod
+from collections.abc import Hashable
+from functools import lru_cache
+from itertools import chain
+from itertools import groupby
+from itertools import islice
+from itertools import repeat
 from random import choice
+from random import choices
+from random import getrandbits
 from random import randint
+from types import MappingProxyType
 
 from nise.generators.aws.aws_constants import REGIONS
 from nise.generators.generator import AbstractGenerator
@@ -219,36 +228,226 @@ SAVINGS_COLS = (
 )
 
 
+RESOURCE_TAG_COLS = (
+    "resourceTags/aws:createdBy",
+    "resourceTags/user:app",
+    "resourceTags/user:environment",
+    "resourceTags/user:openshift_cluster",
+    "resourceTags/user:openshift_node",
+    "resourceTags/user:openshift_project",
+    "resourceTags/user:storageclass",
+    "resourceTags/user:version",
+)
+COST_CATEGORY_COLS = (
+    "costCategory/Charge type",
+    "costCategory/CostCenter",
+    "costCategory/OUs",
+    "costCategory/Organization",
+)
+AWS_GRANULARITIES = ("hourly", "daily", "monthly")
+AWS_STAMP_COLS = (
+    "bill/BillingPeriodEndDate",
+    "bill/BillingPeriodStartDate",
+    "identity/LineItemId",
+    "identity/TimeInterval",
+    "lineItem/UsageEndDate",
+    "lineItem/UsageStartDate",
+)
+AWS_ADDITIVE_COLS = (
+    "lineItem/BlendedCost",
+    "lineItem/NormalizedUsageAmount",
+    "lineItem/UnblendedCost",
+    "lineItem/UsageAmount",
+    "pricing/publicOnDemandCost",
+    "reservation/AmortizedUpfrontCostForUsage",
+    "reservation/EffectiveCost",
+    "reservation/RecurringFeeForUsage",
+    "savingsPlan/SavingsPlanEffectiveCost",
+)
+BASE_COLS = (
+    IDENTITY_COLS
+    + BILL_COLS
+    + LINE_ITEM_COLS
+    + PRODUCT_COLS
+    + PRICING_COLS
+    + RESERVE_COLS
+    + SAVINGS_COLS
+    + RESOURCE_TAG_COLS
+    + COST_CATEGORY_COLS
+)
+
+
+class AWSColumnSchema:
+    """Ordered, immutable column layout of an AWS report."""
+
+    def __init__(self, tag_cols=(), category_cols=()):
+        """Compile the schema.
+
+        Args:
+            tag_cols (Iterable): resource tag columns on top of the default ones
+            category_cols (Iterable): cost category columns on top of the default ones
+        """
+        self.tag_columns = tuple(sorted(set(RESOURCE_TAG_COLS).union(tag_cols)))
+        self.category_columns = COST_CATEGORY_COLS
+        self.columns = tuple(sorted(set(BASE_COLS).union(self.tag_columns, category_cols)))
+        self.positions = MappingProxyType({column: index for index, column in enumerate(self.columns)})
+        self._empty_row = dict.fromkeys(self.columns, "")
+
+    def __iter__(self):
+        """Iterate over the ordered columns."""
+        return iter(self.columns)
+
+    def __len__(self):
+        """Return the number of columns."""
+        return len(self.columns)
+
+    def __contains__(self, column):
+        """Return whether the column is part of the schema."""
+        return column in self.positions
+
+    def index(self, column):
+        """Return the position of a column."""
+        return self.positions[column]
+
+    def new_row(self):
+        """Return a row with every column set to an empty value."""
+        return self._empty_row.copy()
+
+
+@lru_cache
+def _compile_aws_column_schema(tag_cols, category_cols):
+    """Compile and memoize a schema."""
+    return AWSColumnSchema(tag_cols, category_cols)
+
+
+def _csv_field(value):
+    """Render a value the way csv.writer does with minimal quoting."""
+    if value is None:
+        return ""
+    text = value if isinstance(value, str) else str(value)
+    if "," in text or '"' in text or "\n" in text or "\r" in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+class AWSBatch:
+    """Columnar block of AWS report rows.
+
+    Every column holds either a single value shared by all rows or a list with one
+    value per row. Columns of the schema that are missing are empty in every row.
+    """
+
+    def __init__(self, schema, length, columns):
+        """Initialize the batch.
+
+        Args:
+            schema (AWSColumnSchema): columns of the report the batch belongs to
+            length (int): number of rows
+            columns (Dict): column name to shared value or list of per row values
+        """
+        self.schema = schema
+        self.length = length
+        self.columns = columns
+
+    @classmethod
+    def from_rows(cls, schema, rows):
+        """Build a batch from a list of row dicts."""
+        columns = {}
+        for index, row in enumerate(rows):
+            for column, value in row.items():
+                columns.setdefault(column, [""] * len(rows))[index] = value
+        return cls(schema, len(rows), columns)
+
+    def __len__(self):
+        """Return the number of rows."""
+        return self.length
+
+    def column(self, name):
+        """Return the per row values of a column."""
+        value = self.columns.get(name, "")
+        return value if isinstance(value, list) else [value] * self.length
+
+    def slice(self, start, stop):
+        """Return the rows between start and stop as a new batch."""
+        columns = {
+            column: value[start:stop] if isinstance(value, list) else value for column, value in self.columns.items()
+        }
+        return AWSBatch(self.schema, len(range(start, min(stop, self.length))), columns)
+
+    def rows(self):
+        """Yield the batch as row dicts."""
+        for index in range(self.length):
+            row = self.schema.new_row()
+            for column, value in self.columns.items():
+                row[column] = value[index] if isinstance(value, list) else value
+            yield row
+
+    def value_rows(self, header, overrides=None):
+        """Return an iterator of value lists ordered like header.
+
+        Args:
+            header (List): ordered column names
+            overrides (Dict): column values used in place of the batch values
+        """
+        overrides = overrides or {}
+        values = []
+        for column in header:
+            value = overrides[column] if column in overrides else self.columns.get(column, "")
+            values.append(value if isinstance(value, list) else repeat(value, self.length))
+        return zip(*values)
+
+    def csv_lines(self, header, overrides=None):
+        """Yield the batch as csv lines ordered like header.
+
+        Shared columns are rendered once into a line template, so each row only
+        formats its own per row values and stamps them into the template.
+
+        Args:
+            header (List): ordered column names
+            overrides (Dict): column values used in place of the batch values
+        """
+        overrides = overrides or {}
+        fields = []
+        per_row = []
+        for column in header:
+            value = overrides[column] if column in overrides else self.columns.get(column, "")
+            if isinstance(value, list):
+                fields.append("%s")
+                per_row.append(value)
+            else:
+                fields.append(_csv_field(value).replace("%", "%%"))
+        template = ",".join(fields) + "\r\n"
+        if not per_row:
+            yield from repeat(template % (), self.length)
+            return
+        for values in zip(*per_row):
+            yield template % tuple(map(_csv_field, values))
+
+    def per_row_columns(self):
+        """Return the columns holding a value per row."""
+        return {column for column, value in self.columns.items() if isinstance(value, list)}
+
+
+@lru_cache
+def _region_locations(region):
+    """Return the locations matching a region, zone or storage region, or every location if none match."""
+    return tuple(option for option in REGIONS if region in option) or REGIONS
+
+
+def get_aws_column_schema(tag_cols=None, category_cols=None):
+    """Return the column schema for a set of extra tag and cost category columns.
+
+    Schemas are compiled once and shared by every generator and sink asking for the same columns.
+    """
+    return _compile_aws_column_schema(frozenset(tag_cols or ()), frozenset(category_cols or ()))
+
+
 class AWSGenerator(AbstractGenerator):
     """Defines a abstract class for generators."""
 
-    RESOURCE_TAG_COLS = {
-        "resourceTags/user:environment",
-        "resourceTags/user:app",
-        "resourceTags/user:version",
-        "resourceTags/user:storageclass",
-        "resourceTags/user:openshift_cluster",
-        "resourceTags/user:openshift_project",
-        "resourceTags/user:openshift_node",
-        "resourceTags/aws:createdBy",
-    }
-    COST_CATEGORY_COLS = {
-        "costCategory/Charge type",
-        "costCategory/CostCenter",
-        "costCategory/OUs",
-        "costCategory/Organization",
-    }
-    AWS_COLUMNS = set(
-        IDENTITY_COLS
-        + BILL_COLS
-        + LINE_ITEM_COLS
-        + PRODUCT_COLS
-        + PRICING_COLS
-        + RESERVE_COLS
-        + SAVINGS_COLS
-        + tuple(RESOURCE_TAG_COLS)
-        + tuple(COST_CATEGORY_COLS)
-    )
+    RESOURCE_TAG_COLS = RESOURCE_TAG_COLS
+    COST_CATEGORY_COLS = COST_CATEGORY_COLS
+    AWS_COLUMNS = get_aws_column_schema().columns
 
     def __init__(self, start_date, end_date, currency, payer_account, usage_accounts, attributes=None, tag_cols=None):
         """Initialize the generator."""
@@ -259,13 +458,15 @@ class AWSGenerator(AbstractGenerator):
         self._tags = None
         self._cost_category = None
         self.num_instances = 1 if attributes else randint(2, 60)
-        if tag_cols:
-            self.RESOURCE_TAG_COLS.update(tag_cols)
-            self.AWS_COLUMNS.update(tag_cols)
         if attributes:
             if _cost_categories := attributes.get("cost_category"):
                 self._cost_category = _cost_categories
-                self.AWS_COLUMNS.update(_cost_categories.keys())
+        self.schema = get_aws_column_schema(tag_cols, self._cost_category)
+        self.RESOURCE_TAG_COLS = self.schema.tag_columns
+        self.AWS_COLUMNS = self.schema.columns
+        self._locations = _region_locations(self.attributes.get("region"))
+        self._legal_entity = self.attributes.get("legal_entity") or "Amazon Web Services, Inc."
+        self._time_invariant = None
 
         super().__init__(start_date, end_date)
 
@@ -304,39 +505,27 @@ class AWSGenerator(AbstractGenerator):
 
         bill_begin = start.replace(microsecond=0, second=0, minute=0, hour=0, day=1)
         bill_end = AbstractGenerator.next_month(bill_begin)
-        row = {}
-        COL_MAP = {
-            "identity/LineItemId": self.fake.sha1(raw_output=False),
-            "identity/TimeInterval": AWSGenerator.time_interval(start, end),
-            "bill/BillingEntity": "AWS",
-            "bill/BillType": "Anniversary",
-            "bill/PayerAccountId": self.payer_account,
-            "bill/BillingPeriodStartDate": AWSGenerator.timestamp(bill_begin),
-            "bill/BillingPeriodEndDate": AWSGenerator.timestamp(bill_end),
-        }
-        for column in self.AWS_COLUMNS:
-            row[column] = ""
-            if COL_MAP.get(column):
-                row[column] = COL_MAP.get(column)
-
+        row = self.schema.new_row()
+        row.update(
+            {
+                "identity/LineItemId": self.fake.sha1(raw_output=False),
+                "identity/TimeInterval": AWSGenerator.time_interval(start, end),
+                "bill/BillingEntity": "AWS",
+                "bill/BillType": "Anniversary",
+                "bill/PayerAccountId": self.payer_account,
+                "bill/BillingPeriodStartDate": AWSGenerator.timestamp(bill_begin),
+                "bill/BillingPeriodEndDate": AWSGenerator.timestamp(bill_end),
+            }
+        )
         return row
 
     def _get_location(self):
         """Pick instance location."""
-        options = None
-        if region := self.attributes.get("region"):
-            options = [option for option in REGIONS if region in option]
-        if options:
-            location = choice(options)
-        else:
-            location = choice(REGIONS)
-        return location
+        return choice(self._locations)
 
     def _get_legal_entity(self):
         """Pick legal entity."""
-        if self.attributes and self.attributes.get("legal_entity"):
-            return self.attributes.get("legal_entity")
-        return "Amazon Web Services, Inc."
+        return self._legal_entity
 
     def _add_common_usage_info(self, row, start, end, **kwargs):
         """Add common usage information."""
@@ -351,30 +540,129 @@ class AWSGenerator(AbstractGenerator):
     def _add_tag_data(self, row):
         """Add tag data to the row."""
         if self._tags:
-            for tag in self._tags:
-                row[tag] = self._tags[tag]
+            row.update(self._tags)
         else:
             num_tags = self.fake.random_int(0, 5)
-            for _ in range(num_tags):
-                seen_tags = set()
-                tag_key = choice(list(self.RESOURCE_TAG_COLS))
-                if tag_key not in seen_tags:
-                    row[tag_key] = self.fake.word()
-                    seen_tags.update([tag_key])
+            for tag_key, value in zip(choices(self.RESOURCE_TAG_COLS, k=num_tags), self.fake.words(num_tags)):
+                row[tag_key] = value
 
     def _add_category_data(self, row):
         """Add category data to the row."""
         if self._cost_category:
-            for category in self._cost_category.keys():
-                row[category] = self._cost_category[category]
+            row.update(self._cost_category)
         else:
             num_category = self.fake.random_int(0, 5)
-            for _ in range(num_category):
-                seen_categories = set()
-                category_key = choice(list(self.COST_CATEGORY_COLS))
-                if category_key not in seen_categories:
-                    row[category_key] = self.fake.word()
-                    seen_categories.update([category_key])
+            for category_key, value in zip(
+                choices(self.COST_CATEGORY_COLS, k=num_category), self.fake.words(num_category)
+            ):
+                row[category_key] = value
+
+    def _common_columns(self, hours):
+        """Return the identity, bill and common line item columns for the hours."""
+        starts = [hour.get("start") for hour in hours]
+        ends = [hour.get("end") for hour in hours]
+        timestamps = {}
+        for moment in chain(starts, ends):
+            if moment not in timestamps:
+                timestamps[moment] = AWSGenerator.timestamp(moment)
+        bill_periods = {}
+        for start in starts:
+            month = (start.year, start.month)
+            if month not in bill_periods:
+                bill_begin = start.replace(microsecond=0, second=0, minute=0, hour=0, day=1)
+                bill_end = AbstractGenerator.next_month(bill_begin)
+                bill_periods[month] = (AWSGenerator.timestamp(bill_begin), AWSGenerator.timestamp(bill_end))
+        periods = [bill_periods[(start.year, start.month)] for start in starts]
+        return {
+            "identity/LineItemId": [f"{getrandbits(160):040x}" for _ in hours],
+            "identity/TimeInterval": [f"{timestamps[start]}/{timestamps[end]}" for start, end in zip(starts, ends)],
+            "bill/BillingEntity": "AWS",
+            "bill/BillType": "Anniversary",
+            "bill/PayerAccountId": self.payer_account,
+            "bill/BillingPeriodStartDate": [period[0] for period in periods],
+            "bill/BillingPeriodEndDate": [period[1] for period in periods],
+            "lineItem/UsageAccountId": self._pick(self.usage_accounts, len(hours)),
+            "lineItem/LineItemType": "Usage",
+            "lineItem/UsageStartDate": starts,
+            "lineItem/UsageEndDate": ends,
+            "lineItem/CurrencyCode": self.currency,
+            "lineItem/LegalEntity": self._get_legal_entity(),
+        }
+
+    def _tag_columns(self, count):
+        """Return the tag and cost category columns for count rows.
+
+        Random tags and categories are drawn for all rows at once: up to five keys
+        per row, each with a random word.
+        """
+        columns = {}
+        for pinned, keys in ((self._tags, self.RESOURCE_TAG_COLS), (self._cost_category, self.COST_CATEGORY_COLS)):
+            if pinned:
+                columns.update(pinned)
+                continue
+            key_counts = choices(range(6), k=count)
+            total = sum(key_counts)
+            picked = iter(zip(choices(keys, k=total), self.fake.words(total)))
+            for index, num_keys in enumerate(key_counts):
+                for key, value in islice(picked, num_keys):
+                    columns.setdefault(key, [""] * count)[index] = value
+        return columns
+
+    def _batch_columns(self, hours):
+        """Return the generator specific columns for the hours.
+
+        Columns hold a single value shared by every hour or a list with one value
+        per hour. Generators that only build rows return None.
+        """
+        return None
+
+    @staticmethod
+    def _pick(options, count):
+        """Return a random option per row, or the option itself when there is only one."""
+        if len(options) == 1:
+            return options[0]
+        return choices(options, k=count)
+
+    @staticmethod
+    def _per_row(function, picked):
+        """Apply function to each picked option, or once to a single shared option."""
+        if isinstance(picked, list):
+            return [function(option) for option in picked]
+        return function(picked)
+
+    def is_time_invariant(self):
+        """Return True when rows only differ in their time stamps, line item ids and random tags.
+
+        Everything else is then pinned, so the rows of a batch can be stamped into
+        a single canonical row instead of being built one by one.
+        """
+        if self._time_invariant is None:
+            hours = self.hours[:1] or [{"start": self.start_date, "end": self.end_date}]
+            columns = self._batch_columns(hours)
+            if columns is None:
+                self._time_invariant = False
+            else:
+                columns.update(self._common_columns(hours))
+                per_row = {column for column, value in columns.items() if isinstance(value, list)}
+                per_row.difference_update(self.RESOURCE_TAG_COLS, self.COST_CATEGORY_COLS)
+                self._time_invariant = per_row.issubset(AWS_STAMP_COLS)
+        return self._time_invariant
+
+    @staticmethod
+    def _update_row(row, columns):
+        """Copy the values of a single hour batch into a row."""
+        for column, value in columns.items():
+            row[column] = value[0] if isinstance(value, list) else value
+        return row
+
+    def generate_batch(self):
+        """Return all hours of the generator as a columnar batch."""
+        columns = self._batch_columns(self.hours)
+        if columns is None:
+            return AWSBatch.from_rows(self.schema, list(self._generate_hourly_data()))
+        batch_columns = self._common_columns(self.hours)
+        batch_columns.update(columns)
+        return AWSBatch(self.schema, len(self.hours), batch_columns)
 
     def _generate_region_short_code(self, region):
         """Generate the AWS short code for a region."""
@@ -397,3 +685,70 @@ class AWSGenerator(AbstractGenerator):
     @abstractmethod
     def generate_data(self, report_type=None):
         """Responsible for generating data."""
+
+
+def _period_bounds(start, granularity):
+    """Return the start and end of the daily or monthly period holding start."""
+    begin = start.replace(microsecond=0, second=0, minute=0, hour=0)
+    if granularity == "daily":
+        return begin, begin + datetime.timedelta(days=1)
+    begin = begin.replace(day=1)
+    return begin, AbstractGenerator.next_month(begin)
+
+
+_AGGREGATE_TIME_COLS = ("lineItem/UsageStartDate", "lineItem/UsageEndDate", "lineItem/LineItemId")
+
+
+def _aggregate_key(row):
+    """Return the values of the columns identifying the aggregated row an hourly row belongs to.
+
+    Every column but the additive ones and the time columns identifies it, so
+    that cost stays with its account, region, usage type and tags.
+    """
+    return tuple(
+        (column, value if isinstance(value, Hashable) else str(value))
+        for column, value in row.items()
+        if column not in AWS_ADDITIVE_COLS
+        and column not in _AGGREGATE_TIME_COLS
+        and not column.startswith("identity/")
+    )
+
+
+def aggregate_aws_rows(rows, granularity):
+    """Aggregate hourly rows into one row per period and distinct non-additive columns.
+
+    Usage amounts and costs are summed over the period for the rows agreeing on
+    every other column except the time columns. Rows must be ordered by usage
+    start date, as generators yield them.
+
+    Args:
+        rows (Iterable): hourly rows of a single generator
+        granularity (str): one of AWS_GRANULARITIES
+    Returns:
+        (Iterator): aggregated rows
+    """
+    if granularity == "hourly":
+        yield from rows
+        return
+    for (begin, end), period_rows in groupby(
+        rows, key=lambda row: _period_bounds(row["lineItem/UsageStartDate"], granularity)
+    ):
+        aggregated = {}
+        totals = {}
+        for row in period_rows:
+            key = _aggregate_key(row)
+            if key not in aggregated:
+                aggregated[key] = dict(row)
+                totals[key] = dict.fromkeys(AWS_ADDITIVE_COLS)
+            period_totals = totals[key]
+            for column in AWS_ADDITIVE_COLS:
+                if (value := row.get(column)) not in ("", None, "None"):
+                    period_totals[column] = (period_totals[column] or 0) + float(value)
+        for key, period_row in aggregated.items():
+            for column, total in totals[key].items():
+                if total is not None:
+                    period_row[column] = int(total) if total.is_integer() else total
+            period_row["identity/TimeInterval"] = AWSGenerator.time_interval(begin, end)
+            period_row["lineItem/UsageStartDate"] = begin
+            period_row["lineItem/UsageEndDate"] = end
+            yield period_row
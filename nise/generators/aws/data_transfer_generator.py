@@ -76,68 +76,76 @@ class DataTransferGenerator(AWSGenerator):
             sku = self.fake.pystr(min_chars=12, max_chars=12).upper()
         return sku
 
-    def _update_data(self, row, start, end, **kwargs):
-        """Update data with generator specific data."""
-        row = self._add_common_usage_info(row, start, end)
-
+    def _batch_columns(self, hours):
+        """Return the data transfer columns for the hours."""
+        count = len(hours)
         resource_id = self._resource_id if self._resource_id else self.fake.ean8()
-        rate = self._rate if self._rate else round(uniform(0.12, 0.19), 3)
+        rates = [self._rate] * count if self._rate else [round(uniform(0.12, 0.19), 3) for _ in hours]
         saving = self._saving
         negation = self._negation
-        amount = self._amount if self._amount else uniform(0.000002, 0.09)
-        cost = amount * rate
-        trans_desc, operation, description, location1, location2, trans_type, aws_region = self._get_data_transfer(
-            rate
-        )
-
-        row["lineItem/ProductCode"] = self._product_code
-        row["lineItem/UsageType"] = trans_desc
-        row["lineItem/Operation"] = operation
-        row["lineItem/ResourceId"] = resource_id
-        row["lineItem/UsageAmount"] = str(amount)
-        row["lineItem/UnblendedRate"] = str(rate)
-        row["lineItem/UnblendedCost"] = str(cost)
-        row["lineItem/BlendedRate"] = str(rate)
-        row["lineItem/BlendedCost"] = str(cost)
-        row["lineItem/LineItemDescription"] = description
-        row["product/ProductName"] = self._product_name
-        row["product/location"] = location1
-        row["product/locationType"] = "AWS Region"
-        row["product/productFamily"] = "Data Transfer"
-        row["product/region"] = aws_region
-        row["product/servicecode"] = "AWSDataTransfer"
-        row["product/sku"] = self._get_product_sku()
-        row["product/toLocation"] = location2
-        row["product/toLocationType"] = "AWS Region"
-        row["product/transferType"] = trans_type
-        row["product/usagetype"] = trans_desc
-        row["pricing/publicOnDemandCost"] = str(cost)
-        row["pricing/publicOnDemandRate"] = str(rate)
-        row["pricing/term"] = "OnDemand"
-        row["pricing/unit"] = "GB"
-        row["savingsPlan/SavingsPlanEffectiveCost"] = str(saving)
-        row["savingsPlan/SavingsPlanRate"] = str(saving)
+        amounts = [self._amount] * count if self._amount else [uniform(0.000002, 0.09) for _ in hours]
+        costs = [amount * rate for amount, rate in zip(amounts, rates)]
+        transfers = [self._get_data_transfer(rate) for rate in rates]
+        usage_types = [transfer[0] for transfer in transfers]
+        rate_strs = list(map(str, rates))
+        cost_strs = list(map(str, costs))
+
+        columns = {
+            "lineItem/ProductCode": self._product_code,
+            "lineItem/UsageType": usage_types,
+            "lineItem/Operation": [transfer[1] for transfer in transfers],
+            "lineItem/ResourceId": resource_id,
+            "lineItem/UsageAmount": list(map(str, amounts)),
+            "lineItem/UnblendedRate": rate_strs,
+            "lineItem/UnblendedCost": cost_strs,
+            "lineItem/BlendedRate": rate_strs,
+            "lineItem/BlendedCost": cost_strs,
+            "lineItem/LineItemDescription": [transfer[2] for transfer in transfers],
+            "product/ProductName": self._product_name,
+            "product/location": [transfer[3] for transfer in transfers],
+            "product/locationType": "AWS Region",
+            "product/productFamily": "Data Transfer",
+            "product/region": [transfer[6] for transfer in transfers],
+            "product/servicecode": "AWSDataTransfer",
+            "product/sku": self._product_sku if self._product_sku else [self._get_product_sku() for _ in hours],
+            "product/toLocation": [transfer[4] for transfer in transfers],
+            "product/toLocationType": "AWS Region",
+            "product/transferType": [transfer[5] for transfer in transfers],
+            "product/usagetype": usage_types,
+            "pricing/publicOnDemandCost": cost_strs,
+            "pricing/publicOnDemandRate": rate_strs,
+            "pricing/term": "OnDemand",
+            "pricing/unit": "GB",
+            "savingsPlan/SavingsPlanEffectiveCost": str(saving),
+            "savingsPlan/SavingsPlanRate": str(saving),
+        }
 
         # Overwrite lineItem/LineItemType for items with applied Savings plan
         if saving is not None:
-            row["lineItem/LineItemType"] = "SavingsPlanCoveredUsage"
+            columns["lineItem/LineItemType"] = "SavingsPlanCoveredUsage"
 
         if negation:
-            row["lineItem/LineItemType"] = "SavingsPlanNegation"
-            row["lineItem/UnblendedCost"] = -abs(cost)
-            row["lineItem/UnblendedRate"] = -abs(rate)
-            row["lineItem/BlendedCost"] = -abs(cost)
-            row["lineItem/BlendedRate"] = -abs(rate)
-            row[
+            negated_costs = [-abs(cost) for cost in costs]
+            negated_rates = [-abs(rate) for rate in rates]
+            columns["lineItem/LineItemType"] = "SavingsPlanNegation"
+            columns["lineItem/UnblendedCost"] = negated_costs
+            columns["lineItem/UnblendedRate"] = negated_rates
+            columns["lineItem/BlendedCost"] = negated_costs
+            columns["lineItem/BlendedRate"] = negated_rates
+            columns[
                 "lineItem/LineItemDescription"
             ] = f"SavingsPlanNegation used by AccountId : {self.payer_account} and UsageSku : {self._product_sku}"
-            row["lineItem/ResourceId"] = None
-            row["savingsPlan/SavingsPlanEffectiveCost"] = None
-            row["savingsPlan/SavingsPlanRate"] = None
+            columns["lineItem/ResourceId"] = None
+            columns["savingsPlan/SavingsPlanEffectiveCost"] = None
+            columns["savingsPlan/SavingsPlanRate"] = None
         else:
-            self._add_tag_data(row)
-            self._add_category_data(row)
-        return row
+            columns.update(self._tag_columns(count))
+        return columns
+
+    def _update_data(self, row, start, end, **kwargs):
+        """Update data with generator specific data."""
+        row = self._add_common_usage_info(row, start, end)
+        return self._update_row(row, self._batch_columns([{"start": start, "end": end}]))
 
     def generate_data(self, report_type=None):
         """Responsibile for generating data."""
@@ -16,7 +16,9 @@
 #
 """Module for ebs data generation."""
 import calendar
+from operator import itemgetter
 from random import choice
+from random import choices
 from random import uniform
 
 from nise.generators.aws.aws_generator import AWSGenerator
@@ -60,47 +62,55 @@ class EBSGenerator(AWSGenerator):
         hours_in_month = num_days_in_month * 24
         return self._rate / hours_in_month
 
+    def _batch_columns(self, hours):
+        """Return the EBS columns for the hours."""
+        count = len(hours)
+        costs = [round(self._disk_size * self._calculate_hourly_rate(hour.get("start")), 10) for hour in hours]
+        amounts = [str(round(cost / self._rate, 10)) for cost in costs]
+        costs = list(map(str, costs))
+        locations = self._pick(self._locations, count)
+        storages = choices(self.STORAGE, k=count)
+        usage_types = self._per_row(lambda location: f"{location[3]}:VolumeUsage", locations)
+
+        columns = {
+            "lineItem/ProductCode": "AmazonEC2",
+            "lineItem/UsageType": usage_types,
+            "lineItem/Operation": "CreateVolume",
+            "lineItem/ResourceId": self._resource_id,
+            "lineItem/UsageAmount": amounts,
+            "lineItem/UnblendedRate": str(self._rate),
+            "lineItem/UnblendedCost": costs,
+            "lineItem/BlendedRate": str(self._rate),
+            "lineItem/BlendedCost": costs,
+            "lineItem/LineItemDescription": self._per_row(
+                lambda location: f"${self._rate} per GB-Month of snapshot data stored - {location[0]}", locations
+            ),
+            "product/ProductName": "Amazon Elastic Compute Cloud",
+            "product/location": self._per_row(itemgetter(0), locations),
+            "product/locationType": "AWS Region",
+            "product/maxIopsBurstPerformance": [storage[0] for storage in storages],
+            "product/maxIopsvolume": [storage[1] for storage in storages],
+            "product/maxThroughputvolume": [storage[2] for storage in storages],
+            "product/maxVolumeSize": [storage[3] for storage in storages],
+            "product/productFamily": "Storage",
+            "product/region": self._per_row(itemgetter(1), locations),
+            "product/servicecode": "AmazonEC2",
+            "product/sku": self._product_sku,
+            "product/storageMedia": [storage[4] for storage in storages],
+            "product/usagetype": usage_types,
+            "product/volumeType": [storage[5] for storage in storages],
+            "pricing/publicOnDemandCost": costs,
+            "pricing/publicOnDemandRate": str(self._rate),
+            "pricing/term": "OnDemand",
+            "pricing/unit": "GB-Mo",
+        }
+        columns.update(self._tag_columns(count))
+        return columns
+
     def _update_data(self, row, start, end, **kwargs):
         """Update data with generator specific data."""
         row = self._add_common_usage_info(row, start, end)
-        hourly_rate = self._calculate_hourly_rate(start)
-        cost = round(self._disk_size * hourly_rate, 10)
-        amount = round(cost / self._rate, 10)
-        location, aws_region, _, storage_region = self._get_location()
-        description = f"${self._rate} per GB-Month of snapshot data stored - {location}"
-        burst, max_iops, max_thru, max_vol_size, vol_backed, vol_type = self._get_storage()
-
-        row["lineItem/ProductCode"] = "AmazonEC2"
-        row["lineItem/UsageType"] = f"{storage_region}:VolumeUsage"
-        row["lineItem/Operation"] = "CreateVolume"
-        row["lineItem/ResourceId"] = self._resource_id
-        row["lineItem/UsageAmount"] = str(amount)
-        row["lineItem/UnblendedRate"] = str(self._rate)
-        row["lineItem/UnblendedCost"] = str(cost)
-        row["lineItem/BlendedRate"] = str(self._rate)
-        row["lineItem/BlendedCost"] = str(cost)
-        row["lineItem/LineItemDescription"] = description
-        row["product/ProductName"] = "Amazon Elastic Compute Cloud"
-        row["product/location"] = location
-        row["product/locationType"] = "AWS Region"
-        row["product/maxIopsBurstPerformance"] = burst
-        row["product/maxIopsvolume"] = max_iops
-        row["product/maxThroughputvolume"] = max_thru
-        row["product/maxVolumeSize"] = max_vol_size
-        row["product/productFamily"] = "Storage"
-        row["product/region"] = aws_region
-        row["product/servicecode"] = "AmazonEC2"
-        row["product/sku"] = self._product_sku
-        row["product/storageMedia"] = vol_backed
-        row["product/usagetype"] = f"{storage_region}:VolumeUsage"
-        row["product/volumeType"] = vol_type
-        row["pricing/publicOnDemandCost"] = str(cost)
-        row["pricing/publicOnDemandRate"] = str(self._rate)
-        row["pricing/term"] = "OnDemand"
-        row["pricing/unit"] = "GB-Mo"
-        self._add_tag_data(row)
-        self._add_category_data(row)
-        return row
+        return self._update_row(row, self._batch_columns([{"start": start, "end": end}]))
 
     def generate_data(self, report_type=None):
         """Responsibile for generating data."""
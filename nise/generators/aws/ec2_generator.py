@@ -15,6 +15,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 """Module for ec2 data generation."""
+from operator import itemgetter
 from random import choice
 
 from nise.generators.aws.aws_generator import AWSGenerator
@@ -128,8 +129,8 @@ class EC2Generator(AWSGenerator):
                 "${cost} per On Demand Linux {inst_type} Instance Hour",
             )
 
-    def _update_data(self, row, start, end, **kwargs):
-        """Update data with generator specific data."""
+    def _batch_columns(self, hours):
+        """Return the EC2 columns for the hours."""
         (
             inst_type,
             physical_cores,
@@ -152,76 +153,81 @@ class EC2Generator(AWSGenerator):
             inst_description = self.attributes.get("lineitem_lineitemdescription", inst_description)
             product_name = self.attributes.get("product_name", product_name)
             billing_entity = self.attributes.get("billing_entity", billing_entity)
-        location, aws_region, avail_zone, _ = self._get_location()
-        row = self._add_common_usage_info(row, start, end)
-        row["bill/BillingEntity"] = billing_entity
-        row["lineItem/ProductCode"] = "AmazonEC2"
-        row["lineItem/UsageType"] = f"BoxUsage:{inst_type}"
-        row["lineItem/Operation"] = "RunInstances"
-        row["lineItem/AvailabilityZone"] = avail_zone
-        row["lineItem/ResourceId"] = self._resource_id
-        row["lineItem/UsageAmount"] = amount
-        row["lineItem/UnblendedRate"] = rate
-        row["lineItem/UnblendedCost"] = cost
-        row["lineItem/BlendedRate"] = rate
-        row["lineItem/BlendedCost"] = cost
-        row["lineItem/LineItemDescription"] = inst_description
-        row["product/ProductName"] = product_name
-        row["product/clockSpeed"] = "2.8 GHz"
-        row["product/currentGeneration"] = "Yes"
-        row["product/ecu"] = "14"
-        row["product/enhancedNetworkingSupported"] = "Yes"
-        row["product/instanceFamily"] = family
-        row["product/instanceType"] = inst_type
-        row["product/licenseModel"] = "No License required"
-        row["product/location"] = location
-        row["product/locationType"] = "AWS Region"
-        row["product/memory"] = memory
-        row["product/networkPerformance"] = "Moderate"
-        row["product/operatingSystem"] = self._operating_system
-        row["product/operation"] = "RunInstances"
-        row["product/physicalCores"] = physical_cores
-        row["product/physicalProcessor"] = "Intel Xeon Family"
-        row["product/preInstalledSw"] = "NA"
-        row["product/processorArchitecture"] = self._processor_arch
-        row["product/processorFeatures"] = "Intel AVX Intel Turbo"
-        row["product/productFamily"] = "Compute Instance"
-        row["product/region"] = aws_region
-        row["product/servicecode"] = "AmazonEC2"
-        row["product/sku"] = self._product_sku
-        row["product/storage"] = storage
-        row["product/tenancy"] = "Shared"
-        row["product/usagetype"] = f"BoxUsage:{inst_type}"
-        row["product/vcpu"] = vcpu
-        row["pricing/publicOnDemandCost"] = cost
-        row["pricing/publicOnDemandRate"] = rate
-        row["pricing/term"] = "OnDemand"
-        row["pricing/unit"] = "Hrs"
-        row["savingsPlan/SavingsPlanEffectiveCost"] = saving
-        row["savingsPlan/SavingsPlanRate"] = saving
+        locations = self._pick(self._locations, len(hours))
+
+        columns = {
+            "bill/BillingEntity": billing_entity,
+            "lineItem/ProductCode": "AmazonEC2",
+            "lineItem/UsageType": f"BoxUsage:{inst_type}",
+            "lineItem/Operation": "RunInstances",
+            "lineItem/AvailabilityZone": self._per_row(itemgetter(2), locations),
+            "lineItem/ResourceId": self._resource_id,
+            "lineItem/UsageAmount": amount,
+            "lineItem/UnblendedRate": rate,
+            "lineItem/UnblendedCost": cost,
+            "lineItem/BlendedRate": rate,
+            "lineItem/BlendedCost": cost,
+            "lineItem/LineItemDescription": inst_description,
+            "product/ProductName": product_name,
+            "product/clockSpeed": "2.8 GHz",
+            "product/currentGeneration": "Yes",
+            "product/ecu": "14",
+            "product/enhancedNetworkingSupported": "Yes",
+            "product/instanceFamily": family,
+            "product/instanceType": inst_type,
+            "product/licenseModel": "No License required",
+            "product/location": self._per_row(itemgetter(0), locations),
+            "product/locationType": "AWS Region",
+            "product/memory": memory,
+            "product/networkPerformance": "Moderate",
+            "product/operatingSystem": self._operating_system,
+            "product/operation": "RunInstances",
+            "product/physicalCores": physical_cores,
+            "product/physicalProcessor": "Intel Xeon Family",
+            "product/preInstalledSw": "NA",
+            "product/processorArchitecture": self._processor_arch,
+            "product/processorFeatures": "Intel AVX Intel Turbo",
+            "product/productFamily": "Compute Instance",
+            "product/region": self._per_row(itemgetter(1), locations),
+            "product/servicecode": "AmazonEC2",
+            "product/sku": self._product_sku,
+            "product/storage": storage,
+            "product/tenancy": "Shared",
+            "product/usagetype": f"BoxUsage:{inst_type}",
+            "product/vcpu": vcpu,
+            "pricing/publicOnDemandCost": cost,
+            "pricing/publicOnDemandRate": rate,
+            "pricing/term": "OnDemand",
+            "pricing/unit": "Hrs",
+            "savingsPlan/SavingsPlanEffectiveCost": saving,
+            "savingsPlan/SavingsPlanRate": saving,
+        }
 
         # Overwrite lineItem/LineItemType for items with applied Savings plan
         if saving is not None:
-            row["lineItem/LineItemType"] = "SavingsPlanCoveredUsage"
+            columns["lineItem/LineItemType"] = "SavingsPlanCoveredUsage"
 
         if negation:
-            row["lineItem/LineItemType"] = "SavingsPlanNegation"
-            row["lineItem/UnblendedCost"] = -abs(cost)
-            row["lineItem/UnblendedRate"] = -abs(rate)
-            row["lineItem/BlendedCost"] = -abs(cost)
-            row["lineItem/BlendedRate"] = -abs(rate)
-            row[
+            columns["lineItem/LineItemType"] = "SavingsPlanNegation"
+            columns["lineItem/UnblendedCost"] = -abs(cost)
+            columns["lineItem/UnblendedRate"] = -abs(rate)
+            columns["lineItem/BlendedCost"] = -abs(cost)
+            columns["lineItem/BlendedRate"] = -abs(rate)
+            columns[
                 "lineItem/LineItemDescription"
             ] = f"SavingsPlanNegation used by AccountId : {self.payer_account} and UsageSku : {self._product_sku}"
-            row["lineItem/ResourceId"] = None
-            row["savingsPlan/SavingsPlanEffectiveCost"] = None
-            row["savingsPlan/SavingsPlanRate"] = None
-
+            columns["lineItem/ResourceId"] = None
+            columns["savingsPlan/SavingsPlanEffectiveCost"] = None
+            columns["savingsPlan/SavingsPlanRate"] = None
         else:
-            self._add_tag_data(row)
-            self._add_category_data(row)
+            columns.update(self._tag_columns(len(hours)))
 
-        return row
+        return columns
+
+    def _update_data(self, row, start, end, **kwargs):
+        """Update data with generator specific data."""
+        row = self._add_common_usage_info(row, start, end)
+        return self._update_row(row, self._batch_columns([{"start": start, "end": end}]))
 
     def generate_data(self, report_type=None):
         """Responsibile for generating data."""
@@ -47,10 +47,6 @@ class MarketplaceGenerator(AWSGenerator):
             for attribute in self.attributes:
                 setattr(self, f"_{attribute}", self.attributes.get(attribute))
 
-        if tag_cols:
-            self.RESOURCE_TAG_COLS.update(tag_cols)
-            self.AWS_COLUMNS.update(tag_cols)
-
     @property
     def rate_code(self):
         """Return a formatted rate code."""
@@ -83,7 +79,6 @@ class MarketplaceGenerator(AWSGenerator):
 
     def _update_data(self, row, start, end, **kwargs):
         """Update data with generator specific data."""
-        self.AWS_COLUMNS.update(self.AWS_COLUMNS)
         row = self._add_common_usage_info(row, start, end)
 
         cost = self._amount * self._rate
@@ -15,6 +15,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 """Module for rds data generation."""
+from operator import itemgetter
 from random import choice
 
 from nise.generators.aws.aws_generator import AWSGenerator
@@ -99,61 +100,65 @@ class RDSGenerator(AWSGenerator):
         """Create an amazon resource name."""
         return f"arn:aws:rds:{avail_zone}:{self.payer_account}:db:{self._resource_id}"
 
-    def _update_data(self, row, start, end, **kwargs):
-        """Update data with generator specific data."""
+    def _batch_columns(self, hours):
+        """Return the RDS columns for the hours."""
         inst_type, vcpu, memory, storage, family, cost, rate, description = self._instance_type
         inst_description = description.format(cost, inst_type)
-        location, aws_region, avail_zone, _ = self._get_location()
-        row = self._add_common_usage_info(row, start, end)
-        # split_region = aws_region.split('-')
-        # region_short_code = aws_region[0:2].upper() + split_region[1][0].upper() + split_region[2]
-        region_short_code = self._generate_region_short_code(aws_region)
+        locations = self._pick(self._locations, len(hours))
 
-        row["lineItem/ProductCode"] = "AmazonRDS"
-        row["lineItem/UsageType"] = f"{region_short_code}-InstanceUsage:{inst_type}"
-        row["lineItem/Operation"] = "CreateDBInstance"
-        row["lineItem/AvailabilityZone"] = avail_zone
-        row["lineItem/ResourceId"] = self._get_arn(avail_zone)
-        row["lineItem/UsageAmount"] = "1"
-        row["lineItem/UnblendedRate"] = rate
-        row["lineItem/UnblendedCost"] = cost
-        row["lineItem/BlendedRate"] = rate
-        row["lineItem/BlendedCost"] = cost
-        row["lineItem/LineItemDescription"] = inst_description
-        row["product/ProductName"] = "Amazon Relational Database Service"
-        row["product/clockSpeed"] = "2.8 GHz"
-        row["product/currentGeneration"] = "Yes"
-        row["product/ecu"] = "14"
-        row["product/enhancedNetworkingSupported"] = "Yes"
-        row["product/instanceFamily"] = family
-        row["product/instanceType"] = inst_type
-        row["product/licenseModel"] = "No License required"
-        row["product/location"] = location
-        row["product/locationType"] = "AWS Region"
-        row["product/memory"] = memory
-        row["product/networkPerformance"] = "Moderate"
-        row["product/operatingSystem"] = "Linux"
-        row["product/operation"] = "RunInstances"
-        row["product/physicalProcessor"] = "Intel Xeon Family"
-        row["product/preInstalledSw"] = "NA"
-        row["product/processorArchitecture"] = self._processor_arch
-        row["product/processorFeatures"] = "Intel AVX Intel Turbo"
-        row["product/productFamily"] = "Database Instance"
-        row["product/region"] = aws_region
-        row["product/servicecode"] = "AmazonRDS"
-        row["product/sku"] = self._product_sku
-        row["product/storage"] = storage
-        row["product/tenancy"] = "Shared"
-        row["product/usagetype"] = f"BoxUsage:{inst_type}"
-        row["product/vcpu"] = vcpu
-        row["pricing/publicOnDemandCost"] = cost
-        row["pricing/publicOnDemandRate"] = rate
-        row["pricing/term"] = "OnDemand"
-        row["pricing/unit"] = "Hrs"
-        self._add_tag_data(row)
-        self._add_category_data(row)
+        columns = {
+            "lineItem/ProductCode": "AmazonRDS",
+            "lineItem/UsageType": self._per_row(
+                lambda location: f"{self._generate_region_short_code(location[1])}-InstanceUsage:{inst_type}",
+                locations,
+            ),
+            "lineItem/Operation": "CreateDBInstance",
+            "lineItem/AvailabilityZone": self._per_row(itemgetter(2), locations),
+            "lineItem/ResourceId": self._per_row(lambda location: self._get_arn(location[2]), locations),
+            "lineItem/UsageAmount": "1",
+            "lineItem/UnblendedRate": rate,
+            "lineItem/UnblendedCost": cost,
+            "lineItem/BlendedRate": rate,
+            "lineItem/BlendedCost": cost,
+            "lineItem/LineItemDescription": inst_description,
+            "product/ProductName": "Amazon Relational Database Service",
+            "product/clockSpeed": "2.8 GHz",
+            "product/currentGeneration": "Yes",
+            "product/ecu": "14",
+            "product/enhancedNetworkingSupported": "Yes",
+            "product/instanceFamily": family,
+            "product/instanceType": inst_type,
+            "product/licenseModel": "No License required",
+            "product/location": self._per_row(itemgetter(0), locations),
+            "product/locationType": "AWS Region",
+            "product/memory": memory,
+            "product/networkPerformance": "Moderate",
+            "product/operatingSystem": "Linux",
+            "product/operation": "RunInstances",
+            "product/physicalProcessor": "Intel Xeon Family",
+            "product/preInstalledSw": "NA",
+            "product/processorArchitecture": self._processor_arch,
+            "product/processorFeatures": "Intel AVX Intel Turbo",
+            "product/productFamily": "Database Instance",
+            "product/region": self._per_row(itemgetter(1), locations),
+            "product/servicecode": "AmazonRDS",
+            "product/sku": self._product_sku,
+            "product/storage": storage,
+            "product/tenancy": "Shared",
+            "product/usagetype": f"BoxUsage:{inst_type}",
+            "product/vcpu": vcpu,
+            "pricing/publicOnDemandCost": cost,
+            "pricing/publicOnDemandRate": rate,
+            "pricing/term": "OnDemand",
+            "pricing/unit": "Hrs",
+        }
+        columns.update(self._tag_columns(len(hours)))
+        return columns
 
-        return row
+    def _update_data(self, row, start, end, **kwargs):
+        """Update data with generator specific data."""
+        row = self._add_common_usage_info(row, start, end)
+        return self._update_row(row, self._batch_columns([{"start": start, "end": end}]))
 
     def generate_data(self, report_type=None):
         """Responsibile for generating data."""
@@ -15,6 +15,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 """Module for s3 data generation."""
+from operator import itemgetter
 from random import uniform
 
 from nise.generators.aws.aws_generator import AWSGenerator
@@ -46,44 +47,47 @@ class S3Generator(AWSGenerator):
         """Create an amazon resource name."""
         return f"arn:aws:ec2:{avail_zone}:{self.payer_account}:snapshot/snap-{self._resource_id}"
 
-    def _update_data(self, row, start, end, **kwargs):
-        """Update data with generator specific data."""
-        row = self._add_common_usage_info(row, start, end)
-
+    def _batch_columns(self, hours):
+        """Return the S3 columns for the hours."""
         rate = self._rate
         amount = self._amount
         cost = amount * rate
-        location, aws_region, avail_zone, _ = self._get_location()
-        description = f"${rate} per GB-Month of snapshot data stored - {location}"
-        amazon_resource_name = self._get_arn(avail_zone)
+        locations = self._pick(self._locations, len(hours))
 
-        row["lineItem/ProductCode"] = "AmazonS3"
-        row["lineItem/UsageType"] = "Requests-Tier2"
-        row["lineItem/Operation"] = "GetObject"
-        row["lineItem/ResourceId"] = amazon_resource_name
-        row["lineItem/UsageAmount"] = str(amount)
-        row["lineItem/UnblendedRate"] = str(rate)
-        row["lineItem/UnblendedCost"] = str(cost)
-        row["lineItem/BlendedRate"] = str(rate)
-        row["lineItem/BlendedCost"] = str(cost)
-        row["lineItem/LineItemDescription"] = description
-        row["product/ProductName"] = "Amazon Simple Storage Service"
-        row["product/location"] = location
-        row["product/locationType"] = "AWS Region"
-        row["product/productFamily"] = "Storage Snapshot"
-        row["product/region"] = aws_region
-        row["product/servicecode"] = "AmazonS3"
-        row["product/sku"] = self._product_sku
-        row["product/storageMedia"] = "Amazon S3"
-        row["product/usagetype"] = "Requests-Tier2"
-        row["pricing/publicOnDemandCost"] = str(cost)
-        row["pricing/publicOnDemandRate"] = str(rate)
-        row["pricing/term"] = "OnDemand"
-        row["pricing/unit"] = "GB-Mo"
-        self._add_tag_data(row)
-        self._add_category_data(row)
+        columns = {
+            "lineItem/ProductCode": "AmazonS3",
+            "lineItem/UsageType": "Requests-Tier2",
+            "lineItem/Operation": "GetObject",
+            "lineItem/ResourceId": self._per_row(lambda location: self._get_arn(location[2]), locations),
+            "lineItem/UsageAmount": str(amount),
+            "lineItem/UnblendedRate": str(rate),
+            "lineItem/UnblendedCost": str(cost),
+            "lineItem/BlendedRate": str(rate),
+            "lineItem/BlendedCost": str(cost),
+            "lineItem/LineItemDescription": self._per_row(
+                lambda location: f"${rate} per GB-Month of snapshot data stored - {location[0]}", locations
+            ),
+            "product/ProductName": "Amazon Simple Storage Service",
+            "product/location": self._per_row(itemgetter(0), locations),
+            "product/locationType": "AWS Region",
+            "product/productFamily": "Storage Snapshot",
+            "product/region": self._per_row(itemgetter(1), locations),
+            "product/servicecode": "AmazonS3",
+            "product/sku": self._product_sku,
+            "product/storageMedia": "Amazon S3",
+            "product/usagetype": "Requests-Tier2",
+            "pricing/publicOnDemandCost": str(cost),
+            "pricing/publicOnDemandRate": str(rate),
+            "pricing/term": "OnDemand",
+            "pricing/unit": "GB-Mo",
+        }
+        columns.update(self._tag_columns(len(hours)))
+        return columns
 
-        return row
+    def _update_data(self, row, start, end, **kwargs):
+        """Update data with generator specific data."""
+        row = self._add_common_usage_info(row, start, end)
+        return self._update_row(row, self._batch_columns([{"start": start, "end": end}]))
 
     def generate_data(self, report_type=None):
         """Responsibile for generating data."""
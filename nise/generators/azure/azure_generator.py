@@ -19,6 +19,7 @@ import calendar
 import datetime
 import json
 import uuid
+from functools import lru_cache
 from random import choice
 from random import randint
 from random import uniform
@@ -170,6 +171,22 @@ AZURE_COLUMNS_V2_RESOURCE_GROUP = (
 DATE_FMT = "%Y-%m-%d"
 
 
+@lru_cache
+def _billing_period(year, month):
+    """Return the first and last day of a billing month as report date strings."""
+    _, num_days = calendar.monthrange(year, month)
+    return datetime.date(year, month, 1).strftime(DATE_FMT), datetime.date(year, month, num_days).strftime(DATE_FMT)
+
+
+@lru_cache(maxsize=1024)
+def _split_instance_id(instance_id):
+    """Return the resource group named in an instance id, if any, and the resource name."""
+    resource_group = None
+    if "resourceGroups/" in instance_id:
+        resource_group = instance_id.split("resourceGroups/")[-1].split("/")[0]
+    return resource_group, instance_id.split("/")[-1]
+
+
 class AzureGenerator(AbstractGenerator):
     """Defines an abstract class for generators."""
 
@@ -255,7 +272,13 @@ class AzureGenerator(AbstractGenerator):
                 setattr(self, attr_name, value)
             if attributes.get("resource_group_export"):
                 self.azure_columns = AZURE_COLUMNS_V2_RESOURCE_GROUP
+        if self._resource_location:
+            self._locations = [option for option in self.RESOURCE_LOCATION if self._resource_location in option]
+        else:
+            self._locations = self.RESOURCE_LOCATION
+        self._json_cache = {}
         super().__init__(start_date, end_date)
+        self._default_invoice_section_id = self._invoice_section_id or self.fake.ean(length=8)
 
     @staticmethod
     def first_day_of_month(in_date):
@@ -347,11 +370,18 @@ class AzureGenerator(AbstractGenerator):
 
     def _get_location(self):
         """Pick resource location."""
-        if self._resource_location:
-            location = choice([option for option in self.RESOURCE_LOCATION if self._resource_location in option])
-        else:
-            location = choice(self.RESOURCE_LOCATION)
-        return location
+        return choice(self._locations)
+
+    def _json_text(self, value):
+        """Return value serialized to json, reusing the text of a value seen before.
+
+        Values are compared by identity: tags, class level additional info and
+        attribute values are serialized once per generator.
+        """
+        cached = self._json_cache.get(id(value))
+        if cached is None or cached[0] is not value:
+            cached = self._json_cache[id(value)] = (value, json.dumps(value))
+        return cached[1]
 
     def _get_additional_info(self, meter_name=None):
         """Pick additional info."""
@@ -366,7 +396,7 @@ class AzureGenerator(AbstractGenerator):
             self._tags = self._pick_tag(
                 "environment", ("dev", "ci", "qa", "stage", "prod"), "project", ("p1", "p2", "p3")
             )
-        row["Tags"] = json.dumps(self._tags)
+        row["Tags"] = self._json_text(self._tags)
 
     def _update_data(self, row, start, end, **kwargs):
         """Update data with generator specific data."""
@@ -385,8 +415,6 @@ class AzureGenerator(AbstractGenerator):
             additional_info,
             service_info_2,
         ) = self._get_resource_info(meter_id, self.SERVICE_METER, self.EXAMPLE_RESOURCE, self.SERVICE_INFO_2)
-        if not additional_info:
-            additional_info = ""
         if not service_info_2:
             service_info_2 = ""
 
@@ -400,8 +428,7 @@ class AzureGenerator(AbstractGenerator):
         row["BillingProfileId"] = self.account_info.get("billing_account_id")
         row["BillingProfileName"] = self.account_info.get("billing_account_name")
         row["Date"] = start.date().strftime(DATE_FMT)
-        row["BillingPeriodStartDate"] = self.first_day_of_month(start).strftime(DATE_FMT)
-        row["BillingPeriodEndDate"] = self.last_day_of_month(start).strftime(DATE_FMT)
+        row["BillingPeriodStartDate"], row["BillingPeriodEndDate"] = _billing_period(start.year, start.month)
         row["ResourceLocation"] = azure_region
         row["MeterCategory"] = self._service_name
         row["MeterId"] = str(self.meter_id)
@@ -409,7 +436,7 @@ class AzureGenerator(AbstractGenerator):
         row["MeterRegion"] = meter_region
         row["ConsumedService"] = self._consumed
         row["OfferId"] = ""
-        row["AdditionalInfo"] = json.dumps(additional_info)
+        row["AdditionalInfo"] = self._json_text(additional_info) if additional_info else '""'
         row["ServiceInfo1"] = ""
         row["ServiceInfo2"] = service_info_2
         row["UnitOfMeasure"] = units_of_measure
@@ -417,8 +444,10 @@ class AzureGenerator(AbstractGenerator):
             row, meter_sub, str(amount), str(rate), str(cost), instance_id, service_tier
         )
 
-        if instance_id and "resourceGroups/" in instance_id:
-            resource_group = instance_id.split("resourceGroups/")[-1].split("/")[0]
+        resource_name = ""
+        if instance_id:
+            instance_group, resource_name = _split_instance_id(instance_id)
+            resource_group = instance_group or resource_group
 
         if self.azure_columns is AZURE_COLUMNS_V2_SUBSCRIPTION:
             row["SubscriptionId"] = self.subscription_guid
@@ -430,8 +459,6 @@ class AzureGenerator(AbstractGenerator):
             row["ResourceGroup"] = resource_group
             row["MarketPrice"] = 0
 
-        resource_name = instance_id.split("/")[-1] if instance_id else ""
-
         if self._service_name == "Virtual Machines":
             if getattr(self, "_CCSP", False):
                 publisher_name = "Microsoft"
@@ -446,7 +473,7 @@ class AzureGenerator(AbstractGenerator):
             publisher_name = ""
             publisher_type = "Azure"
 
-        row["InvoiceSectionId"] = self._invoice_section_id if self._invoice_section_id else self.fake.ean(length=8)
+        row["InvoiceSectionId"] = self._default_invoice_section_id
         row["InvoiceSectionName"] = (
             self._invoice_section_name if self._invoice_section_id else choice(self.INVOICE_SECTION_NAMES)
         )
@@ -520,14 +547,11 @@ class AzureGenerator(AbstractGenerator):
 
     def _generate_daily_data(self):
         """Create daily data."""
-        data = []
         for day in self.days:
             start = day.get("start")
             end = day.get("end")
             row = self._init_data_row(start, end)
-            row = self._update_data(row, start, end)
-            data.append(row)
-        return data
+            yield self._update_data(row, start, end)
 
     def generate_data(self, report_type=None):
         """Responsible for generating data."""
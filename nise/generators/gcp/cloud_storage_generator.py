@@ -15,7 +15,6 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 """Generator for GCP storage cost."""
-from datetime import datetime
 from random import choice
 
 from nise.generators.gcp.gcp_generator import GCP_REPORT_COLUMNS_JSONL
@@ -85,8 +84,7 @@ class CloudStorageGenerator(GCPGenerator):
         credit, credit_total = self._gen_credit(self.credit_total, self._credit_amount)
         self.credit_total = credit_total
         row["credits"] = credit
-        usage_date = datetime.strptime(row.get("usage_start_time")[:7], "%Y-%m")
-        row["invoice.month"] = f"{usage_date.year}{usage_date.month:02d}"
+        row["invoice.month"] = self._invoice_month
 
         if self.attributes:
             for key in self.attributes:
@@ -97,9 +95,7 @@ class CloudStorageGenerator(GCPGenerator):
         row["labels"] = self.determine_labels(self.LABELS)
         row["system_labels"] = choice(self.SYSTEM_LABELS)
         if self.resource_level:
-            resource = self._generate_resource(
-                self._resource_name, self._resource_global_name, self.project.get("region")
-            )
+            resource = self._pooled_resource(self.project.get("region"))
             row["resource.name"] = resource.get("name")
             row["resource.global_name"] = resource.get("global_name")
 
@@ -150,13 +146,9 @@ class JSONLCloudStorageGenerator(CloudStorageGenerator):
         row["credits"] = credit
         row["cost_type"] = "regular"
         row["currency_conversion_rate"] = 1
-        invoice = {}
-        year = datetime.strptime(row.get("usage_start_time")[:7], "%Y-%m").year
-        month = datetime.strptime(row.get("usage_start_time")[:7], "%Y-%m").month
-        invoice["month"] = f"{year}{month:02d}"
-        row["invoice"] = invoice
+        row["invoice"] = {"month": self._invoice_month}
         if self.resource_level:
-            resource = self._generate_resource()
+            resource = self._pooled_resource()
             row["resource"] = resource
 
         if self.attributes:
@@ -116,6 +116,10 @@ class GCPGenerator(AbstractGenerator):
         self._service = None
         self._credit_amount = None
         self._currency = currency
+        self._resource_count = self.attributes.get("resource_count") or self.num_instances
+        self._resource_pool = None
+        self._invoice_month_count = len(self._gcp_find_invoice_months_in_date_range())
+        self._invoice_month = self._invoice_month_of(self.start_date)
 
     @staticmethod
     def _create_days_list(start_date, end_date):
@@ -215,22 +219,28 @@ class GCPGenerator(AbstractGenerator):
         """
         # Add a little buffer to end date for beginning of the month
         # searches for invoice_month for dates < end_date
-        end_range = self.end_date + timedelta(1)
+        days = (self.end_date + timedelta(1) - self.start_date).days
+        if days <= 0:
+            return []
+        last_day = self.start_date + timedelta(days - 1)
         invoice_months = []
-        for day in range((end_range - self.start_date).days):
-            invoice_month = (self.start_date + timedelta(day)).strftime("%Y%m")
-            if invoice_month not in invoice_months:
-                invoice_months.append(invoice_month)
+        year, month = self.start_date.year, self.start_date.month
+        while (year, month) <= (last_day.year, last_day.month):
+            invoice_months.append(f"{year}{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
         return invoice_months
 
+    @staticmethod
+    def _invoice_month_of(in_date):
+        """Return the GCP invoice month of a date."""
+        return f"{in_date.year}{in_date.month:02d}"
+
     def _gen_credit(self, credit_distributed, credit_amount, json_return=False):
         """Generate the credit based off the cost amount."""
         if json_return:
             if credit_amount:
                 # When using the csv generator it runs per invoice month so this will equal that logic
-                invoice_months = self._gcp_find_invoice_months_in_date_range()
-                invoice_month_count = len(invoice_months)
-                credit_amount = credit_amount * invoice_month_count
+                credit_amount = credit_amount * self._invoice_month_count
             default_dict = {"name": "", "amount": 0, "full_name": "", "id": "", "type": ""}
             empty_return = [default_dict, None]
         else:
@@ -304,6 +314,20 @@ class GCPGenerator(AbstractGenerator):
             global_name = f"//compute.googleapis.com/projects/{proj_id}/zones/{region}/instances/{id}"
         return {"name": name, "global_name": global_name}
 
+    def _pooled_resource(self, region=None):
+        """Return a resource from the generator's pool of resource identities.
+
+        The pool holds resource_count resources and is filled on first use, once
+        the pinned resource name and global name are known.
+        """
+        if self._resource_pool is None:
+            pool_size = 1 if self._resource_name and self._resource_global_name else self._resource_count
+            self._resource_pool = [
+                self._generate_resource(self._resource_name, self._resource_global_name, region)
+                for _ in range(pool_size)
+            ]
+        return dict(choice(self._resource_pool))
+
     def _add_common_usage_info(self, row, start, end, **kwargs):
         """Not needed for GCP."""
 
@@ -313,9 +337,13 @@ class GCPGenerator(AbstractGenerator):
 
     def _generate_hourly_data(self, **kwargs):
         """Not needed for GCP."""
+        month = None
         for hour in self.hours:
             start = hour.get("start")
             end = hour.get("end")
+            if start.month != month:
+                month = start.month
+                self._invoice_month = self._invoice_month_of(start)
             row = self._init_data_row(start, end)
             row = self._update_data(row)
             yield row
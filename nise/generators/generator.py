@@ -98,6 +98,19 @@ class AbstractGenerator(ABC):
             cur_date = cur_date + one_day
         return days
 
+    def rebase(self, start_date, end_date):
+        """Move the generator onto a new date window.
+
+        Everything picked when the generator was created (resource ids, instance
+        types, nodes, pods, ...) is kept, only the time grids are rebuilt.
+        """
+        self.start_date = start_date
+        self.end_date = end_date
+        self.hours = self._set_hours()
+        self.quarter_hours = self._set_quarter_hours()
+        self.days = self._set_days()
+        return self
+
     @staticmethod
     def next_month(in_date):
         """Return the first of the next month from the in_date."""
@@ -133,14 +133,12 @@ class OCIGenerator(AbstractGenerator):
             raise ValueError("end must be a date object.")
 
         report_type = kwargs.get(REPORT_TYPE)
-        row = {}
-        for column in OCI_REPORT_TYPE_TO_COLS[report_type]:
-            row[column] = ""
-        return row
+        return dict.fromkeys(OCI_REPORT_TYPE_TO_COLS[report_type], "")
 
-    def _add_common_usage_info(self, row, start, end):
-        """Add common usage information."""
-        data = self._get_common_usage_data(start, end)
+    def _add_common_usage_info(self, row, start, end, data=None):
+        """Add common usage information, generating it unless the interval's data is given."""
+        if data is None:
+            data = self._get_common_usage_data(start, end)
         for column in OCI_ALL_COMMON_COLUMNS:
             row[column] = data[column]
         return row
@@ -251,18 +249,30 @@ class OCIGenerator(AbstractGenerator):
             row = self._add_usage_data(row, start, end, **kwargs)
         return row
 
-    def _generate_hourly_data(self, **kwargs):
-        """Create hourly data."""
-        data = {OCI_COST_REPORT: [], OCI_USAGE_REPORT: []}
+    def generate_rows(self, **kwargs):
+        """Yield (report type, row) pairs of hourly data, cost and usage interleaved.
+
+        The common columns are generated once per interval and shared by its cost
+        and usage rows.
+        """
+        report_kwargs = {
+            report_type: dict(kwargs, report_type=report_type) for report_type in (OCI_COST_REPORT, OCI_USAGE_REPORT)
+        }
         for hour in self.hours:
             start = hour.get("start")
             end = hour.get("end")
-            for report_type in data:
-                kwargs.update({"report_type": report_type})
-                row = self._init_data_row(start, end, **kwargs)
-                row = self._add_common_usage_info(row, start, end)
-                row = self._update_data(row, start, end, **kwargs)
-                data[report_type].append(row)
+            common_data = self._get_common_usage_data(start, end)
+            for report_type, type_kwargs in report_kwargs.items():
+                row = self._init_data_row(start, end, **type_kwargs)
+                row = self._add_common_usage_info(row, start, end, common_data)
+                row = self._update_data(row, start, end, **type_kwargs)
+                yield report_type, row
+
+    def _generate_hourly_data(self, **kwargs):
+        """Create hourly data."""
+        data = {OCI_COST_REPORT: [], OCI_USAGE_REPORT: []}
+        for report_type, row in self.generate_rows(**kwargs):
+            data[report_type].append(row)
         return data
 
     def generate_data(self, **kwargs):
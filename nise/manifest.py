@@ -91,6 +91,7 @@ def aws_generate_manifest(fake, template_data):
         "report_key": json.dumps(report_keys),
         "compression": "GZIP",
         "bucket": template_data.get("aws_bucket_name"),
+        "time_unit": (template_data.get("aws_granularity") or "hourly").upper(),
     }
     render_data.update(template_data)
     template_loader = jinja2.FileSystemLoader(searchpath=TEMPLATE_DIR)
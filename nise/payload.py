@@ -0,0 +1,240 @@
+#
+# Copyright 2024 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Pack OCP report files into size-bounded payloads."""
+import io
+import os
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import NamedTemporaryFile
+
+from nise.copy import place_file
+from nise.copy import write_file
+from nise.extract import month_date_range
+from nise.upload import MB
+from nise.upload import UPLOAD_SETTINGS
+
+DEFAULT_MAX_SIZE_MB = 100
+_SPLIT_WINDOW = 64 * 1024
+
+
+def _open_source(source):
+    """Open a report, given as the path of its file or as its encoded bytes, for binary reading."""
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    return open(source, "rb")
+
+
+def _source_size(source):
+    """Return the size in bytes of a report given as a path or as bytes."""
+    if isinstance(source, bytes):
+        return len(source)
+    return os.path.getsize(source)
+
+
+class _PartReader:
+    """Binary reader returning the header of a report part followed by its byte range of the report."""
+
+    def __init__(self, part):
+        """Initialize the reader with the part to read."""
+        self._header = part.header
+        self._remaining = part.end - part.start
+        self._file = _open_source(part.source)
+        self._file.seek(part.start)
+
+    def read(self, size=-1):
+        """Read up to size bytes, or everything left if size is negative."""
+        if size < 0:
+            size = len(self._header) + self._remaining
+        data, self._header = self._header[:size], self._header[size:]
+        if len(data) < size and self._remaining:
+            chunk = self._file.read(min(size - len(data), self._remaining))
+            self._remaining -= len(chunk)
+            data += chunk
+        return data
+
+    def close(self):
+        """Close the report file."""
+        self._file.close()
+
+    def __enter__(self):
+        """Return the reader."""
+        return self
+
+    def __exit__(self, *exc):
+        """Close the reader."""
+        self.close()
+
+
+class ReportPart:
+    """A line aligned byte range of a csv report, packed under its own name.
+
+    Every part but the first of a split report starts with a copy of the report
+    header, so that each part is a complete csv file. Reports are read from
+    their file, or from memory for reports that were never written to disk.
+    """
+
+    def __init__(self, name, source, start, end, header=b""):
+        """Initialize the part.
+
+        Args:
+            name (str): the file name of the part in the payload
+            source (str or bytes): the path of the report file, or the encoded report
+            start (int): the offset of the first byte of the part
+            end (int): the offset following the last byte of the part
+            header (bytes): the header written before the part
+        """
+        self.name = name
+        self.source = source
+        self.start = start
+        self.end = end
+        self.header = header
+
+    @property
+    def size(self):
+        """Return the size of the part in bytes."""
+        return len(self.header) + self.end - self.start
+
+    @property
+    def whole_file(self):
+        """Return True if the part is an entire report file on disk."""
+        return not isinstance(self.source, bytes) and self.start == 0 and self.end == _source_size(self.source)
+
+    def open(self):
+        """Return a binary reader of the part."""
+        return _PartReader(self)
+
+
+def _line_end_before(report_file, start, limit):
+    """Return the offset following the last line of report_file ending within limit bytes of start."""
+    window = min(limit, _SPLIT_WINDOW)
+    report_file.seek(start + limit - window)
+    newline = report_file.read(window).rfind(b"\n")
+    if newline >= 0:
+        return start + limit - window + newline + 1
+    # a single line longer than the window goes into a part of its own
+    report_file.seek(start + limit)
+    report_file.readline()
+    return report_file.tell()
+
+
+def split_report(source, max_size, names):
+    """Split a csv report into parts of at most max_size bytes, cut at line ends.
+
+    Args:
+        source (str or bytes): the path of the report file, or the encoded report
+        max_size (int): the maximum size of a part in bytes
+        names (Iterator): yields the file name of each part
+    Returns:
+        (List): the ReportPart of each part of the report
+    """
+    size = _source_size(source)
+    if size <= max_size:
+        return [ReportPart(next(names), source, 0, size)]
+    parts = []
+    with _open_source(source) as report_file:
+        header = report_file.readline()
+        start, prefix = 0, b""
+        while start < size:
+            limit = max_size - len(prefix)
+            end = size if size - start <= limit else _line_end_before(report_file, start, limit)
+            parts.append(ReportPart(next(names), source, start, end, prefix))
+            start, prefix = end, header
+    return parts
+
+
+def _add_member(tar, name, size, reader):
+    """Add a member read from a binary reader to a tarball."""
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = time.time()
+    tar.addfile(info, reader)
+
+
+def _write_payload(parts, manifest):
+    """Write a gzipped tarball holding the manifest and the report parts, without copying the reports first."""
+    with NamedTemporaryFile(suffix=".tar.gz", delete=False) as t_file:
+        payload_path = t_file.name
+    with tarfile.open(payload_path, "w:gz") as tar:
+        _add_member(tar, "manifest.json", len(manifest), io.BytesIO(manifest))
+        for part in parts:
+            with part.open() as reader:
+                _add_member(tar, part.name, part.size, reader)
+    return payload_path
+
+
+def pack_payloads(parts, manifest, max_size):
+    """Pack report parts into payloads holding at most max_size bytes of reports each.
+
+    Parts are packed in order, a payload taking parts for as long as they fit.
+    Payloads are compressed in parallel, each one carrying the manifest.
+
+    Args:
+        parts (List): the ReportPart of each report file
+        manifest (bytes): the manifest of the reports
+        max_size (int): the maximum size of the reports packed into one payload
+    Returns:
+        (List): the paths of the gzipped payload tarballs
+    """
+    groups = []
+    group_size = 0
+    for part in parts:
+        if not groups or group_size + part.size > max_size:
+            groups.append([])
+            group_size = 0
+        groups[-1].append(part)
+        group_size += part.size
+    with ThreadPoolExecutor(UPLOAD_SETTINGS["max_concurrency"], thread_name_prefix="nise-payload") as executor:
+        return list(executor.map(_write_payload, groups, [manifest] * len(groups)))
+
+
+def _place_part(destination, part):
+    """Atomically place a report part at destination."""
+    if part.whole_file:
+        place_file(part.source, destination)
+    else:
+        with part.open() as reader:
+            write_file(destination, reader)
+
+
+def place_payload(base_path, cluster_id, report_date, parts, manifest):
+    """Place report parts and their manifest into a local upload directory, without a tarball.
+
+    The files land in the <cluster_id>/<YYYYMMDD-YYYYMMDD> layout that extracting
+    the payload would produce. The manifest is placed last, so a reader that
+    finds the manifest also finds every report it lists.
+
+    Args:
+        base_path (str): the local upload directory
+        cluster_id (str): the cluster of the reports
+        report_date (DateTime): the date of the payload
+        parts (List): the ReportPart of each report file
+        manifest (bytes): the manifest of the reports
+    Returns:
+        (str): the directory the payload was placed into
+    """
+    destination_dir = os.path.join(base_path, cluster_id, month_date_range(report_date))
+    os.makedirs(destination_dir, exist_ok=True)
+    for part in parts:
+        _place_part(os.path.join(destination_dir, part.name), part)
+    write_file(os.path.join(destination_dir, "manifest.json"), io.BytesIO(manifest))
+    return destination_dir
+
+
+def max_payload_size(max_size_mb=None):
+    """Return the maximum payload size in bytes for a size in megabytes, the operator default if not set."""
+    return (max_size_mb or DEFAULT_MAX_SIZE_MB) * MB
@@ -0,0 +1,132 @@
+#
+# Copyright 2024 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Compiled generation plan for a report run."""
+import hashlib
+import os
+import pickle
+
+from nise import __version__
+from nise.util import LOG
+
+PLAN_CACHE_VERSION = 2
+
+
+class GenerationPlan:
+    """Generators resolved against the months of a run.
+
+    The plan holds the resolved generator classes, their parsed attributes and,
+    for every month, the generators that are active in it together with the
+    start and end dates each generator covers in that month.
+    """
+
+    def __init__(self, generators, months, windows):
+        """Initialize the plan.
+
+        Args:
+            generators (List): generator dicts with resolved "generator" classes
+            months (List): month dicts as created by _create_month_list
+            windows (List): per month, a list of (generator index, start, end) tuples
+        """
+        self.generators = generators
+        self.months = months
+        self.windows = windows
+
+    def __len__(self):
+        """Return the number of months in the plan."""
+        return len(self.months)
+
+    def month_generators(self, month_index):
+        """Yield (generator index, generator dict, start, end) for the generators active in a month."""
+        for index, gen_start_date, gen_end_date in self.windows[month_index]:
+            yield index, self.generators[index], gen_start_date, gen_end_date
+
+    def generator_count(self, month_index):
+        """Return the number of generators active in a month."""
+        return len(self.windows[month_index])
+
+
+def plan_cache_key(static_file, options, generator_dates):
+    """Return the key that identifies a cached plan for a static file and its resolved dates.
+
+    The key changes whenever the static file is modified or the resolved run and
+    generator dates change, so a stale plan is never reused. Relative dates, such
+    as today, last_month or day offsets, only change the key once the current
+    time moves them to other dates, so static files with absolute dates reuse
+    their plan across runs.
+
+    Args:
+        static_file (str): path of the static report file
+        options (Dict): run options holding the resolved start and end dates
+        generator_dates (List): resolved (start, end) of every generator of the file
+    Returns:
+        (str): the cache key
+    """
+    stat = os.stat(static_file)
+    parts = (
+        __version__,
+        PLAN_CACHE_VERSION,
+        os.path.abspath(static_file),
+        stat.st_mtime_ns,
+        stat.st_size,
+        options.get("provider"),
+        str(options.get("start_date")),
+        str(options.get("end_date")),
+        [(str(start), str(end)) for start, end in generator_dates],
+    )
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+
+def load_plan_cache(cache_file, key):
+    """Load a cached plan.
+
+    Returns:
+        (Dict): the cached run state, or None if the cache is missing or stale
+
+    """
+    if not cache_file or not os.path.isfile(cache_file):
+        return None
+    try:
+        with open(cache_file, "rb") as cache:
+            state = pickle.load(cache)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as err:
+        LOG.warning(f"Ignoring unreadable plan cache {cache_file}: {err}")
+        return None
+    if not isinstance(state, dict) or state.get("key") != key:
+        LOG.info(f"Plan cache {cache_file} is stale.")
+        return None
+    LOG.info(f"Using cached generation plan from {cache_file}.")
+    return state
+
+
+def save_plan_cache(cache_file, key, state):
+    """Write the run state and plan to the cache file.
+
+    Returns:
+        (Boolean): True if the cache was written
+
+    """
+    state = dict(state, key=key)
+    temp_file = f"{cache_file}.tmp"
+    try:
+        with open(temp_file, "wb") as cache:
+            pickle.dump(state, cache, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+    except (OSError, pickle.PicklingError) as err:
+        LOG.warning(f"Unable to write plan cache {cache_file}: {err}")
+        return False
+    LOG.info(f"Saved generation plan to {cache_file}.")
+    return True
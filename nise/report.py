@@ -21,21 +21,22 @@ import copy
 import csv
 import gzip
 import importlib
+import io
+import itertools
 import json
 import os
 import random
-import shutil
 import string
-import tarfile
+import time
+from bisect import bisect_right
+from contextlib import ExitStack
 from datetime import datetime
 from datetime import timezone
+from functools import lru_cache
 from random import randint
-from tempfile import gettempdir
 from tempfile import NamedTemporaryFile
-from tempfile import TemporaryDirectory
 from uuid import uuid4
 
-import boto3
 import requests
 from dateutil import parser
 from dateutil.relativedelta import relativedelta
@@ -43,14 +44,19 @@ from faker import Faker
 from nise import __version__
 from nise.copy import copy_to_local_dir
 from nise.extract import extract_payload
+from nise.generators.aws import aggregate_aws_rows
+from nise.generators.aws import AWSBatch
 from nise.generators.aws import DataTransferGenerator
 from nise.generators.aws import EBSGenerator
 from nise.generators.aws import EC2Generator
+from nise.generators.aws import get_aws_column_schema
 from nise.generators.aws import MarketplaceGenerator
 from nise.generators.aws import RDSGenerator
 from nise.generators.aws import Route53Generator
 from nise.generators.aws import S3Generator
 from nise.generators.aws import VPCGenerator
+from nise.generators.azure import AZURE_COLUMNS_V2_RESOURCE_GROUP
+from nise.generators.azure import AZURE_COLUMNS_V2_SUBSCRIPTION
 from nise.generators.azure import BandwidthGenerator
 from nise.generators.azure import CCSPGenerator
 from nise.generators.azure import DTGenerator
@@ -77,9 +83,7 @@ from nise.generators.oci import OCIBlockStorageGenerator
 from nise.generators.oci import OCIComputeGenerator
 from nise.generators.oci import OCIDatabaseGenerator
 from nise.generators.oci import OCINetworkGenerator
-from nise.generators.oci.oci_generator import OCI_COST_REPORT
 from nise.generators.oci.oci_generator import OCI_REPORT_TYPE_TO_COLS
-from nise.generators.oci.oci_generator import OCI_USAGE_REPORT
 from nise.generators.ocp import OCP_NAMESPACE_LABEL
 from nise.generators.ocp import OCP_NODE_LABEL
 from nise.generators.ocp import OCP_POD_USAGE
@@ -89,26 +93,33 @@ from nise.generators.ocp import OCP_STORAGE_USAGE
 from nise.generators.ocp import OCPGenerator
 from nise.manifest import aws_generate_manifest
 from nise.manifest import ocp_generate_manifest
+from nise.payload import max_payload_size
+from nise.payload import pack_payloads
+from nise.payload import place_payload
+from nise.payload import split_report
+from nise.plan import GenerationPlan
+from nise.plan import save_plan_cache
+from nise.sink import CSVSink
+from nise.sink import JSONLSink
+from nise.sink import MultiSink
+from nise.sink import RotatingSink
+from nise.upload import AzureBlobWriter
 from nise.upload import gcp_bucket_to_dataset
+from nise.upload import http_session
+from nise.upload import MB
+from nise.upload import s3_endpoint_client
+from nise.upload import service_account_token
 from nise.upload import upload_to_azure_container
 from nise.upload import upload_to_gcp_storage
 from nise.upload import upload_to_oci_bucket
 from nise.upload import upload_to_s3
+from nise.upload import UploadPool
 from nise.util import LOG
 
-
-def create_temporary_copy(path, temp_file_name, temp_dir_name="None"):
-    """Create temporary copy of a file."""
-    temp_dir = gettempdir()
-    if temp_dir_name:
-        new_dir = os.path.join(temp_dir, temp_dir_name)
-        if not os.path.exists(new_dir):
-            os.mkdir(new_dir)
-        temp_path = os.path.join(new_dir, temp_file_name)
-    else:
-        temp_path = os.path.join(temp_dir, temp_file_name)
-    shutil.copy2(path, temp_path)
-    return temp_path
+INGRESS_RETRIES = 3
+INGRESS_BACKOFF = 1
+INGRESS_RETRY_STATUSES = (429, 500, 502, 503, 504)
+OCP_IN_MEMORY_REPORT_SIZE = 32 * MB
 
 
 def _write_csv(output_file, data, header):
@@ -121,14 +132,22 @@ def _write_csv(output_file, data, header):
             writer.writerow(row)
 
 
+def _encode_csv(data, header):
+    """Encode csv data in memory, as _write_csv would write it."""
+    buffer = io.BytesIO()
+    text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+    writer = csv.DictWriter(text, fieldnames=header)
+    writer.writeheader()
+    writer.writerows(data)
+    text.flush()
+    text.detach()
+    return buffer.getvalue()
+
+
 def _write_jsonl(output_file, data):
     """Output JSON Lines file data for bigquery."""
-    LOG.info(f"Writing to {output_file.split('/')[-1]}")
-    with open(output_file, "w") as file:
-        for row in data:
-            json.dump(row, file)
-            # each dictionary "row" is its own line in a JSONL file
-            file.write("\n")
+    with JSONLSink(output_file) as sink:
+        sink.write_rows(data)
 
 
 def _remove_files(file_list):
@@ -149,6 +168,42 @@ def _generate_azure_filename():
     return (local_path, output_file_name)
 
 
+def _numbered_file_name(file_name, file_number):
+    """Return the name of a split report file, file number 0 being the unsplit file."""
+    if not file_number:
+        return file_name
+    root, extension = os.path.splitext(file_name)
+    if extension == ".gz":
+        root, inner_extension = os.path.splitext(root)
+        extension = inner_extension + extension
+    return f"{root}-{file_number}{extension}"
+
+
+def _csv_sink_factory(file_name, header):
+    """Return a sink factory writing numbered csv files named after file_name."""
+    return lambda file_number: CSVSink(_numbered_file_name(file_name, file_number), header)
+
+
+def _jsonl_sink_factory(file_name, compress=False):
+    """Return a sink factory writing numbered JSON Lines files named after file_name."""
+    return lambda file_number: JSONLSink(_numbered_file_name(file_name, file_number), compress)
+
+
+def _azure_stream_sink_factory(file_name, header, container_name, blob_dir):
+    """Return a sink factory writing numbered csv files while streaming them into blobs.
+
+    The first file keeps the unsplit name, so that a report fitting into a single
+    file does not have to be renamed once its blob has been committed.
+    """
+
+    def sink_factory(file_number):
+        output_file = _numbered_file_name(file_name, file_number if file_number > 1 else 0)
+        blob_path = blob_dir + os.path.basename(output_file)
+        return CSVSink(output_file, header, mirror=AzureBlobWriter(container_name, blob_path))
+
+    return sink_factory
+
+
 def _generate_azure_date_range(month):
     start = month.get("start").replace(day=1)
     end = start + relativedelta(months=+1, days=-1)
@@ -163,27 +218,6 @@ def _gzip_report(report_path):
     return t_file.name
 
 
-def _tar_gzip_report(temp_dir):
-    """Compress the report and manifest to tarfile."""
-    t_file = NamedTemporaryFile(mode="w", suffix=".tar.gz", delete=False)
-
-    with tarfile.open(t_file.name, "w:gz") as tar:
-        tar.add(temp_dir, arcname=os.path.sep)
-
-    return t_file.name
-
-
-def _tar_gzip_report_files(file_list):
-    """Compress the file list to a tarfile."""
-    with TemporaryDirectory() as t_directory:
-        for report_file in file_list:
-            temp_path = os.path.join(t_directory, os.path.basename(report_file))
-            shutil.copy2(report_file, temp_path)
-        fname = _tar_gzip_report(t_directory)
-
-    return fname
-
-
 def _write_manifest(data):
     """Write manifest file to temp location.
 
@@ -199,21 +233,50 @@ def _write_manifest(data):
     return t_file.name
 
 
-def aws_route_file(bucket_name, bucket_file_path, local_path):
-    """Route file to either S3 bucket or local filesystem."""
+def aws_route_file(bucket_name, bucket_file_path, local_path, link=False):
+    """Route file to either S3 bucket or local filesystem, linking a disposable file into a local bucket."""
     if os.path.isdir(bucket_name):
-        copy_to_local_dir(bucket_name, local_path, bucket_file_path)
+        copy_to_local_dir(bucket_name, local_path, bucket_file_path, link=link)
     else:
         upload_to_s3(bucket_name, bucket_file_path, local_path)
 
 
-def azure_route_file(storage_account_name, storage_file_name, local_path, storage_file_path=None):
-    """Route file to either storage account or local filesystem."""
+def _aws_route_report(bucket_name, s3_cur_path, report_path, remove=False):
+    """Gzip a report file and route it into the report's S3 path, removing the report if remove is set."""
+    temp_cur_zip = _gzip_report(report_path)
+    destination_file = "{}/{}.gz".format(s3_cur_path, os.path.basename(report_path))
+    aws_route_file(bucket_name, destination_file, temp_cur_zip, link=True)
+    os.remove(temp_cur_zip)
+    if remove:
+        _remove_files([report_path])
+
+
+def _aws_route_manifest(bucket_name, bucket_file_paths, temp_manifest):
+    """Route a temporary manifest file to each of its S3 paths, then remove it."""
+    for bucket_file_path in bucket_file_paths:
+        aws_route_file(bucket_name, bucket_file_path, temp_manifest, link=True)
+    os.remove(temp_manifest)
+
+
+def azure_route_file(storage_account_name, storage_file_name, local_path, storage_file_path=None, link=False):
+    """Route file to either storage account or local filesystem, linking a disposable file into a local dir."""
     connect_str = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
     if storage_file_path and connect_str:
         upload_to_azure_container(storage_file_name, local_path, storage_file_path)
     else:
-        copy_to_local_dir(storage_account_name, local_path, storage_file_name)
+        copy_to_local_dir(storage_account_name, local_path, storage_file_name, link=link)
+
+
+def _azure_route_report(storage_account_name, azure_container_name, report_path, file_path, remove=False):
+    """Route a report file to its blob path, removing the report if remove is set."""
+    # azure blob upload
+    if storage_account_name:
+        azure_route_file(storage_account_name, azure_container_name, report_path, file_path)
+    # local dir upload
+    else:
+        azure_route_file(azure_container_name, file_path, report_path, link=remove)
+    if remove:
+        _remove_files([report_path])
 
 
 def ocp_route_file(insights_upload, local_path):
@@ -230,6 +293,53 @@ def ocp_route_file(insights_upload, local_path):
         LOG.info(response.text)
 
 
+def _ocp_route_payload(insights_upload, payload):
+    """Route a payload and remove it."""
+    ocp_route_file(insights_upload, payload)
+    os.remove(payload)
+
+
+def _ocp_send_reports(
+    insights_upload,
+    minio_upload,
+    cluster_id,
+    report_datetime,
+    payload_name,
+    report_parts,
+    manifest_data,
+    max_size,
+    files,
+):
+    """Send the reports of a month with their manifest, then remove the given report files.
+
+    Args:
+        insights_upload (str): the local upload directory or the ingress url, if the reports go there
+        minio_upload (str): the MinIO endpoint, if the reports go there
+        cluster_id (str): the cluster of the reports
+        report_datetime (DateTime): the date of the payload
+        payload_name (str): the MinIO key of the first payload
+        report_parts (List): the ReportPart of each report file
+        manifest_data (bytes): the manifest of the reports
+        max_size (int): the maximum size of the reports packed into one payload
+        files (List): the report files to remove once sent
+    """
+    if insights_upload and os.path.isdir(insights_upload):
+        # a local upload directory gets the extracted layout directly, without a tarball
+        place_payload(insights_upload, cluster_id, report_datetime, report_parts, manifest_data)
+    elif insights_upload:
+        with UploadPool() as uploads:
+            for payload in pack_payloads(report_parts, manifest_data, max_size):
+                uploads.submit(_ocp_route_payload, insights_upload, payload)
+    else:
+        for payload_number, payload in enumerate(pack_payloads(report_parts, manifest_data, max_size)):
+            payload_key = f"{payload_name}.{payload_number}.tar.gz" if payload_number else f"{payload_name}.tar.gz"
+            ocp_route_file_minio(minio_upload, payload, payload_key)
+            os.remove(payload)
+    if files:
+        LOG.info("Cleaning up local directory")
+        _remove_files(files)
+
+
 def ocp_route_file_minio(minio_upload, local_path, key):  # pragma: no cover
     """Route file to either Upload Service or local filesystem."""
     response = post_payload_to_minio(minio_upload, local_path, key)
@@ -242,14 +352,7 @@ def ocp_route_file_minio(minio_upload, local_path, key):  # pragma: no cover
 
 
 def get_s3_signature(url, file_name):  # pragma: no cover
-    s3 = boto3.client(
-        "s3",
-        endpoint_url=url,
-        aws_access_key_id=os.environ.get("S3_ACCESS_KEY"),
-        aws_secret_access_key=os.environ.get("S3_SECRET_KEY"),
-        region_name="us-east-1",
-    )
-    return s3.generate_presigned_url(
+    return s3_endpoint_client(url).generate_presigned_url(
         ClientMethod="put_object",
         Params={"Bucket": os.environ.get("S3_BUCKET_NAME"), "Key": file_name},
         ExpiresIn=86400,
@@ -258,14 +361,14 @@ def get_s3_signature(url, file_name):  # pragma: no cover
 
 def upload_file_to_s3(signature, file_path):  # pragma: no cover
     with open(file_path, "rb") as f:
-        response = requests.put(signature, data=f)
+        response = http_session().put(signature, data=f)
     return response
 
 
-def gcp_route_file(bucket_name, bucket_file_path, local_path):
-    """Route file to either GCP bucket or local filesystem."""
+def gcp_route_file(bucket_name, bucket_file_path, local_path, link=False):
+    """Route file to either GCP bucket or local filesystem, linking a disposable file into a local bucket."""
     if os.path.isdir(bucket_name):
-        copy_to_local_dir(bucket_name, bucket_file_path, local_path)
+        copy_to_local_dir(bucket_name, bucket_file_path, local_path, link=link)
     else:
         upload_to_gcp_storage(bucket_name, bucket_file_path, local_path)
 
@@ -307,39 +410,41 @@ def post_payload_to_ingest_service(insights_upload, local_path):
                 }
             }
             headers = {"x-rh-identity": base64.b64encode(json.dumps(header).encode("UTF-8"))}
-            return requests.post(
-                insights_upload,
-                data={},
-                files={"file": ("payload.tar.gz", upload_file, content_type)},
-                headers=headers,
-            )
+            return _post_payload(insights_upload, upload_file, content_type, headers=headers)
 
         if insights_user and insights_password:
-            return requests.post(
+            return _post_payload(
+                insights_upload, upload_file, content_type, auth=(insights_user, insights_password), verify=False
+            )
+
+        token = service_account_token(
+            hcc_token_url, hcc_service_account_id, hcc_service_account_secret, hcc_token_scope
+        ).get()
+        headers = {"Authorization": f"Bearer {token}"}
+        return _post_payload(insights_upload, upload_file, content_type, headers=headers, verify=False)
+
+
+def _post_payload(insights_upload, upload_file, content_type, **kwargs):
+    """POST a payload over the shared session, retrying with backoff while the service is unavailable."""
+    for attempt in range(INGRESS_RETRIES + 1):
+        upload_file.seek(0)
+        try:
+            response = http_session().post(
                 insights_upload,
                 data={},
                 files={"file": ("payload.tar.gz", upload_file, content_type)},
-                auth=(insights_user, insights_password),
-                verify=False,
+                **kwargs,
             )
-
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        data = f"client_id={hcc_service_account_id}&client_secret={hcc_service_account_secret}"
-        data += f"&grant_type=client_credentials&scope={hcc_token_scope}"
-        token_resp = requests.post(hcc_token_url, data=data, headers=headers)
-        token = None
-        if token_resp.ok:
-            token_json = token_resp.json()
-            token = token_json.get("access_token")
-
-        headers = {"Authorization": f"Bearer {token}"}
-        return requests.post(
-            insights_upload,
-            data={},
-            files={"file": ("payload.tar.gz", upload_file, content_type)},
-            headers=headers,
-            verify=False,
-        )
+            if response.status_code not in INGRESS_RETRY_STATUSES or attempt == INGRESS_RETRIES:
+                return response
+            reason = response.status_code
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+            if attempt == INGRESS_RETRIES:
+                raise
+            reason = error
+        delay = INGRESS_BACKOFF * 2**attempt
+        LOG.warning(f"Upload to {insights_upload} failed ({reason}), retrying in {delay} seconds.")
+        time.sleep(delay)
 
 
 def post_payload_to_minio(minio_upload, local_path, key):  # pragma: no cover
@@ -381,20 +486,29 @@ def _create_month_list(start_date, end_date):
     return months
 
 
-def _aws_finalize_report(data, static_data=None):
-    """Populate invoice id for data."""
-    data = copy.deepcopy(data)
-
+def _aws_invoice_id(static_data=None):
+    """Return the invoice id used to finalize a report."""
     invoice_id = None
     if static_data and static_data.get("finalized_report"):
         invoice_id = static_data.get("finalized_report").get("invoice_id")
 
     if not invoice_id:
         invoice_id = "".join([random.choice(string.digits) for _ in range(9)])
-    for row in data:
-        row["bill/InvoiceId"] = invoice_id
+    return invoice_id
 
-    return data
+
+def _aws_cost_category_cols(generators):
+    """Return the cost category columns pinned by the generators of a run."""
+    columns = set()
+    for generator in generators:
+        columns.update((generator.get("attributes") or {}).get("cost_category") or {})
+    return columns
+
+
+@lru_cache
+def _sorted_header(columns):
+    """Return the ordered csv header for a set of columns."""
+    return tuple(sorted(columns))
 
 
 def _generate_accounts(static_report_data=None):
@@ -464,17 +578,40 @@ def _generate_azure_account_info(static_report_data=None):
     return account_info
 
 
+@lru_cache(maxsize=None)
+def _resolve_generator_cls(generator_cls):
+    """Return the generator class for a generator name used in static files."""
+    return getattr(importlib.import_module(__name__), generator_cls)
+
+
+@lru_cache(maxsize=None)
+def _parse_date_str(date_str):
+    """Parse a static file date string, trying the ISO format before dateutil."""
+    try:
+        parsed = datetime.fromisoformat(date_str)
+    except ValueError:
+        parsed = parser.parse(date_str)
+    return parsed.replace(tzinfo=timezone.utc)
+
+
+def _parse_generator_date(value):
+    """Return a UTC datetime for a generator start or end date."""
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=timezone.utc)
+    return _parse_date_str(value)
+
+
 def _get_generators(generator_list):
     """Collect a list of report generators."""
     generators = []
     if generator_list:
         for item in generator_list:
             for generator_cls, attributes in item.items():
-                generator_obj = {"generator": getattr(importlib.import_module(__name__), generator_cls)}
+                generator_obj = {"generator": _resolve_generator_cls(generator_cls)}
                 if attributes.get("start_date"):
-                    attributes["start_date"] = parser.parse(attributes.get("start_date")).replace(tzinfo=timezone.utc)
+                    attributes["start_date"] = _parse_generator_date(attributes.get("start_date"))
                 if attributes.get("end_date"):
-                    attributes["end_date"] = parser.parse(attributes.get("end_date")).replace(tzinfo=timezone.utc)
+                    attributes["end_date"] = _parse_generator_date(attributes.get("end_date"))
                 generator_obj["attributes"] = attributes
                 generators.append(generator_obj)
     return generators
@@ -486,11 +623,11 @@ def _get_jsonl_generators(generator_list):
     if generator_list:
         for item in generator_list:
             for generator_cls, attributes in item.items():
-                generator_obj = {"generator": getattr(importlib.import_module(__name__), "JSONL" + generator_cls)}
+                generator_obj = {"generator": _resolve_generator_cls("JSONL" + generator_cls)}
                 if attributes.get("start_date"):
-                    attributes["start_date"] = parser.parse(attributes.get("start_date")).replace(tzinfo=timezone.utc)
+                    attributes["start_date"] = _parse_generator_date(attributes.get("start_date"))
                 if attributes.get("end_date"):
-                    attributes["end_date"] = parser.parse(attributes.get("end_date")).replace(tzinfo=timezone.utc)
+                    attributes["end_date"] = _parse_generator_date(attributes.get("end_date"))
                 if attributes.get("currency"):
                     attributes["currency"] = attributes.get("currency")
                 generator_obj["attributes"] = attributes
@@ -498,6 +635,77 @@ def _get_jsonl_generators(generator_list):
     return generators
 
 
+def _build_generation_plan(generators, months, default_dates=None):
+    """Compile generators and months into a GenerationPlan.
+
+    Args:
+        generators (List): generator dicts with resolved classes and parsed attributes
+        months (List): month dicts as created by _create_month_list
+        default_dates (Tuple): (start, end) used for generators without attributes,
+            otherwise those generators cover every month in full
+    Returns:
+        (GenerationPlan): the compiled plan
+
+    """
+    windows = [[] for _ in months]
+    month_starts = [month.get("start") for month in months]
+    for index, generator in enumerate(generators):
+        attributes = generator.get("attributes")
+        if not attributes and default_dates:
+            attributes = {"start_date": default_dates[0], "end_date": default_dates[1]}
+        if not attributes:
+            for month_index, month in enumerate(months):
+                windows[month_index].append((index, month.get("start"), month.get("end")))
+            continue
+
+        start_date = attributes.get("start_date")
+        end_date = attributes.get("end_date")
+        first_month = max(bisect_right(month_starts, start_date) - 1, 0)
+        for month_index in range(first_month, len(months)):
+            month = months[month_index]
+            # Skip if generator usage is outside of current month
+            if end_date < month.get("start"):
+                break
+            if start_date > month.get("end"):
+                continue
+            gen_start_date, gen_end_date = _create_generator_dates_from_yaml(attributes, month)
+            windows[month_index].append((index, gen_start_date, gen_end_date))
+    return GenerationPlan(generators, months, windows)
+
+
+def _get_generation_plan(options, months, default_generators, default_dates=None):
+    """Return the generation plan for a run.
+
+    A plan loaded from the plan cache is reused as is. Otherwise the plan is compiled
+    from the static report data, or from the default generators, and written to the
+    plan cache when one was requested.
+    """
+    plan = options.get("generation_plan")
+    if plan is not None:
+        return plan
+
+    static_report_data = options.get("static_report_data")
+    if static_report_data:
+        generators = _get_generators(static_report_data.get("generators"))
+    else:
+        generators = default_generators
+    plan = _build_generation_plan(generators, months, default_dates)
+
+    if static_report_data and options.get("plan_cache_key"):
+        save_plan_cache(options.get("plan_cache"), options.get("plan_cache_key"), {"plan": plan})
+    return plan
+
+
+def _month_generator(instances, key, generator_cls, start_date, end_date, *args, **kwargs):
+    """Return the generator for key, rebasing the instance created in an earlier month onto the window."""
+    gen = instances.get(key)
+    if gen is None:
+        gen = instances[key] = generator_cls(start_date, end_date, *args, **kwargs)
+    else:
+        gen.rebase(start_date, end_date)
+    return gen
+
+
 def _create_generator_dates_from_yaml(attributes, month):
     """Calculate generator start and end dates based on yaml and current month."""
     gen_start_date = None
@@ -541,30 +749,63 @@ def _create_generator_dates_from_yaml(attributes, month):
 
 
 def write_aws_file(
-    file_number, aws_report_name, month_name, year, data, aws_finalize_report, static_report_data, headers
+    file_number,
+    aws_report_name,
+    month_name,
+    year,
+    data,
+    aws_finalize_report,
+    static_report_data,
+    headers,
 ):
-    """Write AWS data to a file."""
-    headers = sorted(list(headers))
+    """Write AWS data to a file.
+
+    data is a list of row dicts and AWSBatch objects.
+    """
+    headers = _sorted_header(frozenset(headers))
     if file_number != 0:
         file_name = "{}-{}-{}-{}".format(month_name, year, aws_report_name, str(file_number))
     else:
         file_name = f"{month_name}-{year}-{aws_report_name}"
+    full_file_name = "{}/{}.csv".format(os.getcwd(), file_name)
 
-    if aws_finalize_report and aws_finalize_report == "overwrite":
-        data = _aws_finalize_report(data, static_report_data)
-    elif aws_finalize_report and aws_finalize_report == "copy":
+    overrides = None
+    if aws_finalize_report in ("overwrite", "copy"):
+        overrides = {"bill/InvoiceId": _aws_invoice_id(static_report_data)}
+
+    if aws_finalize_report == "overwrite":
+        sink = CSVSink(full_file_name, headers, overrides=overrides)
+    elif aws_finalize_report == "copy":
         # Currently only a local option as this does not simulate
-        finalized_data = _aws_finalize_report(data, static_report_data)
-        file_name_finalized = f"{file_name}-finalized"
-        full_file_name = "{}/{}.csv".format(os.getcwd(), file_name_finalized)
-        _write_csv(full_file_name, finalized_data, headers)
+        full_file_name_finalized = "{}/{}-finalized.csv".format(os.getcwd(), file_name)
+        sink = MultiSink(
+            CSVSink(full_file_name_finalized, headers, overrides=overrides), CSVSink(full_file_name, headers)
+        )
+    else:
+        sink = CSVSink(full_file_name, headers)
 
-    full_file_name = "{}/{}.csv".format(os.getcwd(), file_name)
-    _write_csv(full_file_name, data, headers)
+    with sink:
+        for chunk in data:
+            if isinstance(chunk, AWSBatch):
+                sink.write_batch(chunk)
+            else:
+                sink.write(chunk)
 
     return full_file_name
 
 
+def _split_batch(batch, row_count, row_limit):
+    """Split a batch so the first chunk fills up the current file and every other chunk fills a file of its own."""
+    if not row_limit:
+        yield batch
+        return
+    start = 0
+    stop = row_limit - row_count
+    while start < len(batch):
+        yield batch.slice(start, stop)
+        start, stop = stop, stop + row_limit
+
+
 def default_currency(currency, static_currency):
     if currency:
         return currency
@@ -607,23 +848,20 @@ def aws_create_report(options):  # noqa: C901
     static_report_data = options.get("static_report_data")
     manifest_gen = True if options.get("manifest_generation") is None else options.get("manifest_generation")
 
-    if static_report_data:
-        generators = _get_generators(static_report_data.get("generators"))
-        accounts_list = static_report_data.get("accounts")
-    else:
-        generators = [
-            {"generator": DataTransferGenerator, "attributes": {}},
-            {"generator": EBSGenerator, "attributes": {}},
-            {"generator": EC2Generator, "attributes": {}},
-            {"generator": S3Generator, "attributes": {}},
-            {"generator": RDSGenerator, "attributes": {}},
-            {"generator": Route53Generator, "attributes": {}},
-            {"generator": VPCGenerator, "attributes": {}},
-            {"generator": MarketplaceGenerator, "attributes": {}},
-        ]
-        accounts_list = None
-
-    months = _create_month_list(start_date, end_date)
+    generators = [
+        {"generator": DataTransferGenerator, "attributes": {}},
+        {"generator": EBSGenerator, "attributes": {}},
+        {"generator": EC2Generator, "attributes": {}},
+        {"generator": S3Generator, "attributes": {}},
+        {"generator": RDSGenerator, "attributes": {}},
+        {"generator": Route53Generator, "attributes": {}},
+        {"generator": VPCGenerator, "attributes": {}},
+        {"generator": MarketplaceGenerator, "attributes": {}},
+    ]
+    accounts_list = static_report_data.get("accounts") if static_report_data else None
+
+    plan = _get_generation_plan(options, _create_month_list(start_date, end_date), generators)
+    schema = get_aws_column_schema(options.get("aws_tags"), _aws_cost_category_cols(plan.generators))
 
     payer_account, usage_accounts, currency_code = _generate_accounts(accounts_list)
     currency_code = default_currency(options.get("currency"), currency_code)
@@ -631,132 +869,134 @@ def aws_create_report(options):  # noqa: C901
     aws_bucket_name = options.get("aws_bucket_name")
     aws_report_name = options.get("aws_report_name")
     write_monthly = options.get("write_monthly", False)
-    for month in months:
-        data = []
-        file_number = 0
-        monthly_files = []
-        fake = Faker()
-        num_gens = len(generators)
-        ten_percent = int(num_gens * 0.1) if num_gens > 50 else 5
-        LOG.info(f"Producing data for {num_gens} generators for {month.get('start').strftime('%Y-%m')}.")
-        for count, generator in enumerate(generators):
-            generator_cls = generator.get("generator")
-            attributes = generator.get("attributes")
+    row_limit = options.get("row_limit")
+    aws_batch = options.get("aws_batch", False)
+    granularity = options.get("aws_granularity") or "hourly"
+    generator_instances = {}
+    # each month is compressed and uploaded in the background while the next one is generated
+    with UploadPool() as uploads:
+        for month_index, month in enumerate(plan.months):
+            data = []
+            row_count = 0
+            file_number = 0
+            monthly_files = []
+            fake = Faker()
             gen_start_date = month.get("start")
             gen_end_date = month.get("end")
-            if attributes:
-                # Skip if generator usage is outside of current month
-                if attributes.get("end_date") < month.get("start"):
-                    continue
-                if attributes.get("start_date") > month.get("end"):
-                    continue
-
-                gen_start_date, gen_end_date = _create_generator_dates_from_yaml(attributes, month)
-
-            gen = generator_cls(
-                gen_start_date,
-                gen_end_date,
-                currency_code,
-                payer_account,
-                usage_accounts,
-                attributes,
-                options.get("aws_tags"),
+            num_gens = plan.generator_count(month_index)
+            ten_percent = int(num_gens * 0.1) if num_gens > 50 else 5
+            LOG.info(f"Producing data for {num_gens} generators for {month.get('start').strftime('%Y-%m')}.")
+            for count, (index, generator, gen_start_date, gen_end_date) in enumerate(
+                plan.month_generators(month_index)
+            ):
+                generator_cls = generator.get("generator")
+                attributes = generator.get("attributes")
+                gen = _month_generator(
+                    generator_instances,
+                    index,
+                    generator_cls,
+                    gen_start_date,
+                    gen_end_date,
+                    currency_code,
+                    payer_account,
+                    usage_accounts,
+                    attributes,
+                    options.get("aws_tags"),
+                )
+                num_instances = 1 if attributes else randint(2, 60)
+                for _ in range(num_instances):
+                    if aws_batch or gen.is_time_invariant():
+                        batch = gen.generate_batch()
+                        if granularity != "hourly":
+                            batch = AWSBatch.from_rows(gen.schema, list(aggregate_aws_rows(batch.rows(), granularity)))
+                        chunks = _split_batch(batch, row_count, row_limit)
+                    else:
+                        chunks = aggregate_aws_rows(gen.generate_data(), granularity)
+                    for chunk in chunks:
+                        data += [chunk]
+                        row_count += len(chunk) if isinstance(chunk, AWSBatch) else 1
+                        if row_count == row_limit:
+                            file_number += 1
+                            month_output_file = write_aws_file(
+                                file_number,
+                                aws_report_name,
+                                month.get("name"),
+                                gen_start_date.year,
+                                data,
+                                aws_finalize_report,
+                                static_report_data,
+                                schema.columns,
+                            )
+                            monthly_files.append(month_output_file)
+                            data.clear()
+                            row_count = 0
+
+                if count % ten_percent == 0:
+                    LOG.info(f"Done with {count} of {num_gens} generators.")
+
+            if file_number != 0:
+                file_number += 1
+            month_output_file = write_aws_file(
+                file_number,
+                aws_report_name,
+                month.get("name"),
+                gen_start_date.year,
+                data,
+                aws_finalize_report,
+                static_report_data,
+                schema.columns,
             )
-            num_instances = 1 if attributes else randint(2, 60)
-            for _ in range(num_instances):
-                for hour in gen.generate_data():
-                    data += [hour]
-                    if len(data) == options.get("row_limit"):
-                        file_number += 1
-                        month_output_file = write_aws_file(
-                            file_number,
-                            aws_report_name,
-                            month.get("name"),
-                            gen_start_date.year,
-                            data,
-                            aws_finalize_report,
-                            static_report_data,
-                            gen.AWS_COLUMNS,
-                        )
-                        monthly_files.append(month_output_file)
-                        data.clear()
-
-            if count % ten_percent == 0:
-                LOG.info(f"Done with {count} of {num_gens} generators.")
-
-        if file_number != 0:
-            file_number += 1
-        month_output_file = write_aws_file(
-            file_number,
-            aws_report_name,
-            month.get("name"),
-            gen_start_date.year,
-            data,
-            aws_finalize_report,
-            static_report_data,
-            gen.AWS_COLUMNS,
-        )
-        monthly_files.append(month_output_file)
-
-        if aws_bucket_name:
-            manifest_values = {"account": payer_account}
-            manifest_values.update(options)
-            manifest_values["start_date"] = gen_start_date
-            manifest_values["end_date"] = gen_end_date
-            manifest_values["file_names"] = monthly_files
-
-            if not manifest_gen:
-                s3_cur_path, _ = aws_generate_manifest(fake, manifest_values)
-                for monthly_file in monthly_files:
-                    temp_cur_zip = _gzip_report(monthly_file)
-                    destination_file = "{}/{}.gz".format(s3_cur_path, os.path.basename(monthly_file))
-                    aws_route_file(aws_bucket_name, destination_file, temp_cur_zip)
-                    os.remove(temp_cur_zip)
-            else:
-                s3_cur_path, manifest_data = aws_generate_manifest(fake, manifest_values)
-                s3_month_path = os.path.dirname(s3_cur_path)
-                s3_month_manifest_path = s3_month_path + "/" + aws_report_name + "-Manifest.json"
-                s3_assembly_manifest_path = s3_cur_path + "/" + aws_report_name + "-Manifest.json"
+            monthly_files.append(month_output_file)
 
-                temp_manifest = _write_manifest(manifest_data)
-                aws_route_file(aws_bucket_name, s3_month_manifest_path, temp_manifest)
-                aws_route_file(aws_bucket_name, s3_assembly_manifest_path, temp_manifest)
+            if aws_bucket_name:
+                manifest_values = {"account": payer_account}
+                manifest_values.update(options)
+                manifest_values["start_date"] = gen_start_date
+                manifest_values["end_date"] = gen_end_date
+                manifest_values["file_names"] = monthly_files
+
+                if not manifest_gen:
+                    s3_cur_path, _ = aws_generate_manifest(fake, manifest_values)
+                else:
+                    s3_cur_path, manifest_data = aws_generate_manifest(fake, manifest_values)
+                    s3_month_path = os.path.dirname(s3_cur_path)
+                    s3_month_manifest_path = s3_month_path + "/" + aws_report_name + "-Manifest.json"
+                    s3_assembly_manifest_path = s3_cur_path + "/" + aws_report_name + "-Manifest.json"
+                    uploads.submit(
+                        _aws_route_manifest,
+                        aws_bucket_name,
+                        [s3_month_manifest_path, s3_assembly_manifest_path],
+                        _write_manifest(manifest_data),
+                    )
 
                 for monthly_file in monthly_files:
-                    temp_cur_zip = _gzip_report(monthly_file)
-                    destination_file = "{}/{}.gz".format(s3_cur_path, os.path.basename(monthly_file))
-                    aws_route_file(aws_bucket_name, destination_file, temp_cur_zip)
-                    os.remove(temp_cur_zip)
-
-                os.remove(temp_manifest)
-
-        if not write_monthly:
-            _remove_files(monthly_files)
+                    uploads.submit(
+                        _aws_route_report, aws_bucket_name, s3_cur_path, monthly_file, remove=not write_monthly
+                    )
+            elif not write_monthly:
+                _remove_files(monthly_files)
 
 
 def azure_create_report(options):  # noqa: C901
     """Create a cost usage report file."""
-    data = []
     start_date = options.get("start_date")
     end_date = options.get("end_date")
     static_report_data = options.get("static_report_data")
-    if static_report_data:
-        generators = _get_generators(static_report_data.get("generators"))
-        accounts_list = static_report_data.get("accounts")
-    else:
-        generators = [
-            {"generator": BandwidthGenerator, "attributes": {}},
-            {"generator": CCSPGenerator, "attributes": {}},
-            {"generator": SQLGenerator, "attributes": {}},
-            {"generator": StorageGenerator, "attributes": {}},
-            {"generator": VMGenerator, "attributes": {}},
-            {"generator": VNGenerator, "attributes": {}},
-            {"generator": DTGenerator, "attributes": {}},
-            {"generator": ManagedDiskGenerator, "attributes": {}},
-        ]
-        accounts_list = None
-
-    months = _create_month_list(start_date, end_date)
+    generators = [
+        {"generator": BandwidthGenerator, "attributes": {}},
+        {"generator": CCSPGenerator, "attributes": {}},
+        {"generator": SQLGenerator, "attributes": {}},
+        {"generator": StorageGenerator, "attributes": {}},
+        {"generator": VMGenerator, "attributes": {}},
+        {"generator": VNGenerator, "attributes": {}},
+        {"generator": DTGenerator, "attributes": {}},
+        {"generator": ManagedDiskGenerator, "attributes": {}},
+    ]
+    accounts_list = static_report_data.get("accounts") if static_report_data else None
+
+    plan = _get_generation_plan(
+        options, _create_month_list(start_date, end_date), generators, default_dates=(start_date, end_date)
+    )
 
     account_info = _generate_azure_account_info(accounts_list)
     currency = default_currency(options.get("currency"), account_info["currency_code"])
@@ -770,63 +1010,72 @@ def azure_create_report(options):  # noqa: C901
     azure_report_name = options.get("azure_report_name")
     resource_group_export = options.get("resource_group_export", False)
     write_monthly = options.get("write_monthly", False)
-    for month in months:
-        data = []
-        monthly_files = []
-        num_gens = len(generators)
-        ten_percent = int(num_gens * 0.1) if num_gens > 50 else 5
-        LOG.info(f"Producing data for {num_gens} generators for {month.get('start').strftime('%Y-%m')}.")
-        for count, generator in enumerate(generators):
-            generator_cls = generator.get("generator")
-            attributes = generator.get("attributes", {})
-            gen_start_date = month.get("start")
-            gen_end_date = month.get("end")
-            if attributes:
-                # Skip if generator usage is outside of current month
-                if attributes.get("end_date") < month.get("start"):
-                    continue
-                if attributes.get("start_date") > month.get("end"):
-                    continue
+    azure_columns = AZURE_COLUMNS_V2_RESOURCE_GROUP if resource_group_export else AZURE_COLUMNS_V2_SUBSCRIPTION
+    row_limit = options.get("row_limit")
+    stream_upload = bool(
+        options.get("azure_stream_upload")
+        and azure_container_name
+        and storage_account_name
+        and os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+    )
+    generator_instances = {}
+    # each month is uploaded in the background while the next one is generated
+    with UploadPool() as uploads:
+        for month_index, month in enumerate(plan.months):
+            num_gens = plan.generator_count(month_index)
+            ten_percent = int(num_gens * 0.1) if num_gens > 50 else 5
+            LOG.info(f"Producing data for {num_gens} generators for {month.get('start').strftime('%Y-%m')}.")
+            local_path, _ = _generate_azure_filename()
+            date_range = _generate_azure_date_range(month)
+            blob_dir = ""
+            if azure_prefix_name:
+                blob_dir += azure_prefix_name + "/"
+            blob_dir += f"{azure_report_name}/{date_range}/"
+            if stream_upload:
+                sink_factory = _azure_stream_sink_factory(local_path, azure_columns, azure_container_name, blob_dir)
             else:
-                attributes = {"end_date": end_date, "start_date": start_date}
-
-            gen_start_date, gen_end_date = _create_generator_dates_from_yaml(attributes, month)
-
-            if attributes.get("meter_cache"):
-                meter_cache.update(attributes.get("meter_cache"))  # needed so that meter_cache can be defined in yaml
-            attributes["meter_cache"] = meter_cache
-            attributes["resource_group_export"] = resource_group_export
-            gen = generator_cls(gen_start_date, gen_end_date, currency, account_info, attributes)
-            azure_columns = gen.azure_columns
-            data += gen.generate_data()
-            meter_cache = gen.get_meter_cache()
-
-            if count % ten_percent == 0:
-                LOG.info(f"Done with {count} of {num_gens} generators.")
-
-        local_path, output_file_name = _generate_azure_filename()
-        date_range = _generate_azure_date_range(month)
+                sink_factory = _csv_sink_factory(local_path, azure_columns)
+            sink = RotatingSink(sink_factory, row_limit)
+            with sink:
+                for count, (index, generator, gen_start_date, gen_end_date) in enumerate(
+                    plan.month_generators(month_index)
+                ):
+                    generator_cls = generator.get("generator")
+                    attributes = generator.get("attributes") or {"end_date": end_date, "start_date": start_date}
+
+                    if attributes.get("meter_cache"):
+                        # needed so that meter_cache can be defined in yaml
+                        meter_cache.update(attributes.get("meter_cache"))
+                    attributes["meter_cache"] = meter_cache
+                    attributes["resource_group_export"] = resource_group_export
+                    gen = _month_generator(
+                        generator_instances,
+                        index,
+                        generator_cls,
+                        gen_start_date,
+                        gen_end_date,
+                        currency,
+                        account_info,
+                        attributes,
+                    )
+                    sink.write_rows(gen.generate_data())
+                    meter_cache = gen.get_meter_cache()
 
-        _write_csv(local_path, data, azure_columns)
-        monthly_files.append(local_path)
+                    if count % ten_percent == 0:
+                        LOG.info(f"Done with {count} of {num_gens} generators.")
 
-        if azure_container_name:
-            file_path = ""
-            if azure_prefix_name:
-                file_path += azure_prefix_name + "/"
-            file_path += azure_report_name + "/"
-            file_path += date_range + "/"
-            file_path += output_file_name
-
-            # azure blob upload
-            storage_account_name = options.get("azure_account_name", None)
-            if storage_account_name:
-                azure_route_file(storage_account_name, azure_container_name, local_path, file_path)
-            # local dir upload
-            else:
-                azure_route_file(azure_container_name, file_path, local_path)
-        if not write_monthly:
-            _remove_files(monthly_files)
+            if azure_container_name and not stream_upload:
+                for month_file in sink.files:
+                    uploads.submit(
+                        _azure_route_report,
+                        storage_account_name,
+                        azure_container_name,
+                        month_file,
+                        blob_dir + os.path.basename(month_file),
+                        remove=not write_monthly,
+                    )
+            elif not write_monthly:
+                _remove_files(sink.files)
 
 
 def write_ocp_file(file_number, cluster_id, month_name, year, report_type, data):
@@ -842,210 +1091,233 @@ def write_ocp_file(file_number, cluster_id, month_name, year, report_type, data)
     return full_file_name
 
 
+def _ocp_report(file_number, cluster_id, month_name, year, report_type, data, in_memory=False):
+    """Write OCP data to a file, or encode it in memory when it only goes into payloads.
+
+    Encoded reports larger than OCP_IN_MEMORY_REPORT_SIZE are spilled to a
+    temporary file, so that months waiting to be sent do not hold them in memory.
+
+    Returns:
+        (str or bytes): the path of the report file, or the encoded report
+    """
+    if not in_memory:
+        return write_ocp_file(file_number, cluster_id, month_name, year, report_type, data)
+    encoded = _encode_csv(data, OCP_REPORT_TYPE_TO_COLS[report_type])
+    if len(encoded) <= OCP_IN_MEMORY_REPORT_SIZE:
+        return encoded
+    with NamedTemporaryFile(suffix=".csv", delete=False) as t_file:
+        t_file.write(encoded)
+    return t_file.name
+
+
 def ocp_create_report(options):  # noqa: C901
     """Create a usage report file."""
     start_date = options.get("start_date")
     end_date = options.get("end_date")
     cluster_id = options.get("ocp_cluster_id")
-    static_report_data = options.get("static_report_data")
     ros_ocp_info = options.get("ros_ocp_info")
     constant_values_ros_ocp = options.get("constant_values_ros_ocp")
 
-    if static_report_data:
-        generators = _get_generators(static_report_data.get("generators"))
-    else:
-        generators = [{"generator": OCPGenerator, "attributes": {}}]
+    generators = [{"generator": OCPGenerator, "attributes": {}}]
+    plan = _get_generation_plan(options, _create_month_list(start_date, end_date), generators)
 
-    months = _create_month_list(start_date, end_date)
     insights_upload = options.get("insights_upload")
     minio_upload = options.get("minio_upload")
     write_monthly = options.get("write_monthly", False)
-    for month in months:
-        data = {OCP_POD_USAGE: [], OCP_STORAGE_USAGE: [], OCP_NODE_LABEL: [], OCP_NAMESPACE_LABEL: []}
-        file_numbers = {OCP_POD_USAGE: 0, OCP_STORAGE_USAGE: 0, OCP_NODE_LABEL: 0, OCP_NAMESPACE_LABEL: 0}
-        if ros_ocp_info:
-            data.update({OCP_ROS_USAGE: []})
-            file_numbers.update({OCP_ROS_USAGE: 0})
-        monthly_files = []
-        monthly_ros_files = []
-        for generator in generators:
-            generator_cls = generator.get("generator")
-            attributes = generator.get("attributes")
+    max_size = max_payload_size(options.get("payload_max_size"))
+    # small reports that are not kept go straight from memory into the payloads, split reports are written
+    # to disk like the baseline so that only row_limit rows are held at once
+    in_memory = bool(insights_upload or minio_upload) and not write_monthly and not options.get("row_limit")
+    generator_instances = {}
+    # each month is packed and sent in the background while the next one is generated, one month at a time
+    # so that payloads arrive in order, with at most one more month waiting to bound the reports held
+    with UploadPool(max_workers=1, max_pending=2) as uploads:
+        for month_index, month in enumerate(plan.months):
+            data = {OCP_POD_USAGE: [], OCP_STORAGE_USAGE: [], OCP_NODE_LABEL: [], OCP_NAMESPACE_LABEL: []}
+            file_numbers = {OCP_POD_USAGE: 0, OCP_STORAGE_USAGE: 0, OCP_NODE_LABEL: 0, OCP_NAMESPACE_LABEL: 0}
+            if ros_ocp_info:
+                data.update({OCP_ROS_USAGE: []})
+                file_numbers.update({OCP_ROS_USAGE: 0})
+            monthly_files = []
+            monthly_ros_files = []
             gen_start_date = month.get("start")
             gen_end_date = month.get("end")
-            if attributes:
-                # Skip if generator usage is outside of current month
-                if attributes.get("end_date") < month.get("start"):
-                    continue
-                if attributes.get("start_date") > month.get("end"):
-                    continue
-
-                gen_start_date, gen_end_date = _create_generator_dates_from_yaml(attributes, month)
+            for index, generator, gen_start_date, gen_end_date in plan.month_generators(month_index):
+                generator_cls = generator.get("generator")
+                attributes = generator.get("attributes")
+                gen = _month_generator(
+                    generator_instances,
+                    index,
+                    generator_cls,
+                    gen_start_date,
+                    gen_end_date,
+                    attributes,
+                    ros_ocp_info,
+                    constant_values_ros_ocp,
+                )
+                for report_type in gen.ocp_report_generation.keys():
+                    LOG.info(f"Generating data for {report_type} for {month}")
+                    for hour in gen.generate_data(report_type):
+                        data[report_type] += [hour]
+                        if len(data[report_type]) == options.get("row_limit"):
+                            file_numbers[report_type] += 1
+                            month_output_file = _ocp_report(
+                                file_numbers[report_type],
+                                cluster_id,
+                                month.get("name"),
+                                gen_start_date.year,
+                                report_type,
+                                data[report_type],
+                                in_memory,
+                            )
+                            monthly_files.append(month_output_file)
+                            data[report_type].clear()
 
-            gen = generator_cls(gen_start_date, gen_end_date, attributes, ros_ocp_info, constant_values_ros_ocp)
             for report_type in gen.ocp_report_generation.keys():
-                LOG.info(f"Generating data for {report_type} for {month}")
-                for hour in gen.generate_data(report_type):
-                    data[report_type] += [hour]
-                    if len(data[report_type]) == options.get("row_limit"):
-                        file_numbers[report_type] += 1
-                        month_output_file = write_ocp_file(
-                            file_numbers[report_type],
-                            cluster_id,
-                            month.get("name"),
-                            gen_start_date.year,
-                            report_type,
-                            data[report_type],
-                        )
-                        monthly_files.append(month_output_file)
-                        data[report_type].clear()
+                if file_numbers[report_type] != 0:
+                    file_numbers[report_type] += 1
+
+                month_output_file = _ocp_report(
+                    file_numbers[report_type],
+                    cluster_id,
+                    month.get("name"),
+                    gen_start_date.year,
+                    report_type,
+                    data[report_type],
+                    in_memory,
+                )
+                if report_type == OCP_ROS_USAGE:
+                    monthly_ros_files.append(month_output_file)
+                else:
+                    monthly_files.append(month_output_file)
+
+            if insights_upload or minio_upload:
+                # Generate manifest for all files
+                ocp_assembly_id = uuid4()
+                report_datetime = gen_start_date
+                # reports larger than a payload are split into parts, like the operator does
+                part_names = (f"{ocp_assembly_id}_openshift_report.{num_file}.csv" for num_file in itertools.count())
+                report_parts = [
+                    part for report in monthly_files for part in split_report(report, max_size, part_names)
+                ]
+                ros_parts = [
+                    part for report in monthly_ros_files for part in split_report(report, max_size, part_names)
+                ]
+
+                manifest_file_names = [part.name for part in report_parts]
+                manifest_ros_data = [part.name for part in ros_parts] or None
+                cr_status = {
+                    "clusterID": "4e009161-4f40-42c8-877c-3e59f6baea3d",
+                    "clusterVersion": "stable-4.6",
+                    "api_url": "https://console.redhat.com",
+                    "authentication": {"type": "token"},
+                    "packaging": {"max_reports_to_store": 30, "max_size_MB": max_size // MB},
+                    "upload": {
+                        "ingress_path": "/api/ingress/v1/upload",
+                        "upload": "True",
+                        "upload_wait": 27,
+                        "upload_cycle": 360,
+                    },
+                    "operator_commit": __version__,
+                    "prometheus": {
+                        "prometheus_configured": "True",
+                        "prometheus_connected": "True",
+                        "last_query_start_time": "2021-07-28T12:22:37Z",
+                        "last_query_success_time": "2021-07-28T12:22:37Z",
+                        "service_address": "https://thanos-querier.openshift-monitoring.svc:9091",
+                    },
+                    "reports": {
+                        "report_month": "07",
+                        "last_hour_queried": "2021-07-28 11:00:00 - 2021-07-28 11:59:59",
+                        "data_collected": "True",
+                    },
+                    "source": {
+                        "sources_path": "/api/sources/v1.0/",
+                        "name": "INSERT-SOURCE-NAME",
+                        "create_source": "False",
+                        "check_cycle": 1440,
+                    },
+                }
+                manifest_values = {
+                    "cluster_id": str(cluster_id),
+                    "uuid": str(ocp_assembly_id),
+                    "date": report_datetime.isoformat(timespec="microseconds"),
+                    "files": manifest_file_names,
+                    "start": gen_start_date.isoformat(timespec="microseconds"),
+                    "end": gen_end_date.isoformat(timespec="microseconds"),
+                    "version": __version__,
+                    "certified": False,
+                    "cr_status": cr_status,
+                }
+                if manifest_ros_data:
+                    manifest_values["resource_optimization_files"] = manifest_ros_data
+                if options.get("daily_reports"):
+                    manifest_values["daily_reports"] = True
 
-        for report_type in gen.ocp_report_generation.keys():
-            if file_numbers[report_type] != 0:
-                file_numbers[report_type] += 1
+                manifest_data = ocp_generate_manifest(manifest_values).encode()
+                report_parts += ros_parts
 
-            month_output_file = write_ocp_file(
-                file_numbers[report_type],
-                cluster_id,
-                month.get("name"),
-                gen_start_date.year,
-                report_type,
-                data[report_type],
-            )
-            if report_type == OCP_ROS_USAGE:
-                monthly_ros_files.append(month_output_file)
-            else:
-                monthly_files.append(month_output_file)
-
-        if insights_upload or minio_upload:
-            # Generate manifest for all files
-            ocp_assembly_id = uuid4()
-            report_datetime = gen_start_date
-            temp_files = {}
-            temp_ros_files = {}
-            for num_file in range(len(monthly_files)):
-                temp_filename = f"{ocp_assembly_id}_openshift_report.{num_file}.csv"
-                temp_files[temp_filename] = create_temporary_copy(monthly_files[num_file], temp_filename, "payload")
-
-            for num_file in range(len(monthly_ros_files)):
-                temp_filename = f"{ocp_assembly_id}_openshift_report.{num_file + len(monthly_files)}.csv"
-                temp_ros_files[temp_filename] = create_temporary_copy(
-                    monthly_ros_files[num_file], temp_filename, "payload"
+                payload_name = (
+                    f"{options.get('payload_name') or ocp_assembly_id.hex}.{gen_start_date.strftime('%Y_%m')}"
                 )
-
-            manifest_file_names = list(temp_files)
-            manifest_ros_data = list(temp_ros_files) if temp_ros_files else None
-            cr_status = {
-                "clusterID": "4e009161-4f40-42c8-877c-3e59f6baea3d",
-                "clusterVersion": "stable-4.6",
-                "api_url": "https://console.redhat.com",
-                "authentication": {"type": "token"},
-                "packaging": {"max_reports_to_store": 30, "max_size_MB": 100},
-                "upload": {
-                    "ingress_path": "/api/ingress/v1/upload",
-                    "upload": "True",
-                    "upload_wait": 27,
-                    "upload_cycle": 360,
-                },
-                "operator_commit": __version__,
-                "prometheus": {
-                    "prometheus_configured": "True",
-                    "prometheus_connected": "True",
-                    "last_query_start_time": "2021-07-28T12:22:37Z",
-                    "last_query_success_time": "2021-07-28T12:22:37Z",
-                    "service_address": "https://thanos-querier.openshift-monitoring.svc:9091",
-                },
-                "reports": {
-                    "report_month": "07",
-                    "last_hour_queried": "2021-07-28 11:00:00 - 2021-07-28 11:59:59",
-                    "data_collected": "True",
-                },
-                "source": {
-                    "sources_path": "/api/sources/v1.0/",
-                    "name": "INSERT-SOURCE-NAME",
-                    "create_source": "False",
-                    "check_cycle": 1440,
-                },
-            }
-            manifest_values = {
-                "cluster_id": str(cluster_id),
-                "uuid": str(ocp_assembly_id),
-                "date": report_datetime.isoformat(timespec="microseconds"),
-                "files": manifest_file_names,
-                "start": gen_start_date.isoformat(timespec="microseconds"),
-                "end": gen_end_date.isoformat(timespec="microseconds"),
-                "version": __version__,
-                "certified": False,
-                "cr_status": cr_status,
-            }
-            if manifest_ros_data:
-                manifest_values["resource_optimization_files"] = manifest_ros_data
-            if options.get("daily_reports"):
-                manifest_values["daily_reports"] = True
-
-            manifest_data = ocp_generate_manifest(manifest_values)
-            temp_manifest = _write_manifest(manifest_data)
-            temp_manifest_name = create_temporary_copy(temp_manifest, "manifest.json", "payload")
-
-            # Tarball and upload files individually for insights upload:
-            if insights_upload:
-                report_files = list(temp_files.values()) + list(temp_ros_files.values())
-                for temp_usage_file in report_files:
-                    files_to_zip = [temp_usage_file, temp_manifest_name]
-                    temp_usage_zip = _tar_gzip_report_files(files_to_zip)
-                    ocp_route_file(insights_upload, temp_usage_zip)
-                    os.remove(temp_usage_zip)
-                os.remove(temp_manifest_name)
-            else:
-                report_files = list(temp_files.values()) + list(temp_ros_files.values()) + [temp_manifest_name]
-                temp_usage_zip = _tar_gzip_report_files(report_files)
-                payload_key = (
-                    f"{options.get('payload_name') or ocp_assembly_id.hex}.{gen_start_date.strftime('%Y_%m')}.tar.gz"
+                # reports on disk, written or spilled, are removed once sent unless they are kept
+                report_files = monthly_files + monthly_ros_files
+                uploads.submit(
+                    _ocp_send_reports,
+                    insights_upload,
+                    minio_upload,
+                    str(cluster_id),
+                    report_datetime,
+                    payload_name,
+                    report_parts,
+                    manifest_data,
+                    max_size,
+                    [] if write_monthly else [report for report in report_files if isinstance(report, str)],
                 )
-                ocp_route_file_minio(minio_upload, temp_usage_zip, payload_key)
-                os.remove(temp_usage_zip)
+            elif not write_monthly:
+                LOG.info("Cleaning up local directory")
+                _remove_files(monthly_files)
+                _remove_files(monthly_ros_files)
 
-            _remove_files(report_files)
-            os.remove(temp_manifest)
-        if not write_monthly:
-            LOG.info("Cleaning up local directory")
-            _remove_files(monthly_files)
-            _remove_files(monthly_ros_files)
 
-
-def write_gcp_file(start_date, end_date, data, options):
-    """Write GCP data to a file."""
+def _gcp_file_name(start_date, end_date, options, extension, etag):
+    """Return the local path and the bucket object name of a GCP report file."""
     report_prefix = options.get("gcp_report_prefix")
-    etag = options.get("gcp_etag") if options.get("gcp_etag") else str(uuid4())
     if not report_prefix:
         invoice_month = start_date.strftime("%Y%m")
         scan_start = start_date.date()
         scan_end = end_date.date()
-        file_name = f"{invoice_month}_{etag}_{scan_start}:{scan_end}.csv"
+        file_name = f"{invoice_month}_{etag}_{scan_start}:{scan_end}{extension}"
     else:
-        file_name = report_prefix + ".csv"
+        file_name = report_prefix + extension
     local_file_path = "{}/{}".format(os.getcwd(), file_name)
     output_file_name = f"{etag}/{file_name}"
+    return local_file_path, output_file_name
+
+
+def _gcp_etag(options):
+    """Return the etag of a GCP report."""
+    return options.get("gcp_etag") if options.get("gcp_etag") else str(uuid4())
+
+
+def _gcp_columns(options):
+    """Return the csv header of a GCP report."""
     columns = GCP_REPORT_COLUMNS
     if options.get("gcp_resource_level", False):
-        columns += GCP_RESOURCE_COLUMNS
-    _write_csv(local_file_path, data, columns)
+        columns = columns + GCP_RESOURCE_COLUMNS
+    return columns
+
+
+def write_gcp_file(start_date, end_date, data, options):
+    """Write GCP data to a file."""
+    local_file_path, output_file_name = _gcp_file_name(start_date, end_date, options, ".csv", _gcp_etag(options))
+    _write_csv(local_file_path, data, _gcp_columns(options))
     return local_file_path, output_file_name
 
 
 def write_gcp_file_jsonl(start_date, end_date, data, options):
     """Write GCP data to a file."""
-    report_prefix = options.get("gcp_report_prefix")
-    etag = options.get("gcp_etag") if options.get("gcp_etag") else str(uuid4())
-    if not report_prefix:
-        invoice_month = start_date.strftime("%Y%m")
-        scan_start = start_date.date()
-        scan_end = end_date.date()
-        file_name = f"{invoice_month}_{etag}_{scan_start}:{scan_end}.json"
-    else:
-        file_name = report_prefix + ".json"
-    local_file_path = "{}/{}".format(os.getcwd(), file_name)
-    output_file_name = f"{etag}/{file_name}"
+    local_file_path, output_file_name = _gcp_file_name(start_date, end_date, options, ".json", _gcp_etag(options))
     _write_jsonl(local_file_path, data)
     return local_file_path, output_file_name
 
@@ -1067,6 +1339,8 @@ def gcp_create_report(options):  # noqa: C901
 
     static_report_data = options.get("static_report_data")
     resource_level = options.get("gcp_resource_level", False)
+    resource_count = options.get("gcp_resource_count")
+    write_monthly = options.get("write_monthly", False)
 
     if gcp_dataset_name:
         # if the file is supposed to be uploaded to a bigquery table, it needs the JSONL version of everything
@@ -1156,48 +1430,71 @@ def gcp_create_report(options):  # noqa: C901
         )
     else:
         months = _create_month_list(start_date, end_date)
+        columns = _gcp_columns(options)
+        row_limit = options.get("row_limit")
         monthly_files = []
-        output_files = []
-        for month in months:
-            data = []
-            gen_start_date = month.get("start")
-            gen_end_date = month.get("end")
-            for project in projects:
-                num_gens = len(generators)
-                ten_percent = int(num_gens * 0.1) if num_gens > 50 else 5
-                LOG.info(
-                    f"Producing data for {num_gens} generators for start: {gen_start_date} and end: {gen_end_date}."
-                )
-                for count, generator in enumerate(generators):
-                    attributes = generator.get("attributes", {})
-                    if attributes:
-                        start_date = attributes.get("start_date", start_date)
-                        end_date = attributes.get("end_date", end_date)
-                        currency = default_currency(options.get("currency"), attributes.get("currency"))
-                    else:
-                        currency = default_currency(options.get("currency"), None)
-                    if gen_end_date > end_date:
-                        gen_end_date = end_date
-                    attributes["resource_level"] = resource_level
-
-                    generator_cls = generator.get("generator")
-                    gen = generator_cls(gen_start_date, gen_end_date, currency, project, attributes=attributes)
-                    for hour in gen.generate_data():
-                        data += [hour]
-                    count += 1
-                    if count % ten_percent == 0:
-                        LOG.info(f"Done with {count} of {num_gens} generators.")
-
-            local_file_path, output_file_name = write_gcp_file(gen_start_date, gen_end_date, data, options)
-            output_files.append(output_file_name)
-            if local_file_path not in monthly_files:
-                monthly_files.append(local_file_path)
-
-        for index, month_file in enumerate(monthly_files):
-            if gcp_bucket_name:
-                gcp_route_file(gcp_bucket_name, month_file, output_files[index])
+        generator_instances = {}
+        # each month uploads in the background while the next one is generated
+        with UploadPool() as uploads:
+            for month in months:
+                gen_start_date = month.get("start")
+                gen_end_date = month.get("end")
+                etag = _gcp_etag(options)
+                local_file_path, _ = _gcp_file_name(gen_start_date, min(gen_end_date, end_date), options, ".csv", etag)
+                sink = RotatingSink(_csv_sink_factory(local_file_path, columns), row_limit)
+                with sink:
+                    for project_index, project in enumerate(projects):
+                        num_gens = len(generators)
+                        ten_percent = int(num_gens * 0.1) if num_gens > 50 else 5
+                        LOG.info(
+                            f"Producing data for {num_gens} generators for start: {gen_start_date} "
+                            f"and end: {gen_end_date}."
+                        )
+                        for count, generator in enumerate(generators):
+                            attributes = generator.get("attributes", {})
+                            if attributes:
+                                start_date = attributes.get("start_date", start_date)
+                                end_date = attributes.get("end_date", end_date)
+                                currency = default_currency(options.get("currency"), attributes.get("currency"))
+                            else:
+                                currency = default_currency(options.get("currency"), None)
+                            if gen_end_date > end_date:
+                                gen_end_date = end_date
+                            attributes["resource_level"] = resource_level
+                            if resource_count:
+                                attributes.setdefault("resource_count", resource_count)
+
+                            generator_cls = generator.get("generator")
+                            gen = _month_generator(
+                                generator_instances,
+                                (project_index, count),
+                                generator_cls,
+                                gen_start_date,
+                                gen_end_date,
+                                currency,
+                                project,
+                                attributes=attributes,
+                            )
+                            sink.write_rows(gen.generate_data())
+                            count += 1
+                            if count % ten_percent == 0:
+                                LOG.info(f"Done with {count} of {num_gens} generators.")
+
+                # the generators may end before the month, so the files are named after their end once written
+                local_file_path, _ = _gcp_file_name(gen_start_date, gen_end_date, options, ".csv", etag)
+                sink.rename(_csv_sink_factory(local_file_path, columns))
+                for month_file in sink.files:
+                    if month_file not in monthly_files:
+                        monthly_files.append(month_file)
+                    if gcp_bucket_name:
+                        uploads.submit(
+                            gcp_route_file,
+                            gcp_bucket_name,
+                            month_file,
+                            f"{etag}/{os.path.basename(month_file)}",
+                            link=not write_monthly,
+                        )
 
-    write_monthly = options.get("write_monthly", False)
     if not write_monthly:
         _remove_files(monthly_files)
 
@@ -1206,40 +1503,56 @@ def _gcp_bigquery_process(
     start_date, end_date, currency, projects, generators, options, gcp_bucket_name, gcp_dataset_name, gcp_table_name
 ):
     resource_level = options.get("gcp_resource_level", False)
-    data = []
-    for project in projects:
-        num_gens = len(generators)
-        ten_percent = int(num_gens * 0.1) if num_gens > 50 else 5
-        LOG.info(f"Producing data for {num_gens} generators for start: {start_date} and end: {end_date}.")
-        for count, generator in enumerate(generators):
-            attributes = generator.get("attributes", {})
-            if attributes:
-                start_date = attributes.get("start_date", start_date)
-                end_date = attributes.get("end_date", end_date)
-            attributes["resource_level"] = resource_level
-
-            generator_cls = generator.get("generator")
-            gen = generator_cls(start_date, end_date, currency, project, attributes=attributes)
-            for hour in gen.generate_data():
-                data += [hour]
-            count += 1
-            if count % ten_percent == 0:
-                LOG.info(f"Done with {count} of {num_gens} generators.")
-
-    monthly_files = []
-    local_file_path, output_file_name = write_gcp_file_jsonl(start_date, end_date, data, options)
-    monthly_files.append(local_file_path)
+    resource_count = options.get("gcp_resource_count")
+    compress = options.get("gcp_gzip", False)
+    etag = _gcp_etag(options)
+    extension = ".json.gz" if compress else ".json"
+    local_file_path, _ = _gcp_file_name(start_date, end_date, options, extension, etag)
+    sink = RotatingSink(_jsonl_sink_factory(local_file_path, compress), options.get("row_limit"))
+    with sink:
+        for project in projects:
+            num_gens = len(generators)
+            ten_percent = int(num_gens * 0.1) if num_gens > 50 else 5
+            LOG.info(f"Producing data for {num_gens} generators for start: {start_date} and end: {end_date}.")
+            for count, generator in enumerate(generators):
+                attributes = generator.get("attributes", {})
+                if attributes:
+                    start_date = attributes.get("start_date", start_date)
+                    end_date = attributes.get("end_date", end_date)
+                attributes["resource_level"] = resource_level
+                if resource_count:
+                    attributes.setdefault("resource_count", resource_count)
+
+                generator_cls = generator.get("generator")
+                gen = generator_cls(start_date, end_date, currency, project, attributes=attributes)
+                sink.write_rows(gen.generate_data())
+                count += 1
+                if count % ten_percent == 0:
+                    LOG.info(f"Done with {count} of {num_gens} generators.")
+
+    # the generators may set their own dates, so the files are named after them once written
+    local_file_path, _ = _gcp_file_name(start_date, end_date, options, extension, etag)
+    sink.rename(_jsonl_sink_factory(local_file_path, compress))
+    monthly_files = sink.files
+    output_file_names = [f"{etag}/{os.path.basename(month_file)}" for month_file in monthly_files]
 
     if gcp_bucket_name:
-        gcp_route_file(gcp_bucket_name, local_file_path, output_file_name)
+        with UploadPool() as uploads:
+            for month_file, output_file_name in zip(monthly_files, output_file_names):
+                uploads.submit(
+                    gcp_route_file,
+                    gcp_bucket_name,
+                    month_file,
+                    output_file_name,
+                    link=not options.get("write_monthly"),
+                )
 
     if not gcp_table_name:
-        etag = options.get("gcp_etag") if options.get("gcp_etag") else str(uuid4())
         if resource_level:
             gcp_table_name = f"gcp_billing_export_resource_{etag}"
         else:
             gcp_table_name = f"gcp_billing_export_{etag}"
-    gcp_bucket_to_dataset(gcp_bucket_name, output_file_name, gcp_dataset_name, gcp_table_name, resource_level)
+    gcp_bucket_to_dataset(gcp_bucket_name, output_file_names, gcp_dataset_name, gcp_table_name, resource_level)
 
     return monthly_files
 
@@ -1281,12 +1594,17 @@ def oci_write_file(report_type, absolute_report_name, data, options):
     """Write OCI data to a file."""
 
     _write_csv(absolute_report_name, data, OCI_REPORT_TYPE_TO_COLS[report_type])
+    return _oci_copy_to_local_bucket(absolute_report_name, options)
+
+
+def _oci_copy_to_local_bucket(absolute_report_name, options):
+    """Copy a written OCI report file to the local bucket, if there is one."""
     local_bucket = options.get("oci_local_bucket")
     report_path, report_name = os.path.split(absolute_report_name)
     if local_bucket:
         if not os.path.isdir(local_bucket):
             os.mkdir(local_bucket)
-        copy_to_local_dir(local_bucket, absolute_report_name, report_name)
+        copy_to_local_dir(local_bucket, absolute_report_name, report_name, link=not options.get("write_monthly"))
     return report_name
 
 
@@ -1294,62 +1612,89 @@ def oci_bucket_upload(bucket_name, report_type, absolute_report_name, data, opti
     """Upload data to OCI bucket."""
 
     _write_csv(absolute_report_name, data, OCI_REPORT_TYPE_TO_COLS[report_type])
+    return _oci_upload_report(bucket_name, report_type, absolute_report_name)
+
+
+def _oci_upload_report(bucket_name, report_type, absolute_report_name):
+    """Upload a written OCI report file to the OCI bucket."""
     _report_type = f"{report_type}-csv"
     report_path, report_name = os.path.split(absolute_report_name)
     upload_to_oci_bucket(bucket_name, _report_type, report_name)
     return report_name
 
 
+def _oci_sink_factory(report_type, file_num, month, year):
+    """Return a sink factory for an OCI report, split files taking the following file numbers."""
+
+    def factory(file_number):
+        filename_options = {
+            "file_num": file_num + max(file_number - 1, 0),
+            "month": month,
+            "year": year,
+            "report_type": report_type,
+        }
+        return CSVSink(oci_generate_report_name(filename_options), OCI_REPORT_TYPE_TO_COLS[report_type])
+
+    return factory
+
+
 def oci_create_report(options):
     """Create cost and usage report files."""
 
     generate_daily_report = options.get("oci_daily_report", False)
     start_date = options.get("start_date")
     end_date = start_date.replace(hour=23) if generate_daily_report else options.get("end_date")
-    static_report_data = options.get("static_report_data")
 
-    if static_report_data:
-        generators = _get_generators(static_report_data.get("generators"))
-    else:
-        generators = [
-            {"generator": OCIComputeGenerator},
-            {"generator": OCIBlockStorageGenerator},
-            {"generator": OCINetworkGenerator},
-            {"generator": OCIDatabaseGenerator},
-        ]
-    months = _create_month_list(start_date, end_date)
+    generators = [
+        {"generator": OCIComputeGenerator},
+        {"generator": OCIBlockStorageGenerator},
+        {"generator": OCINetworkGenerator},
+        {"generator": OCIDatabaseGenerator},
+    ]
+    plan = _get_generation_plan(options, _create_month_list(start_date, end_date), generators)
     currency = default_currency(options.get("currency"), static_currency=None)
+    bucket_name = options.get("oci_bucket_name")
+    row_limit = options.get("row_limit")
     monthly_files = []
-    data = {OCI_COST_REPORT: [], OCI_USAGE_REPORT: []}
-
-    for month in months:
-        LOG.info(f"Generating {month.get('name')} data for OCI")
-        gen_start_date = month.get("start")
-        gen_end_date = month.get("end")
-
-        for generator in generators:
-            generator_cls = generator.get("generator")
-            attributes = generator.get("attributes", {})
-
-            if attributes:
-                # Skip if generator usage is outside of current month
-                if attributes.get("end_date") < month.get("start"):
-                    continue
-                if attributes.get("start_date") > month.get("end"):
-                    continue
-                currency = attributes.get("currency")
-                gen_start_date, gen_end_date = _create_generator_dates_from_yaml(attributes, month)
-
-            gen = generator_cls(gen_start_date, gen_end_date, currency, attributes)
-            for report_type in OCI_REPORT_TYPE_TO_COLS:
-                data[report_type] += gen.generate_data()[report_type]
-
-        for report_type in OCI_REPORT_TYPE_TO_COLS:
-            month_output_file = oci_route_file(
-                report_type, gen_start_date.month, gen_start_date.year, data[report_type], options
-            )
-            monthly_files.append(month_output_file)
-            data[report_type] = []
+    generator_instances = {}
+
+    # cost and usage files of every month upload in the background while the next month is generated
+    with UploadPool() as uploads:
+        for month_index, month in enumerate(plan.months):
+            LOG.info(f"Generating {month.get('name')} data for OCI")
+            month_start = month.get("start")
+            sinks = {
+                report_type: RotatingSink(
+                    _oci_sink_factory(
+                        report_type, options.get("file_num", randint(1000, 9999)), month_start.month, month_start.year
+                    ),
+                    row_limit,
+                )
+                for report_type in OCI_REPORT_TYPE_TO_COLS
+            }
+            with ExitStack() as stack:
+                for sink in sinks.values():
+                    stack.enter_context(sink)
+
+                for index, generator, gen_start_date, gen_end_date in plan.month_generators(month_index):
+                    generator_cls = generator.get("generator")
+                    attributes = generator.get("attributes", {})
+                    if attributes:
+                        currency = attributes.get("currency")
+
+                    gen = _month_generator(
+                        generator_instances, index, generator_cls, gen_start_date, gen_end_date, currency, attributes
+                    )
+                    for report_type, row in gen.generate_rows():
+                        sinks[report_type].write(row)
+
+            for report_type, sink in sinks.items():
+                for absolute_report_name in sink.files:
+                    if bucket_name is None:
+                        monthly_files.append(_oci_copy_to_local_bucket(absolute_report_name, options))
+                    else:
+                        uploads.submit(_oci_upload_report, bucket_name, report_type, absolute_report_name)
+                        monthly_files.append(os.path.basename(absolute_report_name))
 
     write_monthly = options.get("write_monthly", False)
     if not write_monthly:
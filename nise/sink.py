@@ -0,0 +1,335 @@
+#
+# Copyright 2024 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Sinks that stream generated rows into report files."""
+import csv
+import gzip
+import json
+import os
+
+from nise.util import LOG
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+if orjson:
+
+    def _jsonl_line(row):
+        """Encode a row as one line of JSON Lines."""
+        return orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+
+else:  # pragma: no cover
+
+    def _jsonl_line(row):
+        """Encode a row as one line of JSON Lines."""
+        return (json.dumps(row) + "\n").encode()
+
+
+class _MirroredFile:
+    """Text file that copies everything written to it into a binary stream."""
+
+    def __init__(self, file, mirror):
+        """Initialize the file with the open text file and the open binary stream."""
+        self._file = file
+        self._mirror = mirror
+
+    def write(self, text):
+        """Write text to the file and its mirror."""
+        self._mirror.write(text.encode())
+        return self._file.write(text)
+
+    def writelines(self, lines):
+        """Write every line to the file and its mirror."""
+        for line in lines:
+            self.write(line)
+
+    def close(self, failed=False):
+        """Close the file and its mirror, telling the mirror whether writing failed."""
+        self._file.close()
+        self._mirror.close(failed=failed)
+
+
+class CSVSink:
+    """Stream dict rows into a csv file.
+
+    Columns missing from a row are written empty. Overrides replace the value of
+    a column in every row as it is written, without touching the row itself.
+    Columnar batches are written without building a dict per row. A mirror, a
+    binary stream with open, write and close(failed), receives a copy of the
+    file as it is written, and is told on close whether writing failed.
+    """
+
+    def __init__(self, output_file, header, overrides=None, mirror=None):
+        """Initialize the sink.
+
+        Args:
+            output_file (str): path of the csv file to write
+            header (List): ordered column names
+            overrides (Dict): column values written in place of the row values
+            mirror (Object): binary stream receiving a copy of the file
+        """
+        self.output_file = output_file
+        self.mirror = mirror
+        self.header = list(header)
+        positions = {column: index for index, column in enumerate(self.header)}
+        self._override_values = {column: value for column, value in (overrides or {}).items() if column in positions}
+        self._overrides = [(positions[column], value) for column, value in self._override_values.items()]
+        self.row_count = 0
+        self._file = None
+        self._writer = None
+
+    def open(self):
+        """Open the file and write the header."""
+        LOG.info(f"Writing to {os.path.basename(self.output_file)}")
+        self._file = open(self.output_file, "w", encoding="utf-8")
+        if self.mirror:
+            self._file = _MirroredFile(self._file, self.mirror.open())
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.header)
+        return self
+
+    def write(self, row):
+        """Write a single row."""
+        values = [row.get(column, "") for column in self.header]
+        for index, value in self._overrides:
+            values[index] = value
+        self._writer.writerow(values)
+        self.row_count += 1
+
+    def write_rows(self, rows):
+        """Write every row of an iterable."""
+        for row in rows:
+            self.write(row)
+
+    def write_batch(self, batch):
+        """Write a columnar batch.
+
+        The batch provides csv_lines(header, overrides), an iterator of csv lines
+        ordered like the header, with its shared columns rendered only once.
+        """
+        self._file.writelines(batch.csv_lines(self.header, self._override_values))
+        self.row_count += len(batch)
+
+    def close(self, failed=False):
+        """Flush and close the file."""
+        if self._file:
+            if self.mirror:
+                self._file.close(failed=failed)
+            else:
+                self._file.close()
+            self._file = None
+            self._writer = None
+
+    def __enter__(self):
+        """Open the sink."""
+        return self.open()
+
+    def __exit__(self, exc_type, *exc):
+        """Close the sink, as failed if an exception was raised."""
+        self.close(failed=exc_type is not None)
+
+
+class JSONLSink:
+    """Stream dict rows into a JSON Lines file, one json document per line.
+
+    Rows are encoded with orjson when it is installed and written in batches of
+    buffer_rows lines. Compressed sinks gzip the file as it is written.
+    """
+
+    def __init__(self, output_file, compress=False, buffer_rows=1000):
+        """Initialize the sink.
+
+        Args:
+            output_file (str): path of the JSON Lines file to write
+            compress (bool): gzip the file while writing it
+            buffer_rows (int): number of encoded rows held before writing them out
+        """
+        self.output_file = output_file
+        self.compress = compress
+        self.buffer_rows = buffer_rows
+        self.row_count = 0
+        self._file = None
+        self._buffer = []
+
+    def open(self):
+        """Open the file."""
+        LOG.info(f"Writing to {os.path.basename(self.output_file)}")
+        if self.compress:
+            self._file = gzip.open(self.output_file, "wb", compresslevel=6)
+        else:
+            self._file = open(self.output_file, "wb")
+        return self
+
+    def _flush(self):
+        """Write out the buffered lines."""
+        self._file.write(b"".join(self._buffer))
+        self._buffer = []
+
+    def write(self, row):
+        """Write a single row."""
+        self._buffer.append(_jsonl_line(row))
+        if len(self._buffer) >= self.buffer_rows:
+            self._flush()
+        self.row_count += 1
+
+    def write_rows(self, rows):
+        """Write every row of an iterable."""
+        for row in rows:
+            self.write(row)
+
+    def close(self, failed=False):
+        """Flush and close the file."""
+        if self._file:
+            self._flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        """Open the sink."""
+        return self.open()
+
+    def __exit__(self, exc_type, *exc):
+        """Close the sink, as failed if an exception was raised."""
+        self.close(failed=exc_type is not None)
+
+
+class RotatingSink:
+    """Spread rows over several files holding at most row_limit rows each.
+
+    The sink factory returns an unopened sink for a file number. Without a row
+    limit everything goes to file number 0. With one, files are numbered from 1
+    as they are opened, and when all rows fit into the first file it is renamed
+    to the name of file number 0, so small reports keep their unsplit name.
+    """
+
+    def __init__(self, sink_factory, row_limit=None):
+        """Initialize the sink.
+
+        Args:
+            sink_factory (Callable): returns the sink writing a given file number
+            row_limit (int): maximum number of rows per file, unlimited if not set
+        """
+        self.sink_factory = sink_factory
+        self.row_limit = row_limit
+        self.files = []
+        self.row_count = 0
+        self._sink = None
+        self._file_rows = 0
+
+    def _open_next(self):
+        """Close the current file and open the next one."""
+        if self._sink:
+            self._sink.close()
+        file_number = len(self.files) + 1 if self.row_limit else 0
+        self._sink = self.sink_factory(file_number).open()
+        self.files.append(self._sink.output_file)
+        self._file_rows = 0
+
+    def open(self):
+        """Open the first file."""
+        self._open_next()
+        return self
+
+    def write(self, row):
+        """Write a single row, moving on to a new file when the current one is full."""
+        if self.row_limit and self._file_rows >= self.row_limit:
+            self._open_next()
+        self._sink.write(row)
+        self._file_rows += 1
+        self.row_count += 1
+
+    def write_rows(self, rows):
+        """Write every row of an iterable."""
+        for row in rows:
+            self.write(row)
+
+    def close(self, failed=False):
+        """Close the current file and restore the unsplit name of a single file."""
+        if not self._sink:
+            return
+        self._sink.close(failed=failed)
+        self._sink = None
+        if self.row_limit and len(self.files) == 1:
+            output_file = self.sink_factory(0).output_file
+            if output_file != self.files[0]:
+                os.replace(self.files[0], output_file)
+                self.files[0] = output_file
+
+    def rename(self, sink_factory):
+        """Move the closed files to the names another sink factory gives their file numbers.
+
+        This names files after something only known once all rows are written.
+        """
+        numbers = [0] if len(self.files) == 1 else range(1, len(self.files) + 1)
+        self.sink_factory = sink_factory
+        for index, file_number in enumerate(numbers):
+            output_file = sink_factory(file_number).output_file
+            if output_file != self.files[index]:
+                os.replace(self.files[index], output_file)
+                self.files[index] = output_file
+
+    def __enter__(self):
+        """Open the sink."""
+        return self.open()
+
+    def __exit__(self, exc_type, *exc):
+        """Close the sink, as failed if an exception was raised."""
+        self.close(failed=exc_type is not None)
+
+
+class MultiSink:
+    """Write every row to several sinks in a single pass."""
+
+    def __init__(self, *sinks):
+        """Initialize the sink with the sinks to fan rows out to."""
+        self.sinks = sinks
+
+    def open(self):
+        """Open all sinks."""
+        for sink in self.sinks:
+            sink.open()
+        return self
+
+    def write(self, row):
+        """Write a single row to every sink."""
+        for sink in self.sinks:
+            sink.write(row)
+
+    def write_rows(self, rows):
+        """Write every row of an iterable to every sink."""
+        for row in rows:
+            self.write(row)
+
+    def write_batch(self, batch):
+        """Write a columnar batch to every sink."""
+        for sink in self.sinks:
+            sink.write_batch(batch)
+
+    def close(self, failed=False):
+        """Close all sinks."""
+        for sink in self.sinks:
+            sink.close(failed=failed)
+
+    def __enter__(self):
+        """Open the sink."""
+        return self.open()
+
+    def __exit__(self, exc_type, *exc):
+        """Close the sink, as failed if an exception was raised."""
+        self.close(failed=exc_type is not None)
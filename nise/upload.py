@@ -16,16 +16,21 @@
 #
 """Defines the upload mechanism to various clouds."""
 import gzip
-import io
 import os
 import shutil
 import sys
+import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
+import requests
 from azure.core.exceptions import ServiceRequestError
 from azure.core.exceptions import ServiceResponseError
+from azure.storage.blob import BlobBlock
 from azure.storage.blob import BlobServiceClient
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from google.cloud import bigquery
 from google.cloud import storage
@@ -38,8 +43,227 @@ from oci.exceptions import InvalidConfig
 from oci.exceptions import InvalidPrivateKey
 from oci.exceptions import ServiceError
 from oci.object_storage import ObjectStorageClient
+from oci.object_storage import UploadManager
 from requests.exceptions import ConnectionError as BotoConnectionError
 
+MB = 1024 * 1024
+S3_MIN_PART_SIZE = 5 * MB
+GCS_MAX_COMPOSE_SOURCES = 32
+GCS_CHUNK_MULTIPLE = 256 * 1024
+OCI_MIN_PART_SIZE = 10 * MB
+TOKEN_REFRESH_MARGIN = 60
+UPLOAD_SETTINGS = {"chunk_size": 8 * MB, "max_concurrency": 8}
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def configure_uploads(chunk_size=None, max_concurrency=None):
+    """Set the multipart chunk size and the concurrency used by cloud uploads.
+
+    Args:
+        chunk_size (int): size in bytes of each uploaded part
+        max_concurrency (int): number of files, or parts of a file, uploaded at once
+    """
+    if chunk_size:
+        UPLOAD_SETTINGS["chunk_size"] = chunk_size
+    if max_concurrency:
+        UPLOAD_SETTINGS["max_concurrency"] = max_concurrency
+
+
+def _shared_client(key, factory):
+    """Return the client cached under key, creating it with factory on first use."""
+    with _CLIENTS_LOCK:
+        if key not in _CLIENTS:
+            _CLIENTS[key] = factory()
+        return _CLIENTS[key]
+
+
+def reset_clients():
+    """Drop the cached clients so that the next upload creates new ones."""
+    with _CLIENTS_LOCK:
+        _CLIENTS.clear()
+
+
+class UploadPool:
+    """Run uploads concurrently on a bounded pool of threads.
+
+    Uploads start as soon as they are submitted. At most max_pending uploads
+    are queued or running at once: submitting another one blocks until one of
+    them finishes, so a producer never runs further ahead of the uploads than
+    that. Once an upload has failed, submitting raises its exception. Leaving
+    the context waits for all of them and re-raises the first exception an
+    upload raised.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        """Initialize the pool.
+
+        Args:
+            max_workers (int): number of concurrent uploads, the configured concurrency if not set
+            max_pending (int): number of uploads queued or running at once, twice max_workers if not set
+        """
+        self.max_workers = max_workers or UPLOAD_SETTINGS["max_concurrency"]
+        self.max_pending = max_pending or 2 * self.max_workers
+        self._executor = None
+        self._futures = []
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._error = None
+
+    def _done(self, future):
+        """Free the slot of a finished upload and remember the first failure."""
+        if self._error is None and not future.cancelled():
+            self._error = future.exception()
+        self._slots.release()
+
+    def submit(self, function, *args, **kwargs):
+        """Start an upload, once fewer than max_pending uploads are queued or running."""
+        self._slots.acquire()
+        if self._error is not None:
+            self._slots.release()
+            raise self._error
+        future = self._executor.submit(function, *args, **kwargs)
+        future.add_done_callback(self._done)
+        self._futures.append(future)
+        return future
+
+    def wait(self):
+        """Wait for the submitted uploads and return their results in submission order."""
+        futures, self._futures = self._futures, []
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error:
+                raise error
+        return [future.result() for future in futures]
+
+    def __enter__(self):
+        """Start the worker threads."""
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="nise-upload")
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        """Wait for the uploads and stop the worker threads."""
+        try:
+            if exc_type is None:
+                self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def http_session():
+    """Return the HTTP session shared by every upload of the run, keeping its connections alive."""
+    return _shared_client("http", requests.Session)
+
+
+class ServiceAccountToken:
+    """OAuth client credentials token, reused until shortly before it expires."""
+
+    def __init__(self, token_url, client_id, client_secret, scope):
+        """Initialize the token.
+
+        Args:
+            token_url (str): the url of the token endpoint
+            client_id (str): the service account id
+            client_secret (str): the service account secret
+            scope (str): the scope requested for the token
+        """
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self._token = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the access token, fetching a new one when the cached one is about to expire."""
+        with self._lock:
+            if self._token and time.monotonic() < self._expires_at - TOKEN_REFRESH_MARGIN:
+                return self._token
+            headers = {"Content-Type": "application/x-www-form-urlencoded"}
+            data = f"client_id={self.client_id}&client_secret={self.client_secret}"
+            data += f"&grant_type=client_credentials&scope={self.scope}"
+            token_resp = http_session().post(self.token_url, data=data, headers=headers)
+            self._token = None
+            if token_resp.ok:
+                token_json = token_resp.json()
+                self._token = token_json.get("access_token")
+                self._expires_at = time.monotonic() + token_json.get("expires_in", 0)
+            return self._token
+
+
+def service_account_token(token_url, client_id, client_secret, scope):
+    """Return the token of a service account, shared by every upload of the run."""
+    return _shared_client(
+        ("token", token_url, client_id, scope),
+        lambda: ServiceAccountToken(token_url, client_id, client_secret, scope),
+    )
+
+
+def s3_endpoint_client(endpoint_url):
+    """Return the client of an S3 compatible endpoint, such as MinIO, shared by every upload of the run."""
+    return _shared_client(
+        ("s3", endpoint_url),
+        lambda: boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            aws_access_key_id=os.environ.get("S3_ACCESS_KEY"),
+            aws_secret_access_key=os.environ.get("S3_SECRET_KEY"),
+            region_name="us-east-1",
+        ),
+    )
+
+
+def _s3_client():
+    """Return the S3 client shared by every upload of the run.
+
+    Its connection pool holds a connection for each concurrent file upload and
+    each concurrent part upload, so that they never wait for a connection.
+    """
+    config = Config(max_pool_connections=2 * UPLOAD_SETTINGS["max_concurrency"])
+    return _shared_client("s3", lambda: boto3.client("s3", config=config))
+
+
+def _part_executor():
+    """Return the executor shared by the multipart uploads of every file.
+
+    Parts of all files share its threads, so that no more than the configured
+    concurrency of parts is uploaded, and held in memory, at once.
+    """
+    return _shared_client(
+        "parts", lambda: ThreadPoolExecutor(UPLOAD_SETTINGS["max_concurrency"], thread_name_prefix="nise-part")
+    )
+
+
+def _s3_multipart_upload(s3_client, bucket_name, key, local_path):
+    """Upload a file in parts on the shared part executor.
+
+    A failed upload is aborted, so that no incomplete multipart upload is left
+    behind in the bucket.
+    """
+    chunk_size = max(UPLOAD_SETTINGS["chunk_size"], S3_MIN_PART_SIZE)
+    part_count = max(1, -(-os.path.getsize(local_path) // chunk_size))
+    upload_id = s3_client.create_multipart_upload(Bucket=bucket_name, Key=key)["UploadId"]
+
+    def upload_part(part_number):
+        with open(local_path, "rb") as local_file:
+            local_file.seek((part_number - 1) * chunk_size)
+            body = local_file.read(chunk_size)
+        etag = s3_client.upload_part(
+            Bucket=bucket_name, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body
+        )["ETag"]
+        return {"PartNumber": part_number, "ETag": etag}
+
+    try:
+        parts = list(_part_executor().map(upload_part, range(1, part_count + 1)))
+        s3_client.complete_multipart_upload(
+            Bucket=bucket_name, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+        )
+    except BaseException:
+        s3_client.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id)
+        raise
+
 
 def upload_to_s3(bucket_name, bucket_file_path, local_path):
     """Upload data to an S3 bucket.
@@ -54,8 +278,11 @@ def upload_to_s3(bucket_name, bucket_file_path, local_path):
     """
     uploaded = True
     try:
-        s3_client = boto3.resource("s3")
-        s3_client.Bucket(bucket_name).upload_file(local_path, bucket_file_path)
+        s3_client = _s3_client()
+        if os.path.getsize(local_path) > max(UPLOAD_SETTINGS["chunk_size"], S3_MIN_PART_SIZE):
+            _s3_multipart_upload(s3_client, bucket_name, bucket_file_path, local_path)
+        else:
+            s3_client.upload_file(local_path, bucket_name, bucket_file_path)
         msg = f"Uploaded {bucket_file_path} to s3 bucket {bucket_name}."
         LOG.info(msg)
     except (ClientError, BotoConnectionError, boto3.exceptions.S3UploadFailedError) as upload_err:
@@ -64,6 +291,100 @@ def upload_to_s3(bucket_name, bucket_file_path, local_path):
     return uploaded
 
 
+def _azure_blob_service():
+    """Return the blob service client shared by every upload of the run."""
+    return _shared_client(
+        "azure",
+        lambda: BlobServiceClient.from_connection_string(
+            os.getenv("AZURE_STORAGE_CONNECTION_STRING"), max_block_size=UPLOAD_SETTINGS["chunk_size"]
+        ),
+    )
+
+
+class AzureBlobWriter:
+    """Binary writer streaming into an Azure blob while it is being written.
+
+    Written bytes are cut into blocks of the configured chunk size, which are
+    staged concurrently while writing goes on, with at most the configured
+    concurrency of blocks held in memory. Closing the writer stages the last
+    block and commits the block list, unless writing failed: the blocks of a
+    failed writer are never committed, so no truncated blob is left behind.
+    """
+
+    def __init__(self, container_name, blob_path):
+        """Initialize the writer.
+
+        Args:
+            container_name (str): the container to upload the blob to
+            blob_path (str): the path of the blob within the container
+        """
+        self.container_name = container_name
+        self.blob_path = blob_path
+        self.block_size = UPLOAD_SETTINGS["chunk_size"]
+        self.uploaded = False
+        self._blob_client = None
+        self._executor = None
+        self._slots = None
+        self._futures = []
+        self._block_ids = []
+        self._buffer = bytearray()
+
+    def open(self):
+        """Start uploading to the blob."""
+        max_concurrency = UPLOAD_SETTINGS["max_concurrency"]
+        self._blob_client = _azure_blob_service().get_blob_client(container=self.container_name, blob=self.blob_path)
+        self._executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="nise-azure-block")
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        return self
+
+    def _stage(self, block):
+        """Stage a block in the background, waiting while too many are in flight."""
+        block_id = f"{len(self._block_ids):08d}"
+        self._block_ids.append(block_id)
+        self._slots.acquire()
+        future = self._executor.submit(self._blob_client.stage_block, block_id, block)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def write(self, data):
+        """Write bytes, staging every block that fills up."""
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._stage(bytes(self._buffer[: self.block_size]))
+            del self._buffer[: self.block_size]
+        return len(data)
+
+    def close(self, failed=False):
+        """Stage the remaining bytes and commit the blob.
+
+        Args:
+            failed (Boolean): writing failed, so the blob is left uncommitted
+        Returns:
+            (Boolean): True if the blob was committed
+        """
+        if self._executor is None:
+            return self.uploaded
+        try:
+            if failed:
+                LOG.error(f"writing {self.blob_path} failed, not committing it to {self.container_name}")
+                return self.uploaded
+            if self._buffer:
+                self._stage(bytes(self._buffer))
+                self._buffer = bytearray()
+            for future in self._futures:
+                future.result()
+            self._blob_client.commit_block_list([BlobBlock(block_id=block_id) for block_id in self._block_ids])
+            LOG.info(f"uploaded {self.container_name} to {self.blob_path}")
+            self.uploaded = True
+        except (ServiceRequestError, ServiceResponseError, IOError) as error:
+            LOG.error(error)
+            traceback.print_exc(file=sys.stderr)
+        finally:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        return self.uploaded
+
+
 def upload_to_azure_container(storage_file_name, local_path, storage_file_path):
     """Upload data to a storage account.
 
@@ -77,12 +398,9 @@ def upload_to_azure_container(storage_file_name, local_path, storage_file_path):
 
     """
     try:
-        # Retrieve the connection string for use with the application.
-        connect_str = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-        blob_service_client = BlobServiceClient.from_connection_string(connect_str)
-        blob_client = blob_service_client.get_blob_client(container=storage_file_name, blob=storage_file_path)
+        blob_client = _azure_blob_service().get_blob_client(container=storage_file_name, blob=storage_file_path)
         with open(local_path, "rb") as data:
-            blob_client.upload_blob(data=data)
+            blob_client.upload_blob(data=data, max_concurrency=UPLOAD_SETTINGS["max_concurrency"])
         LOG.info(f"uploaded {storage_file_name} to {storage_file_path}")
     except (ServiceRequestError, ServiceResponseError, IOError) as error:
         LOG.error(error)
@@ -91,6 +409,42 @@ def upload_to_azure_container(storage_file_name, local_path, storage_file_path):
     return True
 
 
+def _gcp_bucket(bucket_name):
+    """Return the handle of a GCP Storage bucket, shared by every upload of the run."""
+    storage_client = _shared_client("gcp", storage.Client)
+    return _shared_client(f"gcp:{bucket_name}", lambda: storage_client.get_bucket(bucket_name))
+
+
+def _gcp_composite_upload(bucket, destination_blob_name, source_file_name):
+    """Upload a file as parts uploaded in parallel and composed into the destination blob.
+
+    The parts are temporary blobs next to the destination, deleted once composed.
+    A single compose request takes at most 32 sources, so large files get larger
+    parts than the configured chunk size. Parts are streamed from the file in
+    chunks of the configured size on the shared part executor, so their size
+    does not change how much is held in memory.
+    """
+    file_size = os.path.getsize(source_file_name)
+    part_size = max(UPLOAD_SETTINGS["chunk_size"], -(-file_size // GCS_MAX_COMPOSE_SOURCES))
+    part_count = max(1, -(-file_size // part_size))
+    stream_chunk_size = max(
+        GCS_CHUNK_MULTIPLE, UPLOAD_SETTINGS["chunk_size"] // GCS_CHUNK_MULTIPLE * GCS_CHUNK_MULTIPLE
+    )
+    parts = [bucket.blob(f"{destination_blob_name}.part-{index:02d}") for index in range(part_count)]
+
+    def upload_part(index):
+        parts[index].chunk_size = stream_chunk_size
+        with open(source_file_name, "rb") as source_file:
+            source_file.seek(index * part_size)
+            parts[index].upload_from_file(source_file, size=min(part_size, file_size - index * part_size))
+
+    try:
+        list(_part_executor().map(upload_part, range(part_count)))
+        bucket.blob(destination_blob_name).compose(parts)
+    finally:
+        bucket.delete_blobs(parts, on_error=lambda blob: None)
+
+
 def upload_to_gcp_storage(bucket_name, source_file_name, destination_blob_name):
     """
     Upload data to a GCP Storage Bucket.
@@ -114,12 +468,11 @@ def upload_to_gcp_storage(bucket_name, source_file_name, destination_blob_name):
         )
         return False
     try:
-        storage_client = storage.Client()
-
-        bucket = storage_client.get_bucket(bucket_name)
-        blob = bucket.blob(destination_blob_name)
-
-        blob.upload_from_filename(source_file_name)
+        bucket = _gcp_bucket(bucket_name)
+        if os.path.getsize(source_file_name) > UPLOAD_SETTINGS["chunk_size"]:
+            _gcp_composite_upload(bucket, destination_blob_name, source_file_name)
+        else:
+            bucket.blob(destination_blob_name).upload_from_filename(source_file_name)
 
         LOG.info(f"File {source_file_name} uploaded to GCP Storage {destination_blob_name}.")
     except GoogleCloudError as upload_err:
@@ -134,7 +487,7 @@ def gcp_bucket_to_dataset(gcp_bucket_name, file_name, dataset_name, table_name,
 
     Args:
         gcp_bucket_name  (String): The container to upload file to
-        file_name  (String): The name of the file stored in GCP
+        file_name  (String or List): The name of the file stored in GCP, or of each part of a split report
         dataset_name (String): name for the created dataset in GCP
         table_name (String): name for the created dataset in GCP
 
@@ -304,7 +657,9 @@ def gcp_bucket_to_dataset(gcp_bucket_name, file_name, dataset_name, table_name,
             schema=schema,
         )
 
-        uri = f"gs://{gcp_bucket_name}/{file_name}"
+        file_names = [file_name] if isinstance(file_name, str) else list(file_name)
+        uris = [f"gs://{gcp_bucket_name}/{name}" for name in file_names]
+        uri = uris[0] if len(uris) == 1 else uris
 
         load_job = bigquery_client.load_table_from_uri(uri, table_id, job_config=job_config)
 
@@ -314,8 +669,8 @@ def gcp_bucket_to_dataset(gcp_bucket_name, file_name, dataset_name, table_name,
         # after the table is created, delete the file from the storage bucket
         storage_client = storage.Client()
         bucket = storage_client.bucket(gcp_bucket_name)
-        blob = bucket.blob(file_name)
-        blob.delete()
+        for name in file_names:
+            bucket.blob(name).delete()
         # Our downloader downloads by the paritiontime, however the default partitiontime is the date
         # the data is uploaded to bigquery. Therefore, everything goes into one single day. The load
         # job config does not let you upload to the _PARTITIONTIME because it is a prebuild column in
@@ -332,6 +687,47 @@ def gcp_bucket_to_dataset(gcp_bucket_name, file_name, dataset_name, table_name,
     return uploaded
 
 
+def _oci_config():
+    """Return the OCI config, read from the config file or the environment."""
+    if "OCI_CONFIG_FILE" in os.environ:
+        config = from_file(file_location=os.environ.get("OCI_CONFIG_FILE"))
+        LOG.info("Using configurations from config file.")
+    else:
+        oci_user = os.environ["OCI_USER"]
+        oci_fingerprint = os.environ["OCI_FINGERPRINT"]
+        oci_tenancy = os.environ["OCI_TENANCY"]
+        oci_credentials = os.environ["OCI_CREDENTIALS"]
+        oci_region = os.environ["OCI_REGION"]
+        oci_namespace = os.environ["OCI_NAMESPACE"]
+        for oci_var in [oci_user, oci_fingerprint, oci_tenancy, oci_credentials, oci_region, oci_namespace]:
+            if oci_var is None or oci_var == "":
+                raise InvalidConfig("Must provide a valid config variables.")
+        config = {
+            "user": oci_user,
+            "fingerprint": oci_fingerprint,
+            "tenancy": oci_tenancy,
+            "key_content": oci_credentials,
+            "region": oci_region,
+            "namespace": oci_namespace,
+        }
+        LOG.info("Creating config dict from env vars.")
+    validate_config(config)
+    return config
+
+
+def _oci_object_storage():
+    """Return the upload manager and namespace shared by every upload of the run."""
+
+    def connect():
+        object_storage_client = ObjectStorageClient(_oci_config())
+        upload_manager = UploadManager(
+            object_storage_client, parallel_process_count=UPLOAD_SETTINGS["max_concurrency"]
+        )
+        return upload_manager, object_storage_client.get_namespace().data
+
+    return _shared_client("oci", connect)
+
+
 def upload_to_oci_bucket(bucket_name, report_type, file_name):
     """
     Upload data to a OCI Storage Bucket.
@@ -346,42 +742,20 @@ def upload_to_oci_bucket(bucket_name, report_type, file_name):
     """
 
     try:
-        if "OCI_CONFIG_FILE" in os.environ:
-            config = from_file(file_location=os.environ.get("OCI_CONFIG_FILE"))
-            LOG.info("Using configurations from config file.")
-        else:
-            oci_user = os.environ["OCI_USER"]
-            oci_fingerprint = os.environ["OCI_FINGERPRINT"]
-            oci_tenancy = os.environ["OCI_TENANCY"]
-            oci_credentials = os.environ["OCI_CREDENTIALS"]
-            oci_region = os.environ["OCI_REGION"]
-            oci_namespace = os.environ["OCI_NAMESPACE"]
-            for oci_var in [oci_user, oci_fingerprint, oci_tenancy, oci_credentials, oci_region, oci_namespace]:
-                if oci_var is None or oci_var == "":
-                    raise InvalidConfig("Must provide a valid config variables.")
-            config = {
-                "user": oci_user,
-                "fingerprint": oci_fingerprint,
-                "tenancy": oci_tenancy,
-                "key_content": oci_credentials,
-                "region": oci_region,
-                "namespace": oci_namespace,
-            }
-            LOG.info("Creating config dict from env vars.")
-        validate_config(config)
-        object_storage_client = ObjectStorageClient(config)
-        namespace = object_storage_client.get_namespace().data
+        upload_manager, namespace = _oci_object_storage()
         with open(file_name, "rb") as file_in:
             with gzip.open(f"{file_name}.gz", "wb") as file_out:
                 shutil.copyfileobj(file_in, file_out)
         zipped_file = file_out
         upload_file_name = f"reports/{report_type}/{zipped_file.name}"
 
-        object_storage_client.put_object(
+        # files larger than a part are uploaded in parallel parts
+        upload_manager.upload_file(
             namespace,
             bucket_name,
             upload_file_name,
-            io.open(zipped_file.name, "rb"),
+            zipped_file.name,
+            part_size=max(UPLOAD_SETTINGS["chunk_size"], OCI_MIN_PART_SIZE),
         )
 
         LOG.info(f"File {upload_file_name} uploaded to OCI Storage {bucket_name} bucket.")
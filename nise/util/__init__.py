@@ -15,6 +15,9 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 """Utility functions."""
+import hashlib
+import os
+import pickle
 from collections import abc
 
 import yaml
@@ -23,6 +26,13 @@ from .log import LOG  # noqa: F401
 from .log import LOG_FORMAT  # noqa: F401
 from .log import LOG_VERBOSITY  # noqa: F401
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader
+
+YAML_SIDECAR_SUFFIX = ".pickle"
+
 
 def load_yaml(objekt):
     """Load a yaml document.
@@ -36,12 +46,49 @@ def load_yaml(objekt):
     yamlfile = None
     try:
         with open(objekt, "r+") as yaml_file:
-            yamlfile = yaml.safe_load(yaml_file)
+            yamlfile = yaml.load(yaml_file, Loader=SafeLoader)
     except (TypeError, OSError, IOError):
-        yamlfile = yaml.safe_load(objekt)
+        yamlfile = yaml.load(objekt, Loader=SafeLoader)
     return yamlfile
 
 
+def load_yaml_cached(filename):
+    """Load a yaml file, reusing a pre-parsed sidecar while the file is unchanged.
+
+    The parsed document is pickled next to the yaml file together with the
+    sha256 and mtime of the file it was parsed from. Later calls return the
+    pickled document as long as both still match.
+
+    Params:
+        filename (str): A filename containing a YAML document.
+    """
+    sidecar = f"{filename}{YAML_SIDECAR_SUFFIX}"
+    with open(filename, "rb") as yaml_file:
+        content = yaml_file.read()
+    key = (hashlib.sha256(content).hexdigest(), os.stat(filename).st_mtime_ns)
+
+    try:
+        with open(sidecar, "rb") as cache:
+            cached = pickle.load(cache)
+        if isinstance(cached, dict) and cached.get("key") == key:
+            LOG.info(f"Using pre-parsed yaml from {sidecar}.")
+            return cached.get("data")
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as err:
+        LOG.warning(f"Ignoring unreadable yaml sidecar {sidecar}: {err}")
+
+    data = yaml.load(content, Loader=SafeLoader)
+    temp_file = f"{sidecar}.tmp"
+    try:
+        with open(temp_file, "wb") as cache:
+            pickle.dump({"key": key, "data": data}, cache, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, sidecar)
+    except (OSError, pickle.PicklingError) as err:
+        LOG.warning(f"Unable to write yaml sidecar {sidecar}: {err}")
+    return data
+
+
 def deepupdate(original, update):
     """Recursively update a dict.
 
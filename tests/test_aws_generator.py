@@ -14,15 +14,21 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
+import csv
+import io
 from datetime import datetime
 from datetime import timedelta
 from unittest import TestCase
 
 from faker import Faker
+from nise.generators.aws import aggregate_aws_rows
+from nise.generators.aws import AWS_STAMP_COLS
+from nise.generators.aws import AWSBatch
 from nise.generators.aws import AWSGenerator
 from nise.generators.aws import DataTransferGenerator
 from nise.generators.aws import EBSGenerator
 from nise.generators.aws import EC2Generator
+from nise.generators.aws import get_aws_column_schema
 from nise.generators.aws import MarketplaceGenerator
 from nise.generators.aws import RDSGenerator
 from nise.generators.aws import Route53Generator
@@ -93,6 +99,20 @@ class AbstractGeneratorTestCase(TestCase):
         ]
         self.assertEqual(generator.hours, expected)
 
+    def test_rebase(self):
+        """Test that rebasing moves the time grid and keeps the generator's resources."""
+        two_hours_ago = (self.now - self.one_hour) - self.one_hour
+        generator = EC2Generator(two_hours_ago, self.now, self.currency, self.payer_account, self.usage_accounts)
+        resource_id = generator._resource_id
+        instance_type = generator._instance_type
+
+        next_day = self.now + timedelta(days=1)
+        self.assertIs(generator.rebase(next_day, next_day + self.one_hour), generator)
+        self.assertEqual(generator.hours, [{"start": next_day, "end": next_day + self.one_hour}])
+        self.assertEqual(generator.start_date, next_day)
+        self.assertEqual(generator._resource_id, resource_id)
+        self.assertEqual(generator._instance_type, instance_type)
+
     def test_timestamp_none(self):
         """Test that the timestamp method fails with None."""
         with self.assertRaises(ValueError):
@@ -156,6 +176,18 @@ class AbstractGeneratorTestCase(TestCase):
         location = generator._get_location()
         self.assertIn("us-west-1", location)
 
+    def test_add_tag_and_category_data(self):
+        """Test that randomly picked tags and cost categories come from the known columns."""
+        two_hours_ago = (self.now - self.one_hour) - self.one_hour
+        generator = TestGenerator(two_hours_ago, self.now, self.currency, self.payer_account, self.usage_accounts)
+        for _ in range(20):
+            row = {}
+            generator._add_tag_data(row)
+            generator._add_category_data(row)
+            for key, value in row.items():
+                self.assertIn(key, generator.RESOURCE_TAG_COLS + generator.COST_CATEGORY_COLS)
+                self.assertTrue(value)
+
     def test_get_legal_entity(self):
         """Test the _get_legal_entity method."""
         two_hours_ago = (self.now - self.one_hour) - self.one_hour
@@ -240,6 +272,158 @@ class AWSGeneratorTestCase(TestCase):
         self.assertIn(key, generator.AWS_COLUMNS)
         self.assertNotIn("key-that-has-not-been-added", generator.AWS_COLUMNS)
 
+    def test_column_schema_not_shared(self):
+        """Test that tag and cost category columns stay with the generator that declared them."""
+        category_key = "costCategory/new-category"
+        self.attributes["cost_category"] = {category_key: "value"}
+        two_hours_ago = (self.now - self.one_hour) - self.one_hour
+        generator = TestGenerator(
+            two_hours_ago,
+            self.now,
+            self.currency,
+            self.payer_account,
+            self.usage_accounts,
+            self.attributes,
+            tag_cols={"resourceTags/user:new-key"},
+        )
+        plain = TestGenerator(two_hours_ago, self.now, self.currency, self.payer_account, self.usage_accounts)
+        self.assertIn(category_key, generator.schema)
+        self.assertIn("resourceTags/user:new-key", generator.RESOURCE_TAG_COLS)
+        self.assertNotIn(category_key, plain.AWS_COLUMNS)
+        self.assertNotIn("resourceTags/user:new-key", AWSGenerator.AWS_COLUMNS)
+        self.assertIs(plain.schema, get_aws_column_schema())
+        self.assertEqual(list(plain.schema), sorted(plain.AWS_COLUMNS))
+        self.assertEqual(plain.schema.index(plain.AWS_COLUMNS[3]), 3)
+
+    def test_generate_batch(self):
+        """Test that a batch holds the same columns as the hourly rows."""
+        for generator_cls in (DataTransferGenerator, EBSGenerator, EC2Generator, RDSGenerator, S3Generator):
+            with self.subTest(generator=generator_cls.__name__):
+                generator = generator_cls(
+                    self.two_hours_ago,
+                    self.now,
+                    self.currency,
+                    self.payer_account,
+                    self.usage_accounts,
+                    self.attributes,
+                )
+                row = next(generator.generate_data())
+                batch = generator.generate_batch()
+                self.assertEqual(len(batch), len(generator.hours))
+                batch_row = next(batch.rows())
+                self.assertEqual(set(batch_row), set(row))
+                for column in ("lineItem/ProductCode", "bill/BillingPeriodStartDate", "identity/TimeInterval"):
+                    self.assertEqual(batch_row[column], row[column])
+                self.assertEqual(batch.column("lineItem/UsageStartDate"), [hour["start"] for hour in generator.hours])
+
+    def test_generate_batch_from_rows(self):
+        """Test that generators without batch columns fall back to their hourly rows."""
+        generator = Route53Generator(
+            self.two_hours_ago, self.now, self.currency, self.payer_account, self.usage_accounts, self.attributes
+        )
+        batch = generator.generate_batch()
+        self.assertEqual(len(batch), len(generator.hours))
+        self.assertEqual(batch.column("lineItem/ProductCode"), ["AmazonRoute53"] * len(batch))
+
+    def test_batch_slice_and_value_rows(self):
+        """Test slicing a batch and reading its values in header order."""
+        schema = get_aws_column_schema()
+        batch = AWSBatch(schema, 3, {"col1": "shared", "col2": [1, 2, 3]})
+        part = batch.slice(1, 5)
+        self.assertEqual(len(part), 2)
+        self.assertEqual(part.column("col1"), ["shared", "shared"])
+        self.assertEqual(part.column("col2"), [2, 3])
+        values = list(part.value_rows(["col2", "col3", "col1"], overrides={"col1": "override"}))
+        self.assertEqual(values, [(2, "", "override"), (3, "", "override")])
+        rows = list(AWSBatch.from_rows(schema, [{"col1": "a"}, {"col2": "b"}]).rows())
+        self.assertEqual((rows[0]["col1"], rows[0]["col2"], rows[1]["col2"]), ("a", "", "b"))
+
+    def test_is_time_invariant(self):
+        """Test that only generators with every value pinned are stamped."""
+        self.attributes["region"] = "us-east-1a"
+        self.instance_type.update({"physical_cores": "1", "saving": None, "amount": "1", "negation": False})
+        generator = EC2Generator(
+            self.two_hours_ago, self.now, self.currency, self.payer_account, (self.payer_account,), self.attributes
+        )
+        self.assertTrue(generator.is_time_invariant())
+        batch = generator.generate_batch()
+        per_row = batch.per_row_columns() - set(generator.COST_CATEGORY_COLS) - set(generator.RESOURCE_TAG_COLS)
+        self.assertTrue(per_row.issubset(AWS_STAMP_COLS))
+
+        generator = EC2Generator(
+            self.two_hours_ago, self.now, self.currency, self.payer_account, self.usage_accounts, self.attributes
+        )
+        self.assertFalse(generator.is_time_invariant())
+        generator = Route53Generator(
+            self.two_hours_ago, self.now, self.currency, self.payer_account, (self.payer_account,), self.attributes
+        )
+        self.assertFalse(generator.is_time_invariant())
+
+    def test_batch_csv_lines(self):
+        """Test that stamped csv lines match the csv module output."""
+        header = ["col1", "col2", "col3", "col4"]
+        batch = AWSBatch(
+            get_aws_column_schema(),
+            3,
+            {"col1": ["a", 'b"c', "d,e"], "col2": 1.5, "col3": [None, 2, "50%"], "col4": "x\ny"},
+        )
+        for overrides in (None, {"col2": "100%"}):
+            with self.subTest(overrides=overrides):
+                expected = io.StringIO()
+                csv.writer(expected).writerows(batch.value_rows(header, overrides))
+                self.assertEqual("".join(batch.csv_lines(header, overrides)), expected.getvalue())
+
+    def test_aggregate_aws_rows(self):
+        """Test that hourly rows are summed into daily and monthly rows."""
+        start = datetime(2024, 1, 30, 22)
+        end = datetime(2024, 2, 1, 2)
+        generator = EBSGenerator(start, end, self.currency, self.payer_account, self.usage_accounts, self.attributes)
+        rows = list(generator.generate_data())
+        self.assertEqual(list(aggregate_aws_rows(rows, "hourly")), rows)
+
+        daily = list(aggregate_aws_rows(rows, "daily"))
+        self.assertLessEqual(len(daily), len(rows))
+        self.assertEqual(
+            sorted({row["lineItem/UsageStartDate"] for row in daily}),
+            [start.replace(hour=0), datetime(2024, 1, 31), datetime(2024, 2, 1)],
+        )
+        january_31 = next(row for row in daily if row["lineItem/UsageStartDate"] == datetime(2024, 1, 31))
+        self.assertEqual(january_31["lineItem/UsageEndDate"], datetime(2024, 2, 1))
+        self.assertEqual(january_31["identity/TimeInterval"], "2024-01-31T00:00:00Z/2024-02-01T00:00:00Z")
+        for column in ("lineItem/UsageAmount", "lineItem/UnblendedCost"):
+            self.assertAlmostEqual(sum(float(row[column]) for row in daily), sum(float(row[column]) for row in rows))
+
+        monthly = list(aggregate_aws_rows(rows, "monthly"))
+        self.assertEqual(
+            sorted({row["lineItem/UsageStartDate"] for row in monthly}), [datetime(2024, 1, 1), datetime(2024, 2, 1)]
+        )
+        self.assertEqual(monthly[0]["lineItem/UsageStartDate"], datetime(2024, 1, 1))
+        self.assertEqual(monthly[0]["lineItem/UsageEndDate"], datetime(2024, 2, 1))
+        self.assertEqual(monthly[0]["lineItem/ProductCode"], rows[0]["lineItem/ProductCode"])
+
+    def test_aggregate_aws_rows_keeps_accounts_and_regions(self):
+        """Test that aggregated rows keep the cost of each account, region and usage type apart."""
+        rows = []
+        for hour in range(4):
+            for account, region in (("111", "us-east-1"), ("222", "us-east-1"), ("111", "eu-west-1")):
+                rows.append(
+                    {
+                        "identity/LineItemId": f"{hour}-{account}-{region}",
+                        "lineItem/UsageAccountId": account,
+                        "lineItem/UsageType": f"{region}-BoxUsage",
+                        "lineItem/UsageStartDate": datetime(2024, 1, 1, hour),
+                        "lineItem/UsageEndDate": datetime(2024, 1, 1, hour + 1),
+                        "lineItem/UnblendedCost": 1.5,
+                        "product/region": region,
+                    }
+                )
+        daily = list(aggregate_aws_rows(rows, "daily"))
+        self.assertEqual(
+            [(row["lineItem/UsageAccountId"], row["product/region"], row["lineItem/UnblendedCost"]) for row in daily],
+            [("111", "us-east-1", 6), ("222", "us-east-1", 6), ("111", "eu-west-1", 6)],
+        )
+        self.assertEqual(daily[2]["lineItem/UsageType"], "eu-west-1-BoxUsage")
+
     def test_unknown_location(self):
         """Test that an unknown location doesn't result in stack trace."""
         self.attributes["region"] = "Bad result"
@@ -186,6 +186,15 @@ class AbstractGeneratorTestCase(TestCase):
         add_info = generator._get_additional_info()
         self.assertIn("VCPU", add_info)
 
+    def test_json_text(self):
+        """Test that json text is serialized once per value and follows the value identity."""
+        two_hours_ago = (self.now - self.one_hour) - self.one_hour
+        generator = TestGenerator(two_hours_ago, self.now, self.currency, self.account_info)
+        tags = {"environment": "dev"}
+        self.assertEqual(generator._json_text(tags), json.dumps(tags))
+        self.assertIs(generator._json_text(tags), generator._json_text(tags))
+        self.assertEqual(generator._json_text({"project": "p1"}), json.dumps({"project": "p1"}))
+
 
 class AzureGeneratorTestCase(TestCase):
     """Test Base for specific generator classes."""
@@ -429,6 +438,10 @@ class TestVNGenerator(AzureGeneratorTestCase):
             start_row = {}
             row = generator._update_data(start_row, self.two_hours_ago, self.now)
             self.assertEqual(row["Tags"], json.dumps(self.tags))
+            self.assertEqual(row["ResourceName"], "mysa1")
+            self.assertEqual(row["BillingPeriodStartDate"], self.two_hours_ago.strftime("%Y-%m-01"))
+            next_row = generator._update_data({}, self.now, self.now + self.one_hour)
+            self.assertEqual(next_row["InvoiceSectionId"], row["InvoiceSectionId"])
             if generator.azure_columns == AZURE_COLUMNS_V2_SUBSCRIPTION:
                 self.assertEqual(row["SubscriptionId"], self.payer_account)
                 self.assertEqual(row["ResourceId"], self.instance_id)
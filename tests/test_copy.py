@@ -19,6 +19,7 @@ import shutil
 from tempfile import mkdtemp
 from tempfile import NamedTemporaryFile
 from unittest import TestCase
+from unittest.mock import patch
 
 from nise.copy import copy_to_local_dir
 
@@ -63,3 +64,57 @@ class CopyTestCase(TestCase):
 
         shutil.rmtree(bucket_name)
         os.remove(source_file.name)
+
+    def test_copy_link(self):
+        """Test that a disposable file is linked into the bucket and a kept file is copied."""
+        source_file = NamedTemporaryFile(delete=False)
+        source_file.write(b"cur report")
+        source_file.flush()
+        bucket_name = mkdtemp()
+
+        copy_to_local_dir(bucket_name, source_file.name, "/linked.csv", link=True)
+        copy_to_local_dir(bucket_name, source_file.name, "/copied.csv")
+        self.assertTrue(os.path.samefile(f"{bucket_name}/linked.csv", source_file.name))
+        self.assertFalse(os.path.samefile(f"{bucket_name}/copied.csv", source_file.name))
+        with open(f"{bucket_name}/copied.csv", "rb") as copied:
+            self.assertEqual(copied.read(), b"cur report")
+
+        shutil.rmtree(bucket_name)
+        os.remove(source_file.name)
+
+    def test_copy_link_fallback(self):
+        """Test that a file that cannot be linked is copied."""
+        source_file = NamedTemporaryFile(delete=False)
+        source_file.write(b"cur report")
+        source_file.flush()
+        bucket_name = mkdtemp()
+
+        with patch("nise.copy.os.link", side_effect=OSError("cross-device link")):
+            self.assertTrue(copy_to_local_dir(bucket_name, source_file.name, "/report.csv", link=True))
+        self.assertFalse(os.path.samefile(f"{bucket_name}/report.csv", source_file.name))
+        with open(f"{bucket_name}/report.csv", "rb") as copied:
+            self.assertEqual(copied.read(), b"cur report")
+
+        shutil.rmtree(bucket_name)
+        os.remove(source_file.name)
+
+    def test_copy_replaces_destination(self):
+        """Test that an existing destination is replaced rather than rewritten in place."""
+        source_file = NamedTemporaryFile(delete=False)
+        source_file.write(b"new report")
+        source_file.flush()
+        bucket_name = mkdtemp()
+        other_name = os.path.join(bucket_name, "other.csv")
+        with open(other_name, "wb") as other:
+            other.write(b"old report")
+        os.link(other_name, os.path.join(bucket_name, "report.csv"))
+
+        copy_to_local_dir(bucket_name, source_file.name, "/report.csv")
+        with open(other_name, "rb") as other:
+            self.assertEqual(other.read(), b"old report")
+        with open(os.path.join(bucket_name, "report.csv"), "rb") as report:
+            self.assertEqual(report.read(), b"new report")
+        self.assertEqual(sorted(os.listdir(bucket_name)), ["other.csv", "report.csv"])
+
+        shutil.rmtree(bucket_name)
+        os.remove(source_file.name)
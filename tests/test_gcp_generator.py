@@ -376,3 +376,41 @@ class TestGCPGenerator(TestCase):
                 credit_amount = row.get("credits", {}).get("amount", 0)
                 credit_rows.append(credit_amount)
             self.assertEqual(sum(credit_rows), expected_credit_amount * len(num_invoice_months))
+
+    def test_invoice_months_across_year_end(self):
+        """Test that invoice months follow the hour grid across month and year boundaries."""
+        start = datetime(2023, 12, 31, 22)
+        end = datetime(2024, 1, 1, 23)
+        for generator in (ComputeEngineGenerator, JSONLComputeEngineGenerator):
+            gen_handler = generator(start, end, self.currency, self.project, attributes=self.usage_attributes)
+            self.assertEqual(gen_handler._gcp_find_invoice_months_in_date_range(), ["202312", "202401"])
+            for row in gen_handler.generate_data():
+                if generator is ComputeEngineGenerator:
+                    invoice_month = row["invoice.month"]
+                else:
+                    invoice_month = row["invoice"]["month"]
+                self.assertEqual(invoice_month, row["usage_start_time"][:7].replace("-", ""))
+
+    def test_resource_pool(self):
+        """Test that resource level rows reference a pool of resource_count resources."""
+        attributes = dict(self.usage_attributes, resource_level=True, resource_count=3)
+        start = self.now - timedelta(days=3)
+        for generator in (ComputeEngineGenerator, CloudStorageGenerator, JSONLComputeEngineGenerator):
+            with self.subTest(generator=generator.__name__):
+                gen_handler = generator(start, self.now, self.currency, self.project, attributes=attributes)
+                rows = list(gen_handler.generate_data())
+                if generator is JSONLComputeEngineGenerator:
+                    names = {row["resource"]["global_name"] for row in rows}
+                else:
+                    names = {row["resource.global_name"] for row in rows}
+                self.assertLessEqual(len(names), 3)
+                self.assertEqual(len(gen_handler._resource_pool), 3)
+
+    def test_resource_pool_pinned(self):
+        """Test that pinned resource names make up a single pooled resource."""
+        attributes = dict(self.resource_attributes, resource_count=5)
+        gen_handler = ComputeEngineGenerator(self.yesterday, self.now, self.currency, self.project, attributes)
+        rows = list(gen_handler.generate_data())
+        self.assertEqual(len(gen_handler._resource_pool), 1)
+        self.assertEqual({row["resource.name"] for row in rows}, {"resource-name"})
+        self.assertEqual({row["resource.global_name"] for row in rows}, {"global-name"})
@@ -22,6 +22,7 @@ from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
 from itertools import combinations
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 from unittest.mock import patch
 
@@ -32,7 +33,9 @@ from nise.__main__ import main
 from nise.__main__ import run
 from nise.__main__ import valid_currency
 from nise.__main__ import valid_date
+from nise.plan import save_plan_cache
 from nise.util import load_yaml
+from nise.util import load_yaml_cached
 
 
 class MockGen:
@@ -371,6 +374,33 @@ class CommandLineTestCase(TestCase):
         data = load_yaml("tests/aws_static_report.yml")
         self.assertIsNotNone(data)
 
+    def test_load_yaml_cached(self):
+        """Test that a pre-parsed sidecar is reused until the yaml file changes."""
+        with TemporaryDirectory() as temp_dir:
+            yaml_file = os.path.join(temp_dir, "static.yml")
+            with open("tests/aws_static_report.yml") as source, open(yaml_file, "w") as target:
+                target.write(source.read())
+
+            data = load_yaml_cached(yaml_file)
+            self.assertEqual(data, load_yaml("tests/aws_static_report.yml"))
+            self.assertTrue(os.path.isfile(f"{yaml_file}.pickle"))
+
+            with patch("nise.util.yaml.load") as mock_load:
+                self.assertEqual(load_yaml_cached(yaml_file), data)
+                mock_load.assert_not_called()
+
+            with open(yaml_file, "w") as target:
+                target.write("generators: []\n")
+            self.assertEqual(load_yaml_cached(yaml_file), {"generators": []})
+
+    def test_load_static_report_data_yaml_cache(self):
+        """Test that the yaml cache option loads the static file through the sidecar."""
+        options = {"static_report_file": "tests/aws_static_report.yml", "yaml_cache": True}
+        with patch("nise.__main__.load_yaml_cached", return_value=load_yaml(options["static_report_file"])) as mock:
+            _load_static_report_data(options)
+            mock.assert_called_once_with("tests/aws_static_report.yml")
+        self.assertIsNotNone(options["static_report_data"])
+
     def test_load_static_report_data(self):
         """
         Test to load static report data from option.
@@ -386,6 +416,50 @@ class CommandLineTestCase(TestCase):
         _load_static_report_data(missing_options)
         self.assertIsNone(missing_options.get("static_report_data"))
 
+    def test_load_static_report_data_plan_cache(self):
+        """Test that a cached plan is reused for the same static file and resolved dates."""
+        with TemporaryDirectory() as temp_dir:
+            cache_file = os.path.join(temp_dir, "plan.cache")
+            options = {"static_report_file": "tests/aws_static_report.yml", "plan_cache": cache_file}
+            _load_static_report_data(options)
+            self.assertIsNotNone(options.get("plan_cache_key"))
+            self.assertIsNone(options.get("generation_plan"))
+            save_plan_cache(cache_file, options.get("plan_cache_key"), {"plan": "the-plan"})
+
+            cached_options = {"static_report_file": "tests/aws_static_report.yml", "plan_cache": cache_file}
+            self.assertTrue(_load_static_report_data(cached_options))
+            self.assertEqual(cached_options.get("generation_plan"), "the-plan")
+            self.assertEqual(cached_options.get("start_date"), options.get("start_date"))
+            self.assertEqual(cached_options.get("static_report_data"), options.get("static_report_data"))
+
+    def test_load_static_report_data_plan_cache_dates(self):
+        """Test that the plan cache key follows the current time only for relative static dates."""
+
+        def cache_keys(static_report_file, times):
+            keys = set()
+            for now in times:
+                options = {"static_report_file": static_report_file, "plan_cache": "plan.cache"}
+                with patch("nise.__main__.today", return_value=now):
+                    _load_static_report_data(options)
+                keys.add(options.get("plan_cache_key"))
+            return keys
+
+        first_hour = datetime(2024, 1, 15, 1, tzinfo=timezone.utc)
+        with TemporaryDirectory() as temp_dir:
+            absolute_file = os.path.join(temp_dir, "absolute.yml")
+            with open(absolute_file, "w") as static_file:
+                static_file.write(
+                    "generators:\n  - EC2Generator:\n      start_date: 2023-01-01\n      end_date: 2023-01-05\n"
+                )
+            later_times = (
+                first_hour,
+                first_hour + timedelta(hours=1),
+                first_hour + timedelta(days=1),
+            )
+            self.assertEqual(len(cache_keys(absolute_file, later_times)), 1)
+        relative_times = (first_hour, first_hour + timedelta(days=1))
+        self.assertEqual(len(cache_keys("tests/aws_static_report.yml", relative_times)), 2)
+
     def test_load_static_report_data_no_start_date(self):
         """
         Test to load static report data from option with no start date.
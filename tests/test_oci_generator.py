@@ -26,7 +26,9 @@ from nise.generators.oci import OCIComputeGenerator
 from nise.generators.oci import OCIDatabaseGenerator
 from nise.generators.oci import OCIGenerator
 from nise.generators.oci import OCINetworkGenerator
+from nise.generators.oci.oci_generator import OCI_COST_REPORT
 from nise.generators.oci.oci_generator import OCI_REPORT_TYPE_TO_COLS
+from nise.generators.oci.oci_generator import OCI_USAGE_REPORT
 
 
 class OCIGeneratorTestCase(TestCase):
@@ -141,6 +143,25 @@ class OCIGeneratorTestCase(TestCase):
             generator._generate_hourly_data(**kwargs)
         mock_method.assert_called_with(**kwargs)
 
+    def test_generate_rows(self):
+        """Test that generate_rows yields a cost and a usage row for every hour."""
+        generator = OCIComputeGenerator(self.six_hours_ago, self.now, self.currency, self.attributes)
+        rows = list(generator.generate_rows())
+        self.assertEqual(len(rows), 2 * len(generator.hours))
+        self.assertEqual({report_type for report_type, _ in rows}, set(OCI_REPORT_TYPE_TO_COLS))
+        data = generator._generate_hourly_data()
+        self.assertEqual(len(data[OCI_COST_REPORT]), len(generator.hours))
+        self.assertEqual(len(data[OCI_USAGE_REPORT]), len(generator.hours))
+
+    def test_generate_rows_share_common_columns(self):
+        """Test that the cost and usage rows of an interval share their common columns."""
+        generator = OCIComputeGenerator(self.six_hours_ago, self.now, self.currency, self.attributes)
+        rows = iter(generator.generate_rows())
+        for (cost_type, cost_row), (usage_type, usage_row) in zip(rows, rows):
+            self.assertEqual((cost_type, usage_type), (OCI_COST_REPORT, OCI_USAGE_REPORT))
+            for column in ("lineItem/referenceNo", "lineItem/intervalUsageStart", "tags/Oracle-Tags.CreatedOn"):
+                self.assertEqual(cost_row[column], usage_row[column])
+
     @patch("nise.generators.oci.OCIGenerator.generate_data", autospec=True)
     def test_generate_data(self, mock_method):
         """Test that the generate_data method is called."""
@@ -0,0 +1,132 @@
+#
+# Copyright 2024 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+import os
+import tarfile
+from datetime import datetime
+from itertools import count
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from nise.payload import max_payload_size
+from nise.payload import pack_payloads
+from nise.payload import place_payload
+from nise.payload import split_report
+from nise.upload import MB
+
+
+class PayloadTestCase(TestCase):
+    """
+    TestCase class for the payload packer
+    """
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.header = b"col1,col2\n"
+        self.lines = [f"r{row}c1,r{row}c2\n".encode() for row in range(20)]
+        self.report = os.path.join(self.temp_dir.name, "report.csv")
+        with open(self.report, "wb") as report_file:
+            report_file.write(self.header + b"".join(self.lines))
+        self.manifest = b"{}"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def _names():
+        return (f"report.{number}.csv" for number in count())
+
+    @staticmethod
+    def _read(part):
+        with part.open() as reader:
+            return reader.read()
+
+    def test_split_report_fits(self):
+        """Test that a report within the maximum size is a single part holding the whole file."""
+        parts = split_report(self.report, os.path.getsize(self.report), self._names())
+        self.assertEqual([part.name for part in parts], ["report.0.csv"])
+        self.assertEqual(self._read(parts[0]), self.header + b"".join(self.lines))
+
+    def test_split_report(self):
+        """Test that a large report is cut at line ends into parts repeating the header."""
+        parts = split_report(self.report, 50, self._names())
+        self.assertGreater(len(parts), 1)
+        self.assertEqual([part.name for part in parts], [f"report.{number}.csv" for number in range(len(parts))])
+        lines = []
+        for part in parts:
+            data = self._read(part)
+            self.assertLessEqual(len(data), 50)
+            self.assertEqual(len(data), part.size)
+            self.assertTrue(data.startswith(self.header))
+            self.assertTrue(data.endswith(b"\n"))
+            lines.extend(data.splitlines(keepends=True)[1:])
+        self.assertEqual(lines, self.lines)
+
+    def test_split_report_in_memory(self):
+        """Test that a report held in memory is split like the same report on disk."""
+        with open(self.report, "rb") as report_file:
+            encoded = report_file.read()
+        in_memory = split_report(encoded, 50, self._names())
+        on_disk = split_report(self.report, 50, self._names())
+        self.assertEqual([self._read(part) for part in in_memory], [self._read(part) for part in on_disk])
+
+    def test_pack_payloads(self):
+        """Test that parts are packed into size-bounded tarballs, each carrying the manifest."""
+        parts = split_report(self.report, 50, self._names())
+        payloads = pack_payloads(parts, self.manifest, 100)
+        try:
+            self.assertLess(len(payloads), len(parts))
+            packed = []
+            for payload in payloads:
+                with tarfile.open(payload) as tar:
+                    names = tar.getnames()
+                    self.assertEqual(names[0], "manifest.json")
+                    self.assertEqual(tar.extractfile("manifest.json").read(), self.manifest)
+                    self.assertLessEqual(sum(tar.getmember(name).size for name in names[1:]), 100)
+                    for name in names[1:]:
+                        packed.append((name, tar.extractfile(name).read()))
+            self.assertEqual(packed, [(part.name, self._read(part)) for part in parts])
+        finally:
+            for payload in payloads:
+                os.remove(payload)
+
+    def test_place_payload(self):
+        """Test that parts and the manifest are placed into the extracted layout without a tarball."""
+        whole = split_report(self.report, 1000, self._names())
+        split = split_report(self.report, 50, (f"split.{number}.csv" for number in count()))
+        with open(self.report, "rb") as report_file:
+            in_memory = split_report(report_file.read(), 1000, iter(["memory.csv"]))
+        base_path = os.path.join(self.temp_dir.name, "upload")
+        destination_dir = place_payload(
+            base_path, "my-cluster", datetime(2024, 1, 15), whole + split + in_memory, self.manifest
+        )
+        self.assertEqual(destination_dir, os.path.join(base_path, "my-cluster", "20240101-20240201"))
+        self.assertEqual(
+            sorted(os.listdir(destination_dir)),
+            sorted(["manifest.json", "memory.csv"] + [part.name for part in whole + split]),
+        )
+        # the kept report file is copied, so rewriting it cannot change the placed report
+        self.assertFalse(os.path.samefile(os.path.join(destination_dir, "report.0.csv"), self.report))
+        for part in whole + split + in_memory:
+            with open(os.path.join(destination_dir, part.name), "rb") as placed:
+                self.assertEqual(placed.read(), self._read(part))
+        with open(os.path.join(destination_dir, "manifest.json"), "rb") as manifest:
+            self.assertEqual(manifest.read(), self.manifest)
+
+    def test_max_payload_size(self):
+        """Test that the payload size defaults to the operator default of 100 MB."""
+        self.assertEqual(max_payload_size(), 100 * MB)
+        self.assertEqual(max_payload_size(5), 5 * MB)
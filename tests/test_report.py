@@ -18,29 +18,46 @@ import base64
 import calendar
 import csv
 import datetime
+import gzip
 import json
 import os
 import re
 import shutil
+import threading
 from tempfile import mkdtemp
 from tempfile import NamedTemporaryFile
 from tempfile import TemporaryDirectory
 from unittest import TestCase
 from unittest.mock import ANY
+from unittest.mock import Mock
 from unittest.mock import patch
 
 import faker
+import requests
 from dateutil.relativedelta import relativedelta
 from nise.__main__ import fix_dates
+from nise.generators.aws import AWSBatch
+from nise.generators.aws import EC2Generator
+from nise.generators.aws import get_aws_column_schema
 from nise.generators.oci.oci_generator import OCI_REPORT_TYPE_TO_COLS
 from nise.generators.ocp.ocp_generator import OCP_REPORT_TYPE_TO_COLS
+from nise.plan import load_plan_cache
+from nise.report import _aws_cost_category_cols
+from nise.report import _aws_route_report
+from nise.report import _build_generation_plan
 from nise.report import _convert_bytes
 from nise.report import _create_generator_dates_from_yaml
 from nise.report import _create_month_list
+from nise.report import _encode_csv
 from nise.report import _generate_azure_filename
+from nise.report import _get_generation_plan
 from nise.report import _get_generators
 from nise.report import _get_jsonl_generators
+from nise.report import _month_generator
+from nise.report import _numbered_file_name
+from nise.report import _ocp_report
 from nise.report import _remove_files
+from nise.report import _split_batch
 from nise.report import _write_csv
 from nise.report import _write_jsonl
 from nise.report import _write_manifest
@@ -58,7 +75,9 @@ from nise.report import oci_write_file
 from nise.report import ocp_create_report
 from nise.report import ocp_route_file
 from nise.report import post_payload_to_ingest_service
+from nise.report import write_aws_file
 from nise.report import write_gcp_file
+from nise.upload import reset_clients
 
 fake = faker.Faker()
 
@@ -88,6 +107,14 @@ class MiscReportTestCase(TestCase):
         self.assertTrue(os.path.exists(temp_file.name))
         os.remove(temp_file.name)
 
+    def test_encode_csv(self):
+        """Test that csv data is encoded in memory exactly as it is written to a file."""
+        headers = ["col1", "col2"]
+        data = [{"col1": "r1c1", "col2": "r1,c2"}, {"col1": "r2c1", "col2": "r2c2"}]
+        with NamedTemporaryFile() as temp_file:
+            _write_csv(temp_file.name, data, headers)
+            self.assertEqual(_encode_csv(data, headers), temp_file.read())
+
     def test_write_jsonl(self):
         """Test the writing of the jsonl data."""
         temp_file = NamedTemporaryFile(mode="w", delete=False)
@@ -96,6 +123,12 @@ class MiscReportTestCase(TestCase):
         self.assertTrue(os.path.exists(temp_file.name))
         os.remove(temp_file.name)
 
+    def test_numbered_file_name(self):
+        """Test that split file numbers go before the whole file extension."""
+        self.assertEqual(_numbered_file_name("/tmp/report.csv", 0), "/tmp/report.csv")
+        self.assertEqual(_numbered_file_name("/tmp/report.csv", 2), "/tmp/report-2.csv")
+        self.assertEqual(_numbered_file_name("/tmp/report.json.gz", 1), "/tmp/report-1.json.gz")
+
     def test_remove_files(self):
         """Test to see if files are deleted."""
         temp_file = NamedTemporaryFile(mode="w", delete=False)
@@ -378,10 +411,108 @@ class MiscReportTestCase(TestCase):
         self.assertEqual(generators[0].get("attributes").get("end_date").day, 22)
         self.assertEqual(generators[0].get("attributes").get("end_date").year, 2019)
 
+    def test_build_generation_plan(self):
+        """Test that the plan only lists generators active in each month."""
+        start = datetime.datetime(2023, 1, 15, tzinfo=datetime.timezone.utc)
+        end = datetime.datetime(2023, 3, 10, tzinfo=datetime.timezone.utc)
+        months = _create_month_list(start, end)
+        generator_list = [
+            {"EC2Generator": {"start_date": "2023-01-20", "end_date": "2023-01-25"}},
+            {"S3Generator": {"start_date": "2023-02-10", "end_date": "2023-03-05"}},
+        ]
+        generators = _get_generators(generator_list)
+        generators.append({"generator": generators[0]["generator"], "attributes": {}})
+        plan = _build_generation_plan(generators, months)
+
+        self.assertEqual(len(plan), 3)
+        self.assertEqual([index for index, *_ in plan.month_generators(0)], [0, 2])
+        self.assertEqual([index for index, *_ in plan.month_generators(1)], [1, 2])
+        self.assertEqual([index for index, *_ in plan.month_generators(2)], [1, 2])
+        _, generator, gen_start, gen_end = next(plan.month_generators(0))
+        self.assertEqual(generator, generators[0])
+        self.assertEqual(gen_start, datetime.datetime(2023, 1, 20, tzinfo=datetime.timezone.utc))
+        self.assertEqual(gen_end, datetime.datetime(2023, 1, 25, tzinfo=datetime.timezone.utc))
+        _, _, gen_start, gen_end = list(plan.month_generators(2))[0]
+        self.assertEqual(gen_start, months[2].get("start"))
+        self.assertEqual(gen_end, datetime.datetime(2023, 3, 5, tzinfo=datetime.timezone.utc))
+        self.assertEqual(plan.generator_count(1), 2)
+
+    def test_build_generation_plan_default_dates(self):
+        """Test that generators without attributes use the default dates when given."""
+        start = datetime.datetime(2023, 1, 15, tzinfo=datetime.timezone.utc)
+        end = datetime.datetime(2023, 2, 10, tzinfo=datetime.timezone.utc)
+        months = _create_month_list(start, end)
+        generators = _get_generators([{"EC2Generator": {"start_date": "2023-01-20", "end_date": "2023-01-25"}}])
+        generators = [{"generator": generators[0]["generator"], "attributes": {}}]
+        plan = _build_generation_plan(generators, months, default_dates=(start, end))
+        windows = [(gen_start, gen_end) for _, _, gen_start, gen_end in plan.month_generators(0)]
+        self.assertEqual(windows, [(start, months[0].get("end"))])
+
+    def test_get_generation_plan_cache(self):
+        """Test that a compiled plan is written to and reused from the plan cache."""
+        start = datetime.datetime(2023, 1, 15, tzinfo=datetime.timezone.utc)
+        end = datetime.datetime(2023, 1, 20, tzinfo=datetime.timezone.utc)
+        months = _create_month_list(start, end)
+        with TemporaryDirectory() as temp_dir:
+            cache_file = os.path.join(temp_dir, "plan.cache")
+            options = {
+                "start_date": start,
+                "end_date": end,
+                "static_report_data": {
+                    "generators": [{"EC2Generator": {"start_date": "2023-01-16", "end_date": "2023-01-18"}}]
+                },
+                "plan_cache": cache_file,
+                "plan_cache_key": "abc",
+            }
+            plan = _get_generation_plan(options, months, [])
+            self.assertTrue(os.path.isfile(cache_file))
+
+            state = load_plan_cache(cache_file, "abc")
+            self.assertEqual(len(state.get("plan")), len(plan))
+            self.assertIsNone(load_plan_cache(cache_file, "other-key"))
+
+            cached = _get_generation_plan({"generation_plan": state.get("plan")}, months, [])
+            self.assertIs(cached, state.get("plan"))
+
+    def test_aws_cost_category_cols(self):
+        """Test that cost category columns are collected from every generator of a run."""
+        generators = [
+            {"generator": EC2Generator, "attributes": {"cost_category": {"costCategory/Team": "a"}}},
+            {"generator": EC2Generator, "attributes": {"cost_category": {"costCategory/Env": "b"}}},
+            {"generator": EC2Generator, "attributes": {}},
+            {"generator": EC2Generator},
+        ]
+        self.assertEqual(_aws_cost_category_cols(generators), {"costCategory/Team", "costCategory/Env"})
+
+    def test_month_generator_reuses_instances(self):
+        """Test that a generator created for one month is rebased for the next."""
+        start = datetime.datetime(2023, 1, 30, tzinfo=datetime.timezone.utc)
+        end = datetime.datetime(2023, 2, 2, tzinfo=datetime.timezone.utc)
+        months = _create_month_list(start, end)
+        instances = {}
+        args = ("USD", "9999999999999", ("9999999999999",), {"resource_id": "12345678"})
+
+        january = _month_generator(instances, 0, EC2Generator, months[0]["start"], months[0]["end"], *args)
+        february = _month_generator(instances, 0, EC2Generator, months[1]["start"], months[1]["end"], *args)
+        self.assertIs(january, february)
+        self.assertEqual(february.start_date, months[1]["start"])
+        self.assertEqual(february.hours[0].get("start"), months[1]["start"])
+
+        other = _month_generator(instances, 1, EC2Generator, months[1]["start"], months[1]["end"], *args)
+        self.assertIsNot(other, february)
+
+    def test_split_batch(self):
+        """Test that a batch is split to fill the current file and then whole files."""
+        batch = AWSBatch(get_aws_column_schema(), 7, {"col": list(range(7))})
+        chunks = list(_split_batch(batch, 2, 3))
+        self.assertEqual([chunk.column("col") for chunk in chunks], [[0], [1, 2, 3], [4, 5, 6]])
+        self.assertEqual(list(_split_batch(batch, 0, None)), [batch])
+
     @patch.dict(os.environ, {"INSIGHTS_ACCOUNT_ID": "12345", "INSIGHTS_ORG_ID": "54321"})
-    @patch("nise.report.requests.post")
-    def test_post_payload_to_ingest_service_with_identity_header(self, mock_post):
+    @patch("nise.report.http_session")
+    def test_post_payload_to_ingest_service_with_identity_header(self, mock_session):
         """Test that the identity header path is taken."""
+        mock_post = mock_session.return_value.post
         insights_account_id = os.environ.get("INSIGHTS_ACCOUNT_ID")
         insights_org_id = os.environ.get("INSIGHTS_ORG_ID")
         content_type = "application/vnd.redhat.hccm.tar+tgz"
@@ -407,9 +538,10 @@ class MiscReportTestCase(TestCase):
         self.assertNotIn("auth", mock_post.call_args[1])
 
     @patch.dict(os.environ, {"INSIGHTS_USER": "12345", "INSIGHTS_PASSWORD": "54321"})
-    @patch("nise.report.requests.post")
-    def test_post_payload_to_ingest_service_with_basic_auth(self, mock_post):
+    @patch("nise.report.http_session")
+    def test_post_payload_to_ingest_service_with_basic_auth(self, mock_session):
         """Test that the basic auth path is taken."""
+        mock_post = mock_session.return_value.post
         insights_user = os.environ.get("INSIGHTS_USER")
         insights_password = os.environ.get("INSIGHTS_PASSWORD")
 
@@ -427,9 +559,16 @@ class MiscReportTestCase(TestCase):
         self.assertNotIn("headers", mock_post.call_args[1])
 
     @patch.dict(os.environ, {"HCC_SERVICE_ACCOUNT_ID": "12345", "HCC_SERVICE_ACCOUNT_SECRET": "54321"})
-    @patch("nise.report.requests.post")
-    def test_post_payload_to_ingest_service_with_service_account(self, mock_post):
+    @patch("nise.upload.http_session")
+    @patch("nise.report.http_session")
+    def test_post_payload_to_ingest_service_with_service_account(self, mock_session, mock_token_session):
         """Test that the service account path is taken."""
+        reset_clients()
+        mock_post = mock_session.return_value.post
+        mock_token_session.return_value.post.return_value.json.return_value = {
+            "access_token": "token",
+            "expires_in": 300,
+        }
         temp_file = NamedTemporaryFile(mode="w", delete=False)
         headers = ["col1", "col2"]
         data = [{"col1": "r1c1", "col2": "r1c2"}, {"col1": "r2c1", "col2": "r2c2"}]
@@ -440,6 +579,40 @@ class MiscReportTestCase(TestCase):
 
         post_payload_to_ingest_service(insights_upload, temp_file.name)
         self.assertEqual(mock_post.call_args[1].get("data"), data)
+        self.assertEqual(mock_post.call_args[1].get("headers"), {"Authorization": "Bearer token"})
+
+        post_payload_to_ingest_service(insights_upload, temp_file.name)
+        mock_token_session.return_value.post.assert_called_once()
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch.dict(os.environ, {"INSIGHTS_USER": "12345", "INSIGHTS_PASSWORD": "54321"})
+    @patch("nise.report.time.sleep")
+    @patch("nise.report.http_session")
+    def test_post_payload_to_ingest_service_retries(self, mock_session, mock_sleep):
+        """Test that an unavailable ingress is retried with backoff and the payload sent again from the start."""
+        mock_post = mock_session.return_value.post
+        sent = []
+
+        def post(url, files, **kwargs):
+            sent.append(files["file"][1].read())
+            if len(sent) == 1:
+                raise requests.exceptions.ConnectionError
+            return Mock(status_code=503 if len(sent) == 2 else 202)
+
+        mock_post.side_effect = post
+        with NamedTemporaryFile(mode="w") as temp_file:
+            temp_file.write("payload")
+            temp_file.flush()
+            response = post_payload_to_ingest_service("test", temp_file.name)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(sent, ["payload".encode()] * 3)
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [1, 2])
+
+        mock_post.side_effect = None
+        mock_post.return_value.status_code = 503
+        with NamedTemporaryFile(mode="w") as temp_file:
+            response = post_payload_to_ingest_service("test", temp_file.name)
+        self.assertEqual(response.status_code, 503)
 
     def test_defaulting_currency(self):
         """Test that if no currency is provide in options or static it defaults to USD."""
@@ -482,6 +655,35 @@ class AWSReportTestCase(TestCase):
         self.assertTrue(os.path.isfile(expected_month_output_file))
         os.remove(expected_month_output_file)
 
+    def test_aws_create_report_batch_row_limit(self):
+        """Test that batched aws generation splits the month into files of at most row_limit rows."""
+        start = datetime.datetime(2024, 1, 10)
+        end = datetime.datetime(2024, 1, 11)
+        row_limit = 100
+        with TemporaryDirectory() as temp_dir:
+            cwd = os.getcwd()
+            os.chdir(temp_dir)
+            try:
+                aws_create_report(
+                    {
+                        "start_date": start,
+                        "end_date": end,
+                        "aws_report_name": "cur_report",
+                        "write_monthly": True,
+                        "aws_batch": True,
+                        "row_limit": row_limit,
+                    }
+                )
+                report_files = sorted(fname for fname in os.listdir(temp_dir) if fname.startswith("January-2024"))
+                self.assertTrue(report_files)
+                for fname in report_files:
+                    with open(fname) as csv_file:
+                        rows = list(csv.DictReader(csv_file))
+                    self.assertLessEqual(len(rows), row_limit)
+                    self.assertTrue(all(row["identity/LineItemId"] for row in rows))
+            finally:
+                os.chdir(cwd)
+
     @patch("nise.report.upload_to_s3")
     def test_aws_create_report_with_s3(self, mock_upload_to_s3):
         """Test the aws report creation method with s3."""
@@ -524,6 +726,45 @@ class AWSReportTestCase(TestCase):
         os.remove(expected_month_output_file)
         shutil.rmtree(local_bucket_path)
 
+    def test_aws_create_report_daily_granularity(self):
+        """Test that daily granularity writes one row per day and records it in the manifest."""
+        start = datetime.datetime(2024, 1, 10)
+        end = datetime.datetime(2024, 1, 12)
+        for aws_batch in (False, True):
+            with self.subTest(aws_batch=aws_batch), TemporaryDirectory() as temp_dir:
+                cwd = os.getcwd()
+                os.chdir(temp_dir)
+                try:
+                    bucket = os.path.join(temp_dir, "bucket")
+                    os.makedirs(bucket)
+                    aws_create_report(
+                        {
+                            "start_date": start,
+                            "end_date": end,
+                            "aws_bucket_name": bucket,
+                            "aws_report_name": "cur_report",
+                            "write_monthly": True,
+                            "aws_batch": aws_batch,
+                            "aws_granularity": "daily",
+                        }
+                    )
+                    with open("January-2024-cur_report.csv") as csv_file:
+                        rows = list(csv.DictReader(csv_file))
+                    self.assertTrue(rows)
+                    for row in rows:
+                        self.assertTrue(row["identity/TimeInterval"].endswith("T00:00:00Z"))
+                    manifests = [
+                        os.path.join(path, fname)
+                        for path, _, files in os.walk(bucket)
+                        for fname in files
+                        if fname.endswith("Manifest.json")
+                    ]
+                    self.assertTrue(manifests)
+                    with open(manifests[0]) as manifest_file:
+                        self.assertEqual(json.load(manifest_file)["timeUnit"], "DAILY")
+                finally:
+                    os.chdir(cwd)
+
     def test_aws_create_report_with_local_dir_report_prefix(self):
         """Test the aws report creation method with local directory and a report prefix."""
         now = datetime.datetime.now().replace(microsecond=0, second=0, minute=0, hour=0)
@@ -723,6 +964,41 @@ class AWSReportTestCase(TestCase):
         expected_month_output_file = "{}/{}.csv".format(os.getcwd(), month_output_file_name)
         self.assertFalse(os.path.isfile(expected_month_output_file))
 
+    def test_aws_create_report_overlaps_months(self):
+        """Test that a month is generated while the previous one is routed, and routed reports are removed."""
+        local_bucket_path = mkdtemp()
+        february_written = threading.Event()
+        overlapped = []
+
+        def route_report(*args, **kwargs):
+            overlapped.append(february_written.wait(10))
+            _aws_route_report(*args, **kwargs)
+
+        def write_file(file_number, aws_report_name, month_name, *args):
+            month_output_file = write_aws_file(file_number, aws_report_name, month_name, *args)
+            if month_name == "February":
+                february_written.set()
+            return month_output_file
+
+        options = {
+            "start_date": datetime.datetime(2024, 1, 31),
+            "end_date": datetime.datetime(2024, 2, 2),
+            "aws_bucket_name": local_bucket_path,
+            "aws_report_name": "cur_report",
+        }
+        fix_dates(options, "aws")
+        with patch("nise.report._aws_route_report", side_effect=route_report), patch(
+            "nise.report.write_aws_file", side_effect=write_file
+        ):
+            aws_create_report(options)
+        self.assertEqual(overlapped, [True, True])
+        for month_name in ("January", "February"):
+            self.assertFalse(os.path.isfile(f"{os.getcwd()}/{month_name}-2024-cur_report.csv"))
+        routed = [name for _, _, names in os.walk(local_bucket_path) for name in names]
+        self.assertIn("January-2024-cur_report.csv.gz", routed)
+        self.assertIn("February-2024-cur_report.csv.gz", routed)
+        shutil.rmtree(local_bucket_path)
+
     def test_aws_create_report_with_local_dir_static_generation_multi_file(self):
         """Test the aws report creation method with local directory and static generation in multiple files."""
         now = datetime.datetime.now().replace(microsecond=0, second=0, minute=0, hour=0)
@@ -1048,6 +1324,81 @@ class OCPReportTestCase(TestCase):
             os.remove(expected_month_output_file)
         shutil.rmtree(local_insights_upload)
 
+    def test_ocp_create_report_with_local_dir_in_memory(self):
+        """Test that reports which are not kept are placed into the local upload directory from memory."""
+        now = datetime.datetime.now().replace(microsecond=0, second=0, minute=0, hour=0)
+        yesterday = now - datetime.timedelta(days=1)
+        local_insights_upload = mkdtemp()
+        cluster_id = "11112222"
+        options = {
+            "start_date": yesterday,
+            "end_date": now,
+            "insights_upload": local_insights_upload,
+            "ocp_cluster_id": cluster_id,
+        }
+        fix_dates(options, "ocp")
+        with patch("nise.report.write_ocp_file") as mock_write, patch("nise.report.extract_payload") as mock_extract:
+            ocp_create_report(options)
+        mock_write.assert_not_called()
+        mock_extract.assert_not_called()
+        extracted = []
+        for _, _, files in os.walk(local_insights_upload):
+            extracted.extend(files)
+        self.assertIn("manifest.json", extracted)
+        self.assertEqual(len([name for name in extracted if name.endswith(".csv")]), len(OCP_REPORT_TYPE_TO_COLS) - 1)
+        shutil.rmtree(local_insights_upload)
+
+    def test_ocp_create_report_in_memory_spills_large_reports(self):
+        """Test that encoded reports above the in-memory size are spilled to removed temporary files."""
+        now = datetime.datetime.now().replace(microsecond=0, second=0, minute=0, hour=0)
+        yesterday = now - datetime.timedelta(days=1)
+        local_insights_upload = mkdtemp()
+        options = {
+            "start_date": yesterday,
+            "end_date": now,
+            "insights_upload": local_insights_upload,
+            "ocp_cluster_id": "11112222",
+        }
+        fix_dates(options, "ocp")
+        spilled = []
+        report = _ocp_report
+
+        def spill(*args):
+            encoded = report(*args)
+            spilled.append(encoded)
+            return encoded
+
+        with patch("nise.report.OCP_IN_MEMORY_REPORT_SIZE", 0), patch("nise.report._ocp_report", side_effect=spill):
+            ocp_create_report(options)
+        self.assertTrue(spilled)
+        for spilled_file in spilled:
+            self.assertIsInstance(spilled_file, str)
+            self.assertFalse(os.path.exists(spilled_file))
+        extracted = [name for _, _, files in os.walk(local_insights_upload) for name in files]
+        self.assertEqual(len([name for name in extracted if name.endswith(".csv")]), len(OCP_REPORT_TYPE_TO_COLS) - 1)
+        shutil.rmtree(local_insights_upload)
+
+    def test_ocp_create_report_row_limit_on_disk(self):
+        """Test that reports split by a row limit are written to disk and removed once sent."""
+        now = datetime.datetime.now().replace(microsecond=0, second=0, minute=0, hour=0)
+        yesterday = now - datetime.timedelta(days=1)
+        local_insights_upload = mkdtemp()
+        options = {
+            "start_date": yesterday,
+            "end_date": now,
+            "insights_upload": local_insights_upload,
+            "ocp_cluster_id": "11112222",
+            "row_limit": 10,
+        }
+        fix_dates(options, "ocp")
+        with patch("nise.report._encode_csv") as mock_encode:
+            ocp_create_report(options)
+        mock_encode.assert_not_called()
+        self.assertFalse([name for name in os.listdir(os.getcwd()) if "11112222" in name])
+        extracted = [name for _, _, files in os.walk(local_insights_upload) for name in files]
+        self.assertIn("manifest.json", extracted)
+        shutil.rmtree(local_insights_upload)
+
     def test_ocp_create_report_with_local_dir_static_generation(self):
         """Test the ocp report creation method with local directory and static generation."""
         now = datetime.datetime.now().replace(microsecond=0, second=0, minute=0, hour=0)
@@ -1209,9 +1560,10 @@ class OCPReportTestCase(TestCase):
         shutil.rmtree(local_insights_upload)
 
     @patch.dict(os.environ, {"INSIGHTS_USER": "12345", "INSIGHTS_PASSWORD": "54321"})
-    @patch("nise.report.requests.post")
-    def test_ocp_route_file(self, mock_post):
+    @patch("nise.report.http_session")
+    def test_ocp_route_file(self, mock_session):
         """Test that a response is good."""
+        mock_post = mock_session.return_value.post
         insights_user = os.environ.get("INSIGHTS_USER")
         insights_password = os.environ.get("INSIGHTS_PASSWORD")
 
@@ -1429,6 +1781,63 @@ class AzureReportTestCase(TestCase):
         self.assertTrue(os.path.isfile(local_path))
         os.remove(local_path)
 
+    def test_azure_create_report_row_limit(self):
+        """Test that the azure report is split into files holding at most row_limit rows."""
+        with TemporaryDirectory() as temp_dir:
+            cwd = os.getcwd()
+            os.chdir(temp_dir)
+            try:
+                options = {
+                    "start_date": datetime.datetime(2024, 1, 10),
+                    "end_date": datetime.datetime(2024, 1, 12),
+                    "row_limit": 10,
+                    "write_monthly": True,
+                }
+                fix_dates(options, "azure")
+                azure_create_report(options)
+                report_files = sorted(fname for fname in os.listdir(temp_dir) if fname.endswith(".csv"))
+                self.assertGreater(len(report_files), 1)
+                for fname in report_files:
+                    self.assertRegex(fname, r"^costreport_.*-\d+\.csv$")
+                    with open(fname) as csv_file:
+                        self.assertLessEqual(len(list(csv.DictReader(csv_file))), 10)
+            finally:
+                os.chdir(cwd)
+
+    @patch.dict(os.environ, {"AZURE_STORAGE_CONNECTION_STRING": "UseDevelopmentStorage=true"})
+    @patch("nise.report.upload_to_azure_container")
+    @patch("nise.report.AzureBlobWriter")
+    def test_azure_create_report_stream_upload(self, mock_writer, mock_upload):
+        """Test that a streamed azure report is written to its blobs while it is generated."""
+        with TemporaryDirectory() as temp_dir:
+            cwd = os.getcwd()
+            os.chdir(temp_dir)
+            try:
+                options = {
+                    "start_date": datetime.datetime(2024, 1, 10),
+                    "end_date": datetime.datetime(2024, 1, 12),
+                    "azure_container_name": "container",
+                    "azure_account_name": "account",
+                    "azure_report_name": "cur",
+                    "azure_stream_upload": True,
+                    "row_limit": 10,
+                    "write_monthly": True,
+                }
+                fix_dates(options, "azure")
+                azure_create_report(options)
+                report_files = sorted(fname for fname in os.listdir(temp_dir) if fname.endswith(".csv"))
+            finally:
+                os.chdir(cwd)
+        mock_upload.assert_not_called()
+        blob_paths = sorted(call.args[1] for call in mock_writer.call_args_list)
+        for fname in report_files:
+            self.assertIn(f"cur/20240101-20240131/{fname}", blob_paths)
+        blob_writer = mock_writer.return_value
+        self.assertEqual(blob_writer.open.call_count, len(report_files))
+        self.assertEqual(blob_writer.open.return_value.close.call_count, len(report_files))
+        unsplit = [fname for fname in report_files if re.match(r"^costreport_[0-9a-f-]{36}\.csv$", fname)]
+        self.assertEqual(len(unsplit), 1)
+
     @patch("nise.report._generate_azure_filename")
     def test_azure_create_report_with_local_dir(self, mock_name):
         """Test the azure report creation method with local directory."""
@@ -1610,6 +2019,57 @@ class GCPReportTestCase(TestCase):
         self.assertTrue(os.path.isfile(expected_output_file_path))
         os.remove(expected_output_file_path)
 
+    def test_gcp_create_report_with_dataset_name_gzip(self):
+        """Test that the BigQuery JSON Lines file is gzipped when requested."""
+        with TemporaryDirectory() as temp_dir:
+            cwd = os.getcwd()
+            os.chdir(temp_dir)
+            try:
+                options = {
+                    "start_date": datetime.datetime(2024, 1, 10),
+                    "end_date": datetime.datetime(2024, 1, 11),
+                    "gcp_report_prefix": "test_report",
+                    "gcp_dataset_name": "test_name",
+                    "gcp_gzip": True,
+                    "write_monthly": True,
+                }
+                fix_dates(options, "gcp")
+                gcp_create_report(options)
+                self.assertEqual(os.listdir(temp_dir), ["test_report.json.gz"])
+                with gzip.open("test_report.json.gz", "rt") as jsonl_file:
+                    rows = [json.loads(line) for line in jsonl_file]
+                self.assertTrue(rows)
+                self.assertIn("invoice", rows[0])
+            finally:
+                os.chdir(cwd)
+
+    def test_gcp_create_report_row_limit(self):
+        """Test that the gcp report is split into files holding at most row_limit rows."""
+        for dataset_name, extension in ((None, "csv"), ("test_name", "json")):
+            with self.subTest(dataset_name=dataset_name), TemporaryDirectory() as temp_dir:
+                cwd = os.getcwd()
+                os.chdir(temp_dir)
+                try:
+                    options = {
+                        "start_date": datetime.datetime(2024, 1, 10),
+                        "end_date": datetime.datetime(2024, 1, 12),
+                        "gcp_report_prefix": "test_report",
+                        "gcp_dataset_name": dataset_name,
+                        "row_limit": 10,
+                        "write_monthly": True,
+                    }
+                    fix_dates(options, "gcp")
+                    gcp_create_report(options)
+                    report_files = sorted(os.listdir(temp_dir))
+                    self.assertGreater(len(report_files), 1)
+                    self.assertIn(f"test_report-1.{extension}", report_files)
+                    self.assertNotIn(f"test_report.{extension}", report_files)
+                    for fname in report_files:
+                        with open(fname) as report_file:
+                            self.assertLessEqual(len(report_file.readlines()), 11)
+                finally:
+                    os.chdir(cwd)
+
     @patch("nise.report.copy_to_local_dir")
     @patch("nise.report.upload_to_gcp_storage")
     def test_gcp_route_file_local(self, mock_upload, mock_copy):
@@ -1667,6 +2127,35 @@ class GCPReportTestCase(TestCase):
 
         self.assertFalse(os.path.isfile(expected_output_file_path))
 
+    def test_gcp_create_report_static_data_ending_mid_month(self):
+        """Test that a gcp report is named after the end date of static generators ending mid-month."""
+        static_gcp_data = {
+            "generators": [
+                {"ComputeEngineGenerator": {"start_date": "2021-01-01", "end_date": "2021-01-05"}},
+                {"CloudStorageGenerator": {"start_date": "2021-01-01", "end_date": "2021-01-05"}},
+            ],
+            "projects": [
+                {
+                    "billing_account_id": "example_account_id",
+                    "project.name": "billion-force-58425800",
+                    "project.id": "example-project-id",
+                    "project.labels": "step:chair;year:each",
+                }
+            ],
+        }
+        options = {
+            "start_date": datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc),
+            "end_date": datetime.datetime(2021, 1, 31, tzinfo=datetime.timezone.utc),
+            "gcp_etag": "etag",
+            "write_monthly": True,
+            "static_report_data": static_gcp_data,
+        }
+        gcp_create_report(options)
+        expected_output_file_path = f"{os.getcwd()}/202101_etag_2021-01-01:2021-01-05.csv"
+        self.assertTrue(os.path.isfile(expected_output_file_path))
+        self.assertFalse(os.path.isfile(f"{os.getcwd()}/202101_etag_2021-01-01:2021-01-31.csv"))
+        os.remove(expected_output_file_path)
+
     def test_gcp_create_report_with_dataset_name_static_data(self):
         """Test the gcp report creation method where a dataset name is included and static data used."""
         now = datetime.datetime.now().replace(microsecond=0, second=0, minute=0, hour=0)
@@ -1808,6 +2297,51 @@ class OCIReportTestCase(TestCase):
             mock_remove_files.assert_called()
             os.remove(file_name)
 
+    def test_oci_create_report_row_limit(self):
+        """Test that oci reports are split into consecutively numbered files of at most row_limit rows."""
+        with TemporaryDirectory() as temp_dir:
+            cwd = os.getcwd()
+            os.chdir(temp_dir)
+            try:
+                options = {
+                    "start_date": datetime.datetime(2024, 1, 10),
+                    "end_date": datetime.datetime(2024, 1, 12),
+                    "row_limit": 10,
+                    "write_monthly": True,
+                    "file_num": 1000,
+                }
+                oci_create_report(options)
+                for report_type in OCI_REPORT_TYPE_TO_COLS:
+                    report_files = sorted(fname for fname in os.listdir(temp_dir) if f"_{report_type}-" in fname)
+                    self.assertGreater(len(report_files), 1)
+                    expected = [
+                        f"report_{report_type}-{1000 + index}_2024-01.csv" for index in range(len(report_files))
+                    ]
+                    self.assertEqual(report_files, expected)
+                    for fname in report_files:
+                        with open(fname) as csv_file:
+                            self.assertLessEqual(len(list(csv.DictReader(csv_file))), 10)
+            finally:
+                os.chdir(cwd)
+
+    @patch("nise.report.RotatingSink")
+    @patch("nise.report._month_generator")
+    def test_oci_create_report_closes_sinks_on_error(self, mock_generator, mock_sink):
+        """Test that every oci report sink is closed, as failed, when generation raises."""
+
+        def generate_rows():
+            yield "cost", {}
+            raise ValueError("generation failed")
+
+        mock_generator.return_value.generate_rows.side_effect = generate_rows
+        options = {"start_date": datetime.datetime(2024, 1, 10), "end_date": datetime.datetime(2024, 1, 12)}
+        with self.assertRaises(ValueError):
+            oci_create_report(options)
+        sink = mock_sink.return_value
+        self.assertEqual(sink.__enter__.call_count, len(OCI_REPORT_TYPE_TO_COLS))
+        self.assertEqual(sink.__exit__.call_count, len(OCI_REPORT_TYPE_TO_COLS))
+        self.assertIs(sink.__exit__.call_args.args[-3], ValueError)
+
     @patch("nise.report._write_csv")
     def test_oci_write_file(self, mock_write_csv):
         """Test that the oci_write_file method is called."""
@@ -0,0 +1,190 @@
+#
+# Copyright 2024 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+import csv
+import gzip
+import io
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import Mock
+
+from nise.generators.aws import AWSBatch
+from nise.generators.aws import get_aws_column_schema
+from nise.sink import CSVSink
+from nise.sink import JSONLSink
+from nise.sink import MultiSink
+from nise.sink import RotatingSink
+
+
+class CSVSinkTestCase(TestCase):
+    """
+    TestCase class for the csv sinks
+    """
+
+    def setUp(self):
+        self.header = ["col1", "col2", "col3"]
+        self.data = [{"col1": "r1c1", "col2": "r1c2"}, {"col1": "r2c1", "col2": "r2c2", "col3": "r2c3"}]
+
+    @staticmethod
+    def _read(file_name):
+        with open(file_name) as csv_file:
+            return list(csv.DictReader(csv_file))
+
+    def test_csv_sink(self):
+        """Test that rows are written in header order with missing columns left empty."""
+        with TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "report.csv")
+            with CSVSink(file_name, self.header) as sink:
+                sink.write_rows(self.data)
+            self.assertEqual(sink.row_count, 2)
+            rows = self._read(file_name)
+            self.assertEqual(list(rows[0].keys()), self.header)
+            self.assertEqual(rows[0]["col3"], "")
+            self.assertEqual(rows[1]["col3"], "r2c3")
+
+    def test_csv_sink_overrides(self):
+        """Test that overrides replace column values without changing the rows."""
+        with TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "report.csv")
+            with CSVSink(file_name, self.header, overrides={"col2": "override", "missing": "x"}) as sink:
+                sink.write_rows(self.data)
+            rows = self._read(file_name)
+            self.assertEqual([row["col2"] for row in rows], ["override", "override"])
+            self.assertEqual(self.data[0]["col2"], "r1c2")
+
+    def test_csv_sink_mirror(self):
+        """Test that a mirror receives a copy of the csv file as it is written."""
+
+        class Mirror(io.BytesIO):
+            def open(self):
+                return self
+
+            def close(self, failed=False):
+                self.data = self.getvalue()
+                self.failed = failed
+                super().close()
+
+        mirror = Mirror()
+        with TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "report.csv")
+            with CSVSink(file_name, self.header, mirror=mirror) as sink:
+                sink.write_rows(self.data)
+            with open(file_name, "rb") as csv_file:
+                self.assertEqual(mirror.data, csv_file.read())
+        self.assertFalse(mirror.failed)
+
+    def test_csv_sink_mirror_failed(self):
+        """Test that a mirror is told that writing failed when generation raises."""
+        mirror = Mock()
+        with TemporaryDirectory() as temp_dir:
+            sink = RotatingSink(lambda _: CSVSink(os.path.join(temp_dir, "report.csv"), self.header, mirror=mirror))
+            with self.assertRaises(ValueError):
+                with sink:
+                    sink.write(self.data[0])
+                    raise ValueError("generation failed")
+        mirror.open.return_value.close.assert_called_once_with(failed=True)
+
+    def test_multi_sink(self):
+        """Test that a multi sink writes every row to each of its sinks."""
+        with TemporaryDirectory() as temp_dir:
+            original = os.path.join(temp_dir, "report.csv")
+            finalized = os.path.join(temp_dir, "report-finalized.csv")
+            sink = MultiSink(
+                CSVSink(original, self.header), CSVSink(finalized, self.header, overrides={"col3": "final"})
+            )
+            with sink:
+                sink.write_rows(iter(self.data))
+            self.assertEqual([row["col3"] for row in self._read(original)], ["", "r2c3"])
+            self.assertEqual([row["col3"] for row in self._read(finalized)], ["final", "final"])
+
+    def test_write_batch(self):
+        """Test that a columnar batch is written in header order with overrides applied."""
+        batch = AWSBatch(get_aws_column_schema(), 2, {"col1": ["r1c1", "r2c1"], "col2": "shared"})
+        with TemporaryDirectory() as temp_dir:
+            original = os.path.join(temp_dir, "report.csv")
+            finalized = os.path.join(temp_dir, "report-finalized.csv")
+            sink = MultiSink(CSVSink(original, self.header), CSVSink(finalized, self.header, overrides={"col3": "x"}))
+            with sink:
+                sink.write_batch(batch)
+            self.assertEqual(sink.sinks[0].row_count, 2)
+            rows = self._read(original)
+            self.assertEqual([row["col1"] for row in rows], ["r1c1", "r2c1"])
+            self.assertEqual([row["col2"] for row in rows], ["shared", "shared"])
+            self.assertEqual([row["col3"] for row in self._read(finalized)], ["x", "x"])
+
+    def test_jsonl_sink(self):
+        """Test that every row is written as its own json document."""
+        with TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "report.json")
+            with JSONLSink(file_name) as sink:
+                sink.write_rows(self.data)
+            self.assertEqual(sink.row_count, 2)
+            with open(file_name) as jsonl_file:
+                self.assertEqual([json.loads(line) for line in jsonl_file], self.data)
+
+    def test_jsonl_sink_compressed(self):
+        """Test that a compressed sink gzips the rows, however they are buffered."""
+        with TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "report.json.gz")
+            for buffer_rows in (1, 1000):
+                with self.subTest(buffer_rows=buffer_rows):
+                    with JSONLSink(file_name, compress=True, buffer_rows=buffer_rows) as sink:
+                        sink.write_rows(self.data * 3)
+                    with gzip.open(file_name, "rt") as jsonl_file:
+                        self.assertEqual([json.loads(line) for line in jsonl_file], self.data * 3)
+
+    def test_rotating_sink(self):
+        """Test that rows are split over numbered files holding at most row_limit rows."""
+        with TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "report{}.csv")
+            sink = RotatingSink(lambda file_number: CSVSink(file_name.format(file_number), self.header), 2)
+            with sink:
+                sink.write_rows(self.data * 2 + self.data[:1])
+            self.assertEqual(sink.row_count, 5)
+            self.assertEqual(sink.files, [file_name.format(number) for number in (1, 2, 3)])
+            self.assertEqual([len(self._read(part)) for part in sink.files], [2, 2, 1])
+
+    def test_rotating_sink_rename(self):
+        """Test that closed files move to the names another factory gives their file numbers."""
+        with TemporaryDirectory() as temp_dir:
+            first_name = os.path.join(temp_dir, "first{}.csv")
+            final_name = os.path.join(temp_dir, "final{}.csv")
+            for rows, numbers in ((self.data * 2, (1, 2)), (self.data, (0,))):
+                with self.subTest(numbers=numbers):
+                    sink = RotatingSink(lambda file_number: CSVSink(first_name.format(file_number), self.header), 2)
+                    with sink:
+                        sink.write_rows(rows)
+                    sink.rename(lambda file_number: CSVSink(final_name.format(file_number), self.header))
+                    self.assertEqual(sink.files, [final_name.format(number) for number in numbers])
+                    self.assertTrue(all(os.path.isfile(part) for part in sink.files))
+                    self.assertFalse(any(name.startswith("first") for name in os.listdir(temp_dir)))
+
+    def test_rotating_sink_single_file(self):
+        """Test that a report fitting into one file keeps its unsplit name."""
+        with TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "report{}.csv")
+            for row_limit in (None, 2):
+                with self.subTest(row_limit=row_limit):
+                    sink = RotatingSink(
+                        lambda file_number: CSVSink(file_name.format(file_number), self.header), row_limit
+                    )
+                    with sink:
+                        sink.write_rows(self.data)
+                    self.assertEqual(sink.files, [file_name.format(0)])
+                    self.assertEqual(len(self._read(sink.files[0])), 2)
+                    self.assertFalse(os.path.exists(file_name.format(1)))
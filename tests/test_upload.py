@@ -15,22 +15,30 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 import os
+import threading
 from tempfile import NamedTemporaryFile
 from unittest import TestCase
+from unittest.mock import ANY
 from unittest.mock import Mock
 from unittest.mock import patch
 
-import boto3
 import faker
 from botocore.exceptions import ClientError
 from google.cloud.exceptions import GoogleCloudError
 from nise.generators.oci.oci_generator import OCI_REPORT_TYPE_TO_COLS
+from nise.upload import AzureBlobWriter
+from nise.upload import GCS_CHUNK_MULTIPLE
 from nise.upload import BlobServiceClient
 from nise.upload import gcp_bucket_to_dataset
+from nise.upload import OCI_MIN_PART_SIZE
 from nise.upload import upload_to_azure_container
 from nise.upload import upload_to_gcp_storage
 from nise.upload import upload_to_oci_bucket
+from nise.upload import reset_clients
+from nise.upload import service_account_token
 from nise.upload import upload_to_s3
+from nise.upload import UPLOAD_SETTINGS
+from nise.upload import UploadPool
 from oci.exceptions import InvalidConfig
 from oci.exceptions import InvalidPrivateKey
 from oci.exceptions import ServiceError
@@ -44,36 +52,146 @@ class UploadTestCase(TestCase):
     TestCase class for upload
     """
 
-    @patch("boto3.resource")
-    def test_upload_to_s3_success(self, mock_boto_resource):
+    def setUp(self):
+        """Start every test without cached clients."""
+        reset_clients()
+
+    @patch("boto3.client")
+    def test_upload_to_s3_success(self, mock_boto_client):
         """Test upload_to_s3 method with mock s3."""
         bucket_name = "my_bucket"
-        s3_client = Mock()
-        s3_client.Bucket.create.return_value = Mock()
-        s3_client.Bucket.return_value.upload_file.return_value = Mock()
-        mock_boto_resource.return_value = s3_client
-        s3_client = boto3.resource("s3")
-        s3_client.Bucket(bucket_name).create()
         with NamedTemporaryFile(delete=False) as t_file:
             success = upload_to_s3(bucket_name, "/file.txt", t_file.name)
         self.assertTrue(success)
+        mock_boto_client.return_value.upload_file.assert_called_with(t_file.name, bucket_name, "/file.txt")
         os.remove(t_file.name)
 
-    @patch("boto3.resource")
-    def test_upload_to_s3_failure(self, mock_boto_resource):
+    @patch("boto3.client")
+    def test_upload_to_s3_failure(self, mock_boto_client):
         """Test upload_to_s3 method with mock s3."""
         bucket_name = "my_bucket"
-        s3_client = Mock()
-        s3_client.Bucket.create.return_value = Mock()
-        s3_client.Bucket.return_value.upload_file.side_effect = ClientError({"Error": {}}, "Create")
-        mock_boto_resource.return_value = s3_client
-        s3_client = boto3.resource("s3")
-        s3_client.Bucket(bucket_name).create()
+        mock_boto_client.return_value.upload_file.side_effect = ClientError({"Error": {}}, "Create")
         with NamedTemporaryFile(delete=False) as t_file:
             success = upload_to_s3(bucket_name, "/file.txt", t_file.name)
         self.assertFalse(success)
         os.remove(t_file.name)
 
+    @patch("boto3.client")
+    def test_upload_to_s3_shared_client(self, mock_boto_client):
+        """Test that every upload of a run reuses the same S3 client."""
+        with NamedTemporaryFile() as t_file:
+            upload_to_s3("my_bucket", "/file1.txt", t_file.name)
+            upload_to_s3("my_bucket", "/file2.txt", t_file.name)
+        mock_boto_client.assert_called_once_with("s3", config=ANY)
+        self.assertEqual(mock_boto_client.return_value.upload_file.call_count, 2)
+
+    @patch.dict(UPLOAD_SETTINGS, {"max_concurrency": 3})
+    @patch("boto3.client")
+    def test_upload_to_s3_connection_pool(self, mock_boto_client):
+        """Test that the S3 client pools a connection for each concurrent file and part upload."""
+        with NamedTemporaryFile() as t_file:
+            upload_to_s3("my_bucket", "/file.txt", t_file.name)
+        self.assertEqual(mock_boto_client.call_args.kwargs["config"].max_pool_connections, 6)
+
+    @patch.dict(UPLOAD_SETTINGS, {"chunk_size": 4, "max_concurrency": 2})
+    @patch("nise.upload.S3_MIN_PART_SIZE", 4)
+    @patch("boto3.client")
+    def test_upload_to_s3_multipart(self, mock_boto_client):
+        """Test that a large file is uploaded in parts and completed in order."""
+        s3_client = mock_boto_client.return_value
+        s3_client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        s3_client.upload_part.side_effect = lambda **kwargs: {"ETag": f"etag-{kwargs['PartNumber']}"}
+        with NamedTemporaryFile() as t_file:
+            t_file.write(b"aaaabbbbcc")
+            t_file.flush()
+            self.assertTrue(upload_to_s3("my_bucket", "report.csv", t_file.name))
+        bodies = sorted(
+            (call.kwargs["PartNumber"], call.kwargs["Body"]) for call in s3_client.upload_part.call_args_list
+        )
+        self.assertEqual(bodies, [(1, b"aaaa"), (2, b"bbbb"), (3, b"cc")])
+        s3_client.list_multipart_uploads.assert_not_called()
+        s3_client.complete_multipart_upload.assert_called_once_with(
+            Bucket="my_bucket",
+            Key="report.csv",
+            UploadId="upload-1",
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": 1, "ETag": "etag-1"},
+                    {"PartNumber": 2, "ETag": "etag-2"},
+                    {"PartNumber": 3, "ETag": "etag-3"},
+                ]
+            },
+        )
+        s3_client.abort_multipart_upload.assert_not_called()
+
+    @patch.dict(UPLOAD_SETTINGS, {"chunk_size": 4, "max_concurrency": 2})
+    @patch("nise.upload.S3_MIN_PART_SIZE", 4)
+    @patch("boto3.client")
+    def test_upload_to_s3_multipart_failure(self, mock_boto_client):
+        """Test that a failed multipart upload is aborted instead of left open."""
+        s3_client = mock_boto_client.return_value
+        s3_client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        s3_client.upload_part.side_effect = ClientError({"Error": {}}, "UploadPart")
+        with NamedTemporaryFile() as t_file:
+            t_file.write(b"aaaabbbbcc")
+            t_file.flush()
+            self.assertFalse(upload_to_s3("my_bucket", "report.csv", t_file.name))
+        s3_client.complete_multipart_upload.assert_not_called()
+        s3_client.abort_multipart_upload.assert_called_once_with(
+            Bucket="my_bucket", Key="report.csv", UploadId="upload-1"
+        )
+
+    def test_upload_pool(self):
+        """Test that the upload pool returns results in order and re-raises upload errors."""
+        with UploadPool(max_workers=2) as uploads:
+            for value in range(4):
+                uploads.submit(lambda value: value * 2, value)
+            self.assertEqual(uploads.wait(), [0, 2, 4, 6])
+        with self.assertRaises(ValueError):
+            with UploadPool() as uploads:
+                uploads.submit(int, "not a number")
+
+    def test_upload_pool_back_pressure(self):
+        """Test that submitting blocks while max_pending uploads are queued or running."""
+        release = threading.Event()
+        with UploadPool(max_workers=1, max_pending=2) as uploads:
+            uploads.submit(release.wait)
+            uploads.submit(release.wait)
+            blocked = threading.Thread(target=uploads.submit, args=(int, "3"))
+            blocked.start()
+            blocked.join(0.1)
+            self.assertTrue(blocked.is_alive())
+            release.set()
+            blocked.join()
+            self.assertEqual(uploads.wait(), [True, True, 3])
+
+    def test_upload_pool_fails_fast(self):
+        """Test that submitting after a failed upload raises its exception."""
+        with self.assertRaises(ValueError):
+            with UploadPool(max_workers=1, max_pending=1) as uploads:
+                uploads.submit(int, "not a number")
+                with self.assertRaises(ValueError):
+                    uploads.submit(int, "1")
+
+    @patch("nise.upload.time.monotonic")
+    @patch("nise.upload.http_session")
+    def test_service_account_token(self, mock_session, mock_monotonic):
+        """Test that a service account token is reused until shortly before it expires."""
+        mock_post = mock_session.return_value.post
+        mock_post.return_value.json.side_effect = [
+            {"access_token": "first", "expires_in": 300},
+            {"access_token": "second", "expires_in": 300},
+        ]
+        mock_monotonic.return_value = 1000
+        token = service_account_token("https://sso/token", "id", "secret", "api.console")
+        self.assertEqual(token.get(), "first")
+        mock_monotonic.return_value = 1200
+        self.assertEqual(service_account_token("https://sso/token", "id", "secret", "api.console").get(), "first")
+        mock_monotonic.return_value = 1250
+        self.assertEqual(token.get(), "second")
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertIn("client_id=id&client_secret=secret", mock_post.call_args.kwargs["data"])
+
     @patch.object(BlobServiceClient, "from_connection_string")
     def test_upload_to_azure_success(self, _):
         """Test successful upload_to_storage method with mock."""
@@ -83,6 +201,52 @@ class UploadTestCase(TestCase):
         self.assertTrue(success)
         os.remove(t_file.name)
 
+    @patch.object(BlobServiceClient, "from_connection_string")
+    def test_upload_to_azure_shared_client(self, mock_blob_service):
+        """Test that azure uploads share one blob service client."""
+        with NamedTemporaryFile(delete=False) as t_file:
+            upload_to_azure_container("my_container", t_file.name, "/file.txt")
+            upload_to_azure_container("my_container", t_file.name, "/other.txt")
+        mock_blob_service.assert_called_once()
+        blob_client = mock_blob_service.return_value.get_blob_client.return_value
+        self.assertEqual(
+            blob_client.upload_blob.call_args.kwargs["max_concurrency"], UPLOAD_SETTINGS["max_concurrency"]
+        )
+        os.remove(t_file.name)
+
+    @patch.dict(UPLOAD_SETTINGS, {"chunk_size": 4, "max_concurrency": 2})
+    @patch.object(BlobServiceClient, "from_connection_string")
+    def test_azure_blob_writer(self, mock_blob_service):
+        """Test that written bytes are staged in blocks and committed in order on close."""
+        blob_client = mock_blob_service.return_value.get_blob_client.return_value
+        writer = AzureBlobWriter("my_container", "dir/file.csv").open()
+        writer.write(b"abc")
+        writer.write(b"defghij")
+        self.assertTrue(writer.close())
+        staged = sorted(call.args for call in blob_client.stage_block.call_args_list)
+        self.assertEqual(staged, [("00000000", b"abcd"), ("00000001", b"efgh"), ("00000002", b"ij")])
+        committed = blob_client.commit_block_list.call_args.args[0]
+        self.assertEqual([block.id for block in committed], ["00000000", "00000001", "00000002"])
+
+    @patch.object(BlobServiceClient, "from_connection_string")
+    def test_azure_blob_writer_failure(self, mock_blob_service):
+        """Test that a failed block leaves the blob uncommitted."""
+        blob_client = mock_blob_service.return_value.get_blob_client.return_value
+        blob_client.stage_block.side_effect = IOError
+        writer = AzureBlobWriter("my_container", "dir/file.csv").open()
+        writer.write(b"data")
+        self.assertFalse(writer.close())
+        blob_client.commit_block_list.assert_not_called()
+
+    @patch.object(BlobServiceClient, "from_connection_string")
+    def test_azure_blob_writer_failed_writing(self, mock_blob_service):
+        """Test that the blob of a writer closed after failed writing is never committed."""
+        blob_client = mock_blob_service.return_value.get_blob_client.return_value
+        writer = AzureBlobWriter("my_container", "dir/file.csv").open()
+        writer.write(b"data")
+        self.assertFalse(writer.close(failed=True))
+        blob_client.commit_block_list.assert_not_called()
+
     @patch.object(BlobServiceClient, "from_connection_string")
     def test_upload_to_azure_failure(self, mock_blob_service):
         """Test failure upload_to_storage method with mock."""
@@ -98,9 +262,10 @@ class UploadTestCase(TestCase):
     def test_gcp_upload_success(self, mock_storage):
         """Test upload_to_s3 method with mock s3."""
         bucket_name = fake.slug()
-        local_path = fake.file_path()
         remote_path = fake.file_path()
-        uploaded = upload_to_gcp_storage(bucket_name, local_path, remote_path)
+        with NamedTemporaryFile() as t_file:
+            local_path = t_file.name
+            uploaded = upload_to_gcp_storage(bucket_name, local_path, remote_path)
 
         mock_client = mock_storage.Client.return_value
         mock_client.get_bucket.assert_called_with(bucket_name)
@@ -113,6 +278,42 @@ class UploadTestCase(TestCase):
 
         self.assertTrue(uploaded)
 
+    @patch.dict(os.environ, {"GOOGLE_APPLICATION_CREDENTIALS": "/path/to/creds"})
+    @patch("nise.upload.storage")
+    def test_gcp_upload_shared_bucket(self, mock_storage):
+        """Test that GCP uploads to a bucket share one client and bucket handle."""
+        with NamedTemporaryFile() as t_file:
+            for remote_path in ("report-1.csv", "report-2.csv"):
+                self.assertTrue(upload_to_gcp_storage("my-bucket", t_file.name, remote_path))
+        mock_storage.Client.assert_called_once()
+        mock_storage.Client.return_value.get_bucket.assert_called_once_with("my-bucket")
+
+    @patch.dict(os.environ, {"GOOGLE_APPLICATION_CREDENTIALS": "/path/to/creds"})
+    @patch.dict(UPLOAD_SETTINGS, {"chunk_size": 4, "max_concurrency": 2})
+    @patch("nise.upload.storage")
+    def test_gcp_upload_composite(self, mock_storage):
+        """Test that a large file is uploaded as parallel parts composed into the blob."""
+        bucket = mock_storage.Client.return_value.get_bucket.return_value
+        blobs = {}
+        uploaded = {}
+
+        def blob(name):
+            part = Mock(name=name)
+            part.upload_from_file.side_effect = lambda source, size: uploaded.update({name: source.read(size)})
+            return blobs.setdefault(name, part)
+
+        bucket.blob.side_effect = blob
+        with NamedTemporaryFile() as t_file:
+            t_file.write(b"abcdefghij")
+            t_file.flush()
+            self.assertTrue(upload_to_gcp_storage("my-bucket", t_file.name, "report.csv"))
+        parts = [blobs[f"report.csv.part-{index:02d}"] for index in range(3)]
+        self.assertEqual([uploaded[f"report.csv.part-{index:02d}"] for index in range(3)], [b"abcd", b"efgh", b"ij"])
+        self.assertEqual([part.chunk_size for part in parts], [GCS_CHUNK_MULTIPLE] * 3)
+        blobs["report.csv"].compose.assert_called_once_with(parts)
+        blobs["report.csv"].upload_from_filename.assert_not_called()
+        self.assertEqual(bucket.delete_blobs.call_args.args[0], parts)
+
     @patch.dict(os.environ, {"GOOGLE_APPLICATION_CREDENTIALS": "/path/to/creds"})
     @patch("nise.upload.storage.Client")
     def test_gcp_upload_error(self, mock_storage):
@@ -194,6 +395,7 @@ class UploadTestCase(TestCase):
         self.assertFalse(uploaded)
 
     @patch.dict(os.environ, {"OCI_CONFIG_FILE": "/path/to/creds"})
+    @patch("nise.upload.UploadManager")
     @patch("nise.upload.ObjectStorageClient")
     @patch("nise.upload.validate_config")
     @patch("nise.upload.from_file")
@@ -202,6 +404,7 @@ class UploadTestCase(TestCase):
         mock_from_file,
         mock_validate_config,
         mock_ostorage_client,
+        _,
     ):
         """Test upload_to_oci_bucket method is called."""
 
@@ -228,9 +431,10 @@ class UploadTestCase(TestCase):
             "OCI_NAMESPACE": "oci_namespace",
         },
     )
+    @patch("nise.upload.UploadManager")
     @patch("nise.upload.ObjectStorageClient")
     @patch("nise.upload.validate_config")
-    def test_upload_to_oci_bucket_success_with_config_vars(self, mock_validate_config, mock_ostorage_client):
+    def test_upload_to_oci_bucket_success_with_config_vars(self, mock_validate_config, mock_ostorage_client, _):
         """Test upload_to_oci_bucket method is called correctly"""
         bucket_name = "my_bucket"
         config = {
@@ -250,6 +454,35 @@ class UploadTestCase(TestCase):
                 self.assertTrue(success)
             os.remove(t_file.name)
 
+    @patch.dict(os.environ, {"OCI_CONFIG_FILE": "/path/to/creds"})
+    @patch("nise.upload.UploadManager")
+    @patch("nise.upload.ObjectStorageClient")
+    @patch("nise.upload.validate_config")
+    @patch("nise.upload.from_file")
+    def test_upload_to_oci_bucket_shared_client(self, mock_from_file, _, mock_ostorage_client, mock_upload_manager):
+        """Test that OCI uploads share one client and namespace and go through the upload manager."""
+        mock_from_file.return_value = {}
+        mock_ostorage_client.return_value.get_namespace.return_value.data = "my_namespace"
+        upload_file = mock_upload_manager.return_value.upload_file
+        for report_type in OCI_REPORT_TYPE_TO_COLS:
+            with NamedTemporaryFile(dir=os.getcwd()) as t_file:
+                file_name = os.path.basename(t_file.name)
+                self.assertTrue(upload_to_oci_bucket("my_bucket", report_type, file_name))
+            upload_file.assert_called_with(
+                "my_namespace",
+                "my_bucket",
+                f"reports/{report_type}/{file_name}.gz",
+                f"{file_name}.gz",
+                part_size=max(UPLOAD_SETTINGS["chunk_size"], OCI_MIN_PART_SIZE),
+            )
+            self.assertFalse(os.path.exists(f"{file_name}.gz"))
+        mock_from_file.assert_called_once()
+        mock_ostorage_client.assert_called_once_with({})
+        mock_ostorage_client.return_value.get_namespace.assert_called_once()
+        mock_upload_manager.assert_called_once_with(
+            mock_ostorage_client.return_value, parallel_process_count=UPLOAD_SETTINGS["max_concurrency"]
+        )
+
     @patch.dict(os.environ, {"OCI_CONFIG_FILE": "/path/to/creds"})
     def test_upload_to_oci_bucket_config_not_found(self):
         """Test upload to oci bucket fails when config file is not found."""